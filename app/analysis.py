@@ -1,33 +1,38 @@
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
 import io
 import base64
-from scipy import signal
+import itertools
 from sklearn.decomposition import PCA
-from typing import List, Tuple
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from . import crud
+from .config import settings
+from .dsp.blockwise import RunningMoments, filter_blocks
+from .dsp.filterbank import FilterBank, FilterSpec, StreamingFilter
 from .models import BCISession, BCIData
 
-def generate_session_plots(session: BCISession, data_points: List[BCIData]) -> Tuple[io.BytesIO, io.BytesIO]:
-    df = pd.DataFrame([
-        {
-            "timestamp": d.timestamp,
-            "channel_1": d.channel_1,
-            "channel_2": d.channel_2,
-            "channel_3": d.channel_3,
-            "channel_4": d.channel_4
-        } for d in data_points
-    ])
-    
-    if df.empty:
+def data_points_to_arrays(data_points: List[BCIData]) -> Tuple[np.ndarray, np.ndarray]:
+    # 행 단위 BCIData를 (timestamps, (samples, channels)) 배열로 변환
+    timestamps = np.array([d.timestamp for d in data_points], dtype="datetime64[us]")
+    if not data_points:
+        return timestamps, np.empty((0, 0))
+    data = np.array([d.values for d in data_points], dtype=float)
+    return timestamps, data
+
+def generate_signal_plots(timestamps: np.ndarray, data: np.ndarray, channel_names: Optional[List[str]] = None) -> Tuple[io.BytesIO, io.BytesIO]:
+    if len(data) == 0:
         return None, None
+    n_channels = data.shape[1]
+    labels = channel_names or [f'Ch {i + 1}' for i in range(n_channels)]
 
     # 시계열 플롯
     plt.figure(figsize=(10, 6))
-    for channel in ['channel_1', 'channel_2', 'channel_3', 'channel_4']:
-        plt.plot(df['timestamp'], df[channel], label=channel)
+    for i in range(n_channels):
+        plt.plot(timestamps, data[:, i], label=labels[i])
     plt.legend()
     plt.title('Channel Data Over Time')
     plt.xlabel('Timestamp')
@@ -42,15 +47,15 @@ def generate_session_plots(session: BCISession, data_points: List[BCIData]) -> T
 
     # 채널 상관관계 히트맵
     plt.figure(figsize=(8, 6))
-    correlation = df[['channel_1', 'channel_2', 'channel_3', 'channel_4']].corr()
+    correlation = np.atleast_2d(np.corrcoef(data, rowvar=False))
     plt.imshow(correlation, cmap='coolwarm', aspect='auto')
     plt.colorbar()
-    plt.xticks(range(4), ['Ch 1', 'Ch 2', 'Ch 3', 'Ch 4'])
-    plt.yticks(range(4), ['Ch 1', 'Ch 2', 'Ch 3', 'Ch 4'])
+    plt.xticks(range(n_channels), labels)
+    plt.yticks(range(n_channels), labels)
     plt.title('Channel Correlation Heatmap')
-    for i in range(4):
-        for j in range(4):
-            plt.text(j, i, f'{correlation.iloc[i, j]:.2f}', ha='center', va='center')
+    for i in range(n_channels):
+        for j in range(n_channels):
+            plt.text(j, i, f'{correlation[i, j]:.2f}', ha='center', va='center')
     plt.tight_layout()
     
     heatmap_plot = io.BytesIO()
@@ -60,18 +65,51 @@ def generate_session_plots(session: BCISession, data_points: List[BCIData]) -> T
 
     return timeseries_plot, heatmap_plot
 
-def preprocess_eeg_data(data: np.ndarray, sampling_rate: float) -> np.ndarray:
-    # Apply a bandpass filter (1-50 Hz)
-    b, a = signal.butter(4, [1, 50], btype='bandpass', fs=sampling_rate)
-    filtered_data = signal.filtfilt(b, a, data, axis=0)
-    
-    # Apply a notch filter to remove 60 Hz noise
-    notch_freq = 60.0
-    quality_factor = 30.0
-    b_notch, a_notch = signal.iirnotch(notch_freq, quality_factor, sampling_rate)
-    notched_data = signal.filtfilt(b_notch, a_notch, filtered_data, axis=0)
-    
-    return notched_data
+def generate_session_plots(session: BCISession, data_points: List[BCIData]) -> Tuple[io.BytesIO, io.BytesIO]:
+    timestamps, data = data_points_to_arrays(data_points)
+    return generate_signal_plots(timestamps, data, session.channel_names)
+
+def generate_window_plots(db: Session, session: BCISession, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> Tuple[io.BytesIO, io.BytesIO]:
+    # 파일 저장 세션이면 memmap 슬라이스만 읽는다
+    timestamps, data = crud.get_signal(db, session.id, start_time, end_time)
+    return generate_signal_plots(timestamps, data, session.channel_names)
+
+def default_filter_spec() -> FilterSpec:
+    return FilterSpec(
+        band=(settings.FILTER_PASSBAND_LOW, settings.FILTER_PASSBAND_HIGH),
+        order=settings.FILTER_ORDER,
+        notch=settings.LINE_FREQUENCY
+    )
+
+def session_filter_spec(session: BCISession) -> FilterSpec:
+    # 세션에 지정된 통과 대역과 전원 주파수를 쓰고, 없는 값은 설정의 기본값으로 채운다
+    default = default_filter_spec()
+    low, high = default.band
+    return FilterSpec(
+        band=(
+            session.passband_low if session.passband_low is not None else low,
+            session.passband_high if session.passband_high is not None else high
+        ),
+        order=default.order,
+        notch=session.line_frequency if session.line_frequency is not None else default.notch
+    )
+
+def preprocess_eeg_data(data: np.ndarray, sampling_rate: float, spec: Optional[FilterSpec] = None, dtype: Optional[str] = None) -> np.ndarray:
+    # 대역 통과(기본 1-50 Hz)와 전원 잡음 노치(기본 60 Hz)를 SOS 체인 하나로 zero-phase 적용한다.
+    # 필터 설계는 (샘플링 레이트, 구성)별로 캐시된다
+    bank = FilterBank(sampling_rate, spec or default_filter_spec(), dtype or settings.FILTER_DTYPE)
+    return bank.apply(data)
+
+def streaming_preprocessor(session: BCISession, sampling_rate: Optional[float] = None, dtype: Optional[str] = None) -> StreamingFilter:
+    """세션 필터 구성으로 청크를 하나씩 인과적으로 전처리하는 StreamingFilter를 만듭니다.
+
+    Raises:
+        ValueError: 샘플링 레이트를 알 수 없거나 필터 구성이 그 레이트에서 설계되지 않는 경우
+    """
+    rate = sampling_rate or session.sampling_rate
+    if not rate:
+        raise ValueError("A sampling rate is required for streaming preprocessing")
+    return FilterBank(rate, session_filter_spec(session), dtype or settings.FILTER_DTYPE).stream()
 
 def extract_features(data: np.ndarray) -> np.ndarray:
     # Extract basic statistical features
@@ -89,22 +127,15 @@ def extract_features(data: np.ndarray) -> np.ndarray:
     
     return features
 
-def analyze_session_data(session: BCISession, data_points: List[BCIData]) -> dict:
-    df = pd.DataFrame([
-        {
-            "timestamp": d.timestamp,
-            "channel_1": d.channel_1,
-            "channel_2": d.channel_2,
-            "channel_3": d.channel_3,
-            "channel_4": d.channel_4
-        } for d in data_points
-    ])
-    
-    data = df[['channel_1', 'channel_2', 'channel_3', 'channel_4']].values
-    
+def infer_sampling_rate(timestamps: np.ndarray, default: float = 250.0) -> float:
+    if len(timestamps) < 2:
+        return default
+    step_us = np.median(np.diff(timestamps).astype("timedelta64[us]").astype(np.float64))
+    return 1e6 / step_us if step_us > 0 else default
+
+def analyze_signal(session_id: int, data: np.ndarray, sampling_rate: float, spec: Optional[FilterSpec] = None) -> dict:
     # Preprocess the data
-    sampling_rate = 250  # Assume 250 Hz sampling rate, adjust as needed
-    preprocessed_data = preprocess_eeg_data(data, sampling_rate)
+    preprocessed_data = preprocess_eeg_data(data, sampling_rate, spec)
     
     # Extract features
     features = extract_features(preprocessed_data)
@@ -114,9 +145,74 @@ def analyze_session_data(session: BCISession, data_points: List[BCIData]) -> dic
     channel_stds = np.std(preprocessed_data, axis=0)
     
     return {
-        "session_id": session.id,
-        "num_data_points": len(data_points),
+        "session_id": session_id,
+        "num_data_points": len(data),
         "channel_means": channel_means.tolist(),
         "channel_stds": channel_stds.tolist(),
         "extracted_features": features.tolist()
-    }
\ No newline at end of file
+    }
+
+def session_sampling_rate(session: BCISession, timestamps: np.ndarray) -> float:
+    # 세션에 샘플링 레이트가 있으면 그대로 쓰고, 없으면 타임스탬프 간격으로 추정한다
+    return session.sampling_rate or infer_sampling_rate(timestamps)
+
+def analyze_session_data(session: BCISession, data_points: List[BCIData]) -> dict:
+    timestamps, data = data_points_to_arrays(data_points)
+    return analyze_signal(session.id, data, session_sampling_rate(session, timestamps), session_filter_spec(session))
+
+def analyze_session_window(db: Session, session: BCISession, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> dict:
+    # 청크/memmap 저장 신호의 시간 구간만 읽어 분석한다
+    timestamps, data = crud.get_signal(db, session.id, start_time, end_time)
+    return analyze_signal(session.id, data, session_sampling_rate(session, timestamps), session_filter_spec(session))
+
+def analyze_session_full(db: Session, session: BCISession) -> dict:
+    """청크, 데이터 포인트, 보관 파일을 합친 세션 전체 신호를 한 번에 읽어 분석합니다.
+
+    결과 형식은 analyze_session_chunked와 같으므로 저장되는 특징의 크기가 세션 길이와
+    무관합니다 (샘플별 PCA 투영값 대신 주성분과 설명 분산).
+
+    Raises:
+        ValueError: 세션에 샘플이 없는 경우
+    """
+    timestamps, data = crud.get_session_signal(db, session.id)
+    if len(timestamps) == 0:
+        raise ValueError(f"Session {session.id} has no samples")
+    moments = RunningMoments()
+    moments.update(preprocess_eeg_data(data, session_sampling_rate(session, timestamps), session_filter_spec(session)))
+    return _moments_result(session.id, moments)
+
+def analyze_session_chunked(db: Session, session: BCISession, block_bytes: Optional[int] = None, dtype: Optional[str] = None) -> dict:
+    """세션 전체를 겹치는 블록으로 나눠 읽고 필터링하며 분석합니다.
+
+    메모리 사용량은 블록 크기(기본 ANALYSIS_BLOCK_BYTES)에 비례하고 세션 길이와 무관합니다.
+    평균과 표준편차는 analyze_session_data와 같고, PCA 특징은 샘플별 투영값 대신
+    누적 공분산의 주성분(2 × 채널)과 설명 분산입니다.
+
+    Raises:
+        ValueError: 세션에 샘플이 없거나 블록마다 채널 수가 다른 경우
+    """
+    dtype = np.dtype(dtype or settings.FILTER_DTYPE)
+    channels = len(session.channel_labels)
+    block_size = max((block_bytes or settings.ANALYSIS_BLOCK_BYTES) // (channels * dtype.itemsize), 1)
+    blocks = crud.iter_session_blocks(db, session.id)
+    first = next(blocks, None)
+    if first is None:
+        raise ValueError(f"Session {session.id} has no samples")
+    bank = FilterBank(session_sampling_rate(session, first[0]), session_filter_spec(session), dtype)
+    moments = RunningMoments()
+    for _, filtered in filter_blocks(itertools.chain([first], blocks), bank, block_size):
+        moments.update(filtered)
+
+    return _moments_result(session.id, moments)
+
+def _moments_result(session_id: int, moments: RunningMoments) -> dict:
+    components, explained_variance = moments.principal_components(min(2, len(moments.mean)))
+    features = np.concatenate([moments.mean, moments.std, moments.max, moments.min, components.flatten()])
+    return {
+        "session_id": session_id,
+        "num_data_points": moments.count,
+        "channel_means": moments.mean.tolist(),
+        "channel_stds": moments.std.tolist(),
+        "extracted_features": features.tolist(),
+        "pca_explained_variance": explained_variance.tolist()
+    }
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +9,60 @@ class Settings(BaseSettings):
     # SQLite 설정
     DATABASE_URL: str
 
+    # 저장소 모드: "default" 또는 "wal" (WAL + 단일 writer 스레드 + 읽기 전용 커넥션 풀)
+    DB_STORAGE_MODE: str = "default"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64 * 1024  # 음수는 KiB 단위
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_READER_POOL_SIZE: int = 5
+    WRITER_MAX_BATCH: int = 64  # 그룹 커밋 한 번에 묶을 최대 작업 수
+    WRITER_QUEUE_SIZE: int = 1024
+    SQLITE_AUTO_VACUUM: str = "INCREMENTAL"
+
+    # WebSocket 스트리밍 수집
+    WS_MAX_PENDING_FRAMES: int = 256  # 쓰기를 기다리는 프레임이 이만큼 쌓이면 소켓 읽기를 멈춘다
+    WS_MAX_BATCH_SAMPLES: int = 50000  # 한 번의 쓰기로 묶을 최대 샘플 수
+    WS_FLUSH_INTERVAL_MS: int = 50  # 첫 프레임 이후 같은 배치로 묶기 위해 기다리는 최대 시간
+
+    # 비동기 수집 큐: 라우터는 작업을 넣고, flusher가 크기 또는 시간 기준으로 묶어 저장한다
+    INGEST_QUEUE_MAX_SAMPLES: int = 500000  # 대기 + 저장 중인 샘플이 이보다 많으면 새 요청이 기다리거나 429를 받는다
+    INGEST_FLUSH_SAMPLES: int = 50000
+    INGEST_FLUSH_INTERVAL_MS: int = 20
+    INGEST_ENQUEUE_TIMEOUT_MS: int = 500
+    # 고정 레이트 세션에서 이어지는 샘플(예: 폼으로 하나씩 추가)을 붙여 넣을 마지막 청크의 최대 샘플 수
+    TAIL_CHUNK_MAX_SAMPLES: int = 1024
+
+    # 라이브 세션 최근 샘플 링 버퍼
+    LIVE_BUFFER_BYTES_PER_SESSION: int = 8 * 1024 * 1024
+    LIVE_BUFFER_MAX_SESSIONS: int = 32
+    LIVE_EVENTS_POLL_MS: int = 100  # SSE 스트림이 새 샘플을 확인하는 주기
+    LIVE_EVENTS_KEEPALIVE_SECONDS: int = 15  # 새 샘플이 없을 때 연결 유지용 주석을 보내는 간격
+
+    # 분석 전처리 필터 (세션에 값이 없을 때의 기본값)
+    LINE_FREQUENCY: float = 60.0  # 전원 잡음 주파수: 50 또는 60 Hz
+    FILTER_PASSBAND_LOW: float = 1.0
+    FILTER_PASSBAND_HIGH: float = 50.0
+    FILTER_ORDER: int = 4
+    FILTER_DTYPE: str = "float64"  # "float32"이면 메모리와 대역폭이 절반
+    ANALYSIS_BLOCK_BYTES: int = 16 * 1024 * 1024  # 블록 단위 분석에서 한 번에 필터링할 신호 크기 (필터 임시 배열로 최대 메모리는 이 값의 몇 배)
+    ANALYSIS_WORKERS: Optional[int] = None  # 배치 분석 프로세스 수 (None이면 CPU 수). 메모리 한도 / 프로세스당 최대 메모리 이하로
+
+    # 보존 정책 (None이면 비활성): 오래된 세션 삭제, 또는 원시 데이터만 삭제하고 요약은 유지
+    RETENTION_SESSION_DAYS: Optional[int] = None
+    RETENTION_RAW_DATA_DAYS: Optional[int] = None
+    RETENTION_INTERVAL_SECONDS: int = 3600
+    RETENTION_DELETE_CHUNK: int = 5000  # DELETE 한 번(트랜잭션 하나)에 지우는 최대 행 수
+    RETENTION_VACUUM_PAGES: int = 2000  # 한 번의 실행 후 반환할 최대 빈 페이지 수
+
+    # 세션별 신호 파일(memmap) 저장 경로
+    SIGNAL_STORAGE_DIR: str = "storage/signals"
+
+    # 닫힌 세션 Parquet 보관 (None이면 비활성): date_recorded가 이보다 오래된 세션을 보관
+    ARCHIVE_STORAGE_DIR: str = "storage/archive"
+    ARCHIVE_AFTER_DAYS: Optional[int] = None
+    ARCHIVE_COMPRESSION: str = "zstd"
+
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -1,19 +1,72 @@
+from sqlalchemy import insert, or_, and_, func, delete, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
 import logging
+import numpy as np
 from . import models, schemas
+from .config import settings
+from .storage import signal_files, session_archive
+from .dsp import pyramid
+from .ingestion import live_buffer
 
 logger = logging.getLogger(__name__)
 
+# 채널 벡터 도입 전의 4채널 컬럼 (vector가 NULL인 행에서만 읽는다)
+LEGACY_CHANNEL_COLUMNS = ["channel_1", "channel_2", "channel_3", "channel_4"]
+
+# 신호 블록과 데이터 포인트 벡터는 little-endian float32로 저장
+SIGNAL_DTYPE = np.dtype("<f4")
+
 def get_session(db: Session, session_id: int):
     return db.query(models.BCISession).filter(models.BCISession.id == session_id).first()
 
 def get_sessions(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.BCISession).offset(skip).limit(limit).all()
 
-def create_session(db: Session, session: schemas.BCISessionCreate):
+def session_summary_query(skip: int = 0, limit: int = 100):
+    """세션과 채널 0 누적 통계를 LEFT JOIN 하는 SELECT 하나를 만듭니다 (동기/비동기 공용).
+
+    샘플 수와 첫/마지막 샘플 시각은 통계 테이블에 이미 있으므로 자식 행을 읽지 않습니다.
+    """
+    session, stats = models.BCISession, models.BCIChannelStats
+    return (
+        select(session, stats.count, stats.first_timestamp, stats.last_timestamp)
+        .outerjoin(stats, and_(stats.session_id == session.id, stats.channel_index == 0))
+        .order_by(session.date_recorded.desc(), session.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+
+def to_session_summary(row) -> schemas.BCISessionSummary:
+    session, count, first, last = row
+    summary = schemas.BCISessionSummary.from_orm(session)
+    summary.sample_count = count or 0
+    summary.first_timestamp, summary.last_timestamp = first, last
+    if first is not None and last is not None:
+        summary.duration_seconds = (last - first).total_seconds()
+    return summary
+
+def get_session_summaries(db: Session, skip: int = 0, limit: int = 100) -> List[schemas.BCISessionSummary]:
+    return [to_session_summary(row) for row in db.execute(session_summary_query(skip, limit)).all()]
+
+def new_session(session: schemas.BCISessionCreate) -> models.BCISession:
     db_session = models.BCISession(**session.dict())
+    if session.channel_names:
+        db_session.channel_count = len(session.channel_names)
+    return db_session
+
+def add_session(db: Session, session: schemas.BCISessionCreate) -> models.BCISession:
+    """세션을 추가합니다 (커밋하지 않음)."""
+    db_session = new_session(session)
     db.add(db_session)
+    db.flush()
+    return db_session
+
+def create_session(db: Session, session: schemas.BCISessionCreate):
+    db_session = add_session(db, session)
     db.commit()
     db.refresh(db_session)
     return db_session
@@ -21,13 +74,647 @@ def create_session(db: Session, session: schemas.BCISessionCreate):
 def get_data_points(db: Session, session_id: int, skip: int = 0, limit: int = 100):
     return db.query(models.BCIData).filter(models.BCIData.session_id == session_id).offset(skip).limit(limit).all()
 
-def create_data_point(db: Session, data_point: schemas.BCIDataCreate, session_id: int):
-    db_data_point = models.BCIData(**data_point.dict(), session_id=session_id)
+def get_data_points_page(
+    db: Session, session_id: int, after_timestamp: Optional[datetime] = None, after_id: Optional[int] = None, limit: int = 100
+) -> Tuple[List[models.BCIData], Optional[schemas.DataPointCursor]]:
+    # (timestamp, id) 키셋 페이지네이션: 페이지 위치와 관계없이 인덱스 탐색 한 번으로 끝난다
+    check_page_cursor(after_timestamp, after_id)
+    query = db.query(models.BCIData).filter(models.BCIData.session_id == session_id)
+    if after_timestamp is not None:
+        query = query.filter(or_(
+            models.BCIData.timestamp > after_timestamp,
+            and_(models.BCIData.timestamp == after_timestamp, models.BCIData.id > (after_id or 0))
+        ))
+    return data_points_page(query.order_by(models.BCIData.timestamp, models.BCIData.id).limit(limit + 1).all(), limit)
+
+def check_page_cursor(after_timestamp: Optional[datetime], after_id: Optional[int]) -> None:
+    """커서는 (timestamp, id) 쌍이므로 after_id만 주면 위치를 알 수 없어 422로 거부합니다."""
+    if after_id is not None and after_timestamp is None:
+        raise HTTPException(status_code=422, detail="after_id requires after_timestamp")
+
+def data_points_page(rows: List[models.BCIData], limit: int) -> Tuple[List[models.BCIData], Optional[schemas.DataPointCursor]]:
+    """limit + 1개까지 읽은 행을 (페이지, 다음 커서)로 나눕니다. 다음 행이 없으면 커서는 None입니다."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, schemas.DataPointCursor(after_timestamp=rows[-1].timestamp, after_id=rows[-1].id)
+
+# add_* 함수는 커밋하지 않는다. 단일 writer 스레드가 여러 작업을 묶어 한 번에 커밋할 때 사용한다.
+
+def claim_channel_count(db: Session, session_id: int, channel_count: int) -> Optional[models.BCISession]:
+    """세션의 채널 수를 확인하고, 아직 정해지지 않았으면 첫 데이터의 채널 수로 정합니다."""
+    session = get_session(db, session_id)
+    if session is not None:
+        if session.archived_at is not None:
+            raise ValueError(f"Session {session_id} is archived and no longer accepts data")
+        if session.channel_count is None:
+            session.channel_count = channel_count
+        elif session.channel_count != channel_count:
+            raise ValueError(f"Session {session_id} has {session.channel_count} channels, got {channel_count}")
+    return session
+
+def claim_start_time(session: models.BCISession, sampling_rate: float, start_time: datetime) -> None:
+    """고정 레이트 세션의 샘플링 레이트를 확인하고, 시작 시각이 없으면 첫 샘플 시각으로 정합니다."""
+    if abs(session.sampling_rate - sampling_rate) > 1e-9 * session.sampling_rate:
+        raise ValueError(f"Session {session.id} is sampled at {session.sampling_rate:g} Hz, got {sampling_rate:g} Hz")
+    if session.start_time is None:
+        session.start_time = start_time
+
+def next_sample_index(db: Session, session_id: int) -> int:
+    """고정 레이트 세션에서 마지막으로 저장된 샘플 다음의 인덱스 (인덱스 탐색 한 번)"""
+    last = (
+        db.query(models.BCISignalChunk.start_index, models.BCISignalChunk.sample_count)
+        .filter(models.BCISignalChunk.session_id == session_id, models.BCISignalChunk.start_index.isnot(None))
+        .order_by(models.BCISignalChunk.start_index.desc())
+        .first()
+    )
+    return 0 if last is None else last.start_index + last.sample_count
+
+def check_index_range_free(db: Session, session_id: int, start_index: int, sample_count: int) -> None:
+    """[start_index, start_index + sample_count) 구간에 이미 저장된 샘플이 있으면 ValueError.
+
+    저장된 청크끼리는 겹치지 않으므로 구간 끝보다 앞에서 시작하는 마지막 청크 하나만 보면 됩니다.
+    """
+    end = start_index + sample_count
+    last = (
+        db.query(models.BCISignalChunk.start_index, models.BCISignalChunk.sample_count)
+        .filter(
+            models.BCISignalChunk.session_id == session_id,
+            models.BCISignalChunk.start_index.isnot(None),
+            models.BCISignalChunk.start_index < end,
+        )
+        .order_by(models.BCISignalChunk.start_index.desc())
+        .first()
+    )
+    if last is not None and last.start_index + last.sample_count > start_index:
+        raise ValueError(f"Samples {start_index}-{end - 1} of session {session_id} are already stored")
+
+def add_indexed_samples(db: Session, session: models.BCISession, timestamps: List[Optional[datetime]], values: np.ndarray) -> List[models.BCISignalChunk]:
+    """고정 레이트 세션에 샘플을 인덱스로 추가하고 만든 청크들을 반환합니다 (커밋하지 않음).
+
+    타임스탬프는 세션의 샘플 격자에 맞춰 인덱스로 바꾸고, 인덱스가 연속인 구간마다
+    청크 하나를 만듭니다. 타임스탬프가 모두 없으면 마지막 샘플 뒤에 이어 붙입니다.
+    """
+    if all(t is None for t in timestamps):
+        if session.start_time is None:
+            session.start_time = datetime.now()
+        indices = next_sample_index(db, session.id) + np.arange(len(values))
+    elif any(t is None for t in timestamps):
+        raise ValueError("Either all or none of the data points must have a timestamp")
+    else:
+        if session.start_time is None:
+            session.start_time = timestamps[0]
+        indices = np.array([session.index_at(t) for t in timestamps])
+        if np.any(np.diff(indices) <= 0):
+            raise ValueError(f"Timestamps must be strictly increasing at {session.sampling_rate:g} Hz")
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    return [
+        _add_chunk(db, session, samples, session.time_at(int(run[0])), session.sampling_rate, int(run[0]), extend_tail=True)
+        for run, samples in zip(np.split(indices, breaks), np.split(values, breaks))
+    ]
+
+def _tail_chunk(db: Session, session_id: int, start_index: int, sample_count: int, channel_count: int) -> Optional[models.BCISignalChunk]:
+    """start_index에서 바로 이어지고 sample_count개를 더 담을 수 있는 세션의 마지막 청크"""
+    tail = (
+        db.query(models.BCISignalChunk)
+        .filter(models.BCISignalChunk.session_id == session_id, models.BCISignalChunk.start_index.isnot(None))
+        .order_by(models.BCISignalChunk.start_index.desc())
+        .first()
+    )
+    if (
+        tail is None
+        or tail.start_index + tail.sample_count != start_index
+        or tail.channel_count != channel_count
+        or tail.sample_count + sample_count > settings.TAIL_CHUNK_MAX_SAMPLES
+    ):
+        return None
+    return tail
+
+def add_data_point(db: Session, data_point: schemas.BCIDataCreate, session_id: int):
+    """데이터 포인트 하나를 추가합니다. 고정 레이트 세션이면 인덱스로 저장하고 청크를 반환합니다."""
+    values = np.asarray(data_point.values, dtype=SIGNAL_DTYPE)
+    session = claim_channel_count(db, session_id, len(values))
+    if session is not None and session.is_indexed:
+        return add_indexed_samples(db, session, [data_point.timestamp], values[np.newaxis, :])[0]
+    timestamp = data_point.timestamp or datetime.now()
+    db_data_point = models.BCIData(session_id=session_id, timestamp=timestamp, vector=values.tobytes())
     db.add(db_data_point)
+    db.flush()
+    record_samples(db, session_id, np.array([timestamp], dtype="datetime64[us]"), values[np.newaxis, :])
+    return db_data_point
+
+def create_data_point(db: Session, data_point: schemas.BCIDataCreate, session_id: int):
+    db_data_point = add_data_point(db, data_point, session_id)
     db.commit()
     db.refresh(db_data_point)
     return db_data_point
 
+def add_data_points_bulk(db: Session, data_points: List[schemas.BCIDataCreate], session_id: int) -> int:
+    # 하나의 executemany INSERT로 기록하고, 행별 refresh는 하지 않는다
+    if len({len(point.values) for point in data_points}) > 1:
+        raise ValueError("All data points in a batch must have the same number of channels")
+    values = np.array([point.values for point in data_points], dtype=SIGNAL_DTYPE)
+    session = claim_channel_count(db, session_id, values.shape[1])
+    if session is not None and session.is_indexed:
+        add_indexed_samples(db, session, [point.timestamp for point in data_points], values)
+        return len(values)
+    if any(point.timestamp is None for point in data_points):
+        raise ValueError("Every data point needs a timestamp unless the session has a sampling rate")
+    rows = [
+        {"session_id": session_id, "timestamp": point.timestamp, "vector": vector.tobytes()}
+        for point, vector in zip(data_points, values)
+    ]
+    db.execute(insert(models.BCIData), rows)
+    record_samples(db, session_id, np.array([point.timestamp for point in data_points], dtype="datetime64[us]"), values)
+    return len(rows)
+
+def create_data_points_bulk(db: Session, data_points: List[schemas.BCIDataCreate], session_id: int) -> int:
+    inserted = add_data_points_bulk(db, data_points, session_id)
+    db.commit()
+    return inserted
+
+def chunk_to_array(chunk: models.BCISignalChunk) -> np.ndarray:
+    # 복사 없이 저장된 바이트(또는 memmap 파일) 위에 (sample_count, channel_count) 뷰를 만든다
+    if chunk.data is None:
+        return signal_files.read_samples(chunk.session.signal_path, chunk.channel_count, chunk.file_offset, chunk.sample_count)
+    return np.frombuffer(chunk.data, dtype=SIGNAL_DTYPE).reshape(chunk.sample_count, chunk.channel_count)
+
+def chunk_timestamps(chunk: models.BCISignalChunk) -> np.ndarray:
+    offsets = (np.arange(chunk.sample_count) * (1e6 / chunk.sampling_rate)).astype("timedelta64[us]")
+    return np.datetime64(chunk.start_time, "us") + offsets
+
+def add_signal_chunk(db: Session, session_id: int, data: np.ndarray, start_time: Optional[datetime], sampling_rate: float):
+    """신호 블록을 청크 하나로 추가합니다 (커밋하지 않음).
+
+    start_time이 None이면 고정 레이트 세션에서는 마지막 샘플 뒤에, 그 외에는 현재 시각에 놓습니다.
+    """
+    samples = np.ascontiguousarray(data, dtype=SIGNAL_DTYPE)
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    if samples.ndim != 2 or samples.shape[0] == 0:
+        raise ValueError("Signal chunk must be a non-empty (samples, channels) array")
+    if sampling_rate <= 0:
+        raise ValueError("Sampling rate must be positive")
+    session = claim_channel_count(db, session_id, samples.shape[1])
+    start_index = None
+    if session is not None and session.is_indexed:
+        # 시작 시각을 세션의 샘플 격자에 맞춘다
+        claim_start_time(session, sampling_rate, start_time or datetime.now())
+        start_index = next_sample_index(db, session_id) if start_time is None else session.index_at(start_time)
+        start_time = session.time_at(start_index)
+    start_time = start_time or datetime.now()
+    return _add_chunk(db, session, samples, start_time, sampling_rate, start_index, session_id)
+
+def _add_chunk(
+    db: Session,
+    session: Optional[models.BCISession],
+    samples: np.ndarray,
+    start_time: datetime,
+    sampling_rate: float,
+    start_index: Optional[int] = None,
+    session_id: Optional[int] = None,
+    extend_tail: bool = False
+) -> models.BCISignalChunk:
+    """샘플 블록을 청크로 저장합니다.
+
+    extend_tail이면 샘플이 세션의 마지막 청크에 바로 이어질 때 새 청크 대신 그 청크에 붙입니다
+    (TAIL_CHUNK_MAX_SAMPLES까지). 샘플을 하나씩 추가해도 샘플마다 청크 행이 생기지 않습니다.
+    """
+    samples = np.ascontiguousarray(samples, dtype=SIGNAL_DTYPE)
+    session_id = session.id if session is not None else session_id
+    sample_count, channel_count = samples.shape
+    tail = None
+    if start_index is not None:
+        # 같은 배치를 다시 보내면 같은 인덱스 구간이 두 번 저장되지 않도록 거부한다
+        check_index_range_free(db, session_id, start_index, sample_count)
+        if extend_tail:
+            tail = _tail_chunk(db, session_id, start_index, sample_count, channel_count)
+
+    file_offset = None
+    if session is not None and session.storage_mode == "file":
+        if session.signal_path is None:
+            session.signal_path = str(signal_files.session_signal_path(session_id))
+        file_offset = signal_files.append_samples(session.signal_path, samples)
+        # 트랜잭션이 롤백되면(예: writer가 묶음을 하나씩 다시 커밋할 때) 추가한 바이트를 되돌린다
+        signal_files.track_append(db, session.signal_path, file_offset, file_offset + samples.nbytes)
+        # 파일에서도 마지막 청크 바로 뒤에 쓰였을 때만 이어 붙일 수 있다
+        if tail is not None and (tail.file_offset is None or tail.file_offset + tail.sample_count * channel_count * SIGNAL_DTYPE.itemsize != file_offset):
+            tail = None
+    elif tail is not None and tail.data is None:
+        tail = None
+
+    if tail is not None:
+        if file_offset is None:
+            tail.data = tail.data + samples.tobytes()
+        tail.sample_count += sample_count
+        tail.end_time = tail.start_time + timedelta(seconds=(tail.sample_count - 1) / tail.sampling_rate)
+        db.flush()
+        record_samples(db, session_id, chunk_timestamps(tail)[-sample_count:], samples)
+        return tail
+
+    db_chunk = models.BCISignalChunk(
+        session_id=session_id,
+        start_time=start_time,
+        end_time=start_time + timedelta(seconds=(sample_count - 1) / sampling_rate),
+        sampling_rate=sampling_rate,
+        sample_count=sample_count,
+        channel_count=channel_count,
+        start_index=start_index,
+    )
+    if file_offset is not None:
+        db_chunk.file_offset = file_offset
+    else:
+        db_chunk.data = samples.tobytes()
+
+    db.add(db_chunk)
+    db.flush()
+    record_samples(db, session_id, chunk_timestamps(db_chunk), samples)
+    return db_chunk
+
+def add_signal_chunks(db: Session, session_id: int, blocks: List[Tuple[np.ndarray, datetime, float]]) -> int:
+    """(data, start_time, sampling_rate) 블록들을 청크로 추가하고 총 샘플 수를 반환합니다 (커밋하지 않음)."""
+    return sum(add_signal_chunk(db, session_id, data, start_time, rate).sample_count for data, start_time, rate in blocks)
+
+def create_signal_chunk(db: Session, session_id: int, data: np.ndarray, start_time: datetime, sampling_rate: float):
+    db_chunk = add_signal_chunk(db, session_id, data, start_time, sampling_rate)
+    db.commit()
+    db.refresh(db_chunk)
+    return db_chunk
+
+def _as_datetime(value: np.datetime64) -> datetime:
+    return value.astype("datetime64[us]").astype(datetime)
+
+def update_channel_stats(db: Session, session_id: int, timestamps: np.ndarray, data: np.ndarray) -> None:
+    """새 샘플 배치를 세션/채널별 누적 통계에 더합니다 (커밋하지 않음).
+
+    배치마다 채널당 한 번의 UPSERT만 실행하므로 통계 조회는 항상 O(1)입니다.
+    """
+    if len(data) == 0:
+        return
+    values = np.asarray(data, dtype=np.float64)
+    first, last = _as_datetime(timestamps.min()), _as_datetime(timestamps.max())
+    rows = [
+        {
+            "session_id": session_id,
+            "channel_index": i,
+            "count": len(values),
+            "sum": float(s),
+            "sum_sq": float(sq),
+            "min": float(lo),
+            "max": float(hi),
+            "first_timestamp": first,
+            "last_timestamp": last,
+        }
+        for i, (s, sq, lo, hi) in enumerate(zip(
+            values.sum(axis=0), np.square(values).sum(axis=0), values.min(axis=0), values.max(axis=0)
+        ))
+    ]
+    stmt = sqlite_insert(models.BCIChannelStats)
+    stats = models.BCIChannelStats
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stats.session_id, stats.channel_index],
+        set_={
+            "count": stats.count + stmt.excluded["count"],
+            "sum": stats.sum + stmt.excluded["sum"],
+            "sum_sq": stats.sum_sq + stmt.excluded.sum_sq,
+            "min": func.min(func.coalesce(stats.min, stmt.excluded["min"]), stmt.excluded["min"]),
+            "max": func.max(func.coalesce(stats.max, stmt.excluded["max"]), stmt.excluded["max"]),
+            "first_timestamp": func.min(func.coalesce(stats.first_timestamp, stmt.excluded.first_timestamp), stmt.excluded.first_timestamp),
+            "last_timestamp": func.max(func.coalesce(stats.last_timestamp, stmt.excluded.last_timestamp), stmt.excluded.last_timestamp),
+        }
+    )
+    db.execute(stmt, rows)
+
+def record_samples(db: Session, session_id: int, timestamps: np.ndarray, data: np.ndarray) -> None:
+    # 모든 쓰기 경로가 샘플을 추가한 뒤 같은 트랜잭션 안에서 호출하는 파생 데이터 갱신 지점
+    update_channel_stats(db, session_id, timestamps, data)
+    update_signal_pyramid(db, session_id, timestamps, data)
+    live_buffer.stage(db, session_id, timestamps, data)
+
+def update_signal_pyramid(db: Session, session_id: int, timestamps: np.ndarray, data: np.ndarray) -> None:
+    """새 샘플이 속한 피라미드 구간만 레벨별로 병합 갱신합니다 (커밋하지 않음)."""
+    if len(data) == 0:
+        return
+    table = models.BCISignalPyramid
+    for level in range(pyramid.NUM_LEVELS):
+        agg = pyramid.aggregate_buckets(timestamps, data, level)
+        buckets = agg["bucket"]
+        existing = {
+            row.bucket: row for row in db.query(table).filter(
+                table.session_id == session_id,
+                table.level == level,
+                table.bucket >= int(buckets[0]),
+                table.bucket <= int(buckets[-1])
+            )
+        }
+        for i, bucket in enumerate(buckets.tolist()):
+            row = existing.get(bucket)
+            if row is None:
+                db.add(table(
+                    session_id=session_id,
+                    level=level,
+                    bucket=bucket,
+                    channel_count=agg["min"].shape[1],
+                    count=int(agg["count"][i]),
+                    min_values=agg["min"][i].astype("<f4").tobytes(),
+                    max_values=agg["max"][i].astype("<f4").tobytes(),
+                    sum_values=agg["sum"][i].astype("<f8").tobytes()
+                ))
+                continue
+            row.count += int(agg["count"][i])
+            row.min_values = np.minimum(np.frombuffer(row.min_values, dtype="<f4"), agg["min"][i]).astype("<f4").tobytes()
+            row.max_values = np.maximum(np.frombuffer(row.max_values, dtype="<f4"), agg["max"][i]).astype("<f4").tobytes()
+            row.sum_values = (np.frombuffer(row.sum_values, dtype="<f8") + agg["sum"][i]).tobytes()
+    # 같은 트랜잭션의 다음 배치가 방금 추가한 구간을 조회할 수 있도록 flush한다
+    db.flush()
+
+def get_pyramid_buckets(
+    db: Session, session_id: int, level: int, start_time: datetime, end_time: datetime, group: int = 1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """레벨의 [start, end] 구간 요약을 (bucket 시작 시각, min, max, mean) 배열로 반환합니다.
+
+    group > 1이면 start부터 group개씩의 구간을 하나로 합칩니다 (가장 거친 레벨로도 구간이 너무 많을 때).
+    """
+    table = models.BCISignalPyramid
+    start_us = int(np.datetime64(start_time, "us").astype(np.int64))
+    end_us = int(np.datetime64(end_time, "us").astype(np.int64))
+    first, last = pyramid.bucket_range(start_us, end_us, level)
+    rows = (
+        db.query(table)
+        .filter(table.session_id == session_id, table.level == level, table.bucket >= first, table.bucket <= last)
+        .order_by(table.bucket)
+        .all()
+    )
+    if not rows:
+        empty = np.empty((0, 0), dtype=np.float64)
+        return np.empty(0, dtype="datetime64[us]"), empty, empty, empty
+    width = pyramid.bucket_width_us(level)
+    buckets = np.array([r.bucket for r in rows], dtype=np.int64)
+    mins = np.vstack([np.frombuffer(r.min_values, dtype="<f4") for r in rows])
+    maxs = np.vstack([np.frombuffer(r.max_values, dtype="<f4") for r in rows])
+    sums = np.vstack([np.frombuffer(r.sum_values, dtype="<f8") for r in rows])
+    counts = np.array([r.count for r in rows], dtype=np.float64)
+    if group > 1:
+        buckets = first + (buckets - first) // group * group
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        buckets = buckets[starts]
+        mins = np.minimum.reduceat(mins, starts, axis=0)
+        maxs = np.maximum.reduceat(maxs, starts, axis=0)
+        sums = np.add.reduceat(sums, starts, axis=0)
+        counts = np.add.reduceat(counts, starts)
+    return (buckets * width).astype("datetime64[us]"), mins, maxs, sums / counts[:, np.newaxis]
+
+def rebuild_signal_pyramid(db: Session, session_id: Optional[int] = None, block_size: int = 50000) -> int:
+    """기존 데이터로부터 피라미드를 다시 만듭니다. 블록 단위로 읽어 메모리 사용량이 일정합니다."""
+    if session_id is None:
+        session_ids = [row[0] for row in db.query(models.BCISession.id).all()]
+    else:
+        session_ids = [session_id]
+    for sid in session_ids:
+        db.execute(delete(models.BCISignalPyramid).where(models.BCISignalPyramid.session_id == sid))
+        chunks = (
+            db.query(models.BCISignalChunk)
+            .filter(models.BCISignalChunk.session_id == sid)
+            .order_by(models.BCISignalChunk.start_time)
+            .yield_per(16)
+        )
+        for chunk in chunks:
+            update_signal_pyramid(db, sid, chunk_timestamps(chunk), chunk_to_array(chunk))
+        for timestamps, data in iter_data_point_blocks(db, sid, block_size):
+            update_signal_pyramid(db, sid, timestamps, data)
+        db.commit()
+    return len(session_ids)
+
+def get_channel_stats(db: Session, session_id: int) -> List[models.BCIChannelStats]:
+    return db.query(models.BCIChannelStats).filter(models.BCIChannelStats.session_id == session_id).order_by(models.BCIChannelStats.channel_index).all()
+
+def summarize_channel_stats(stats: List[models.BCIChannelStats]) -> List[schemas.ChannelSummary]:
+    summaries = []
+    for row in stats:
+        mean = row.sum / row.count if row.count else 0.0
+        variance = max(row.sum_sq / row.count - mean * mean, 0.0) if row.count else 0.0
+        summaries.append(schemas.ChannelSummary(
+            channel=row.channel_index + 1,
+            count=row.count,
+            mean=mean,
+            std=variance ** 0.5,
+            min=row.min,
+            max=row.max,
+            first_timestamp=row.first_timestamp,
+            last_timestamp=row.last_timestamp
+        ))
+    return summaries
+
+def rebuild_channel_stats(db: Session, session_id: Optional[int] = None, block_size: int = 50000) -> int:
+    """기존 데이터로부터 채널 통계를 다시 계산합니다.
+
+    행 단위 데이터는 block_size개씩, 청크는 청크 단위로 읽어 계산하므로
+    세션 전체를 메모리에 올리지 않습니다.
+
+    Returns:
+        통계를 다시 만든 세션 수
+    """
+    if session_id is None:
+        session_ids = [row[0] for row in db.query(models.BCISession.id).all()]
+    else:
+        session_ids = [session_id]
+    for sid in session_ids:
+        db.execute(delete(models.BCIChannelStats).where(models.BCIChannelStats.session_id == sid))
+
+        for timestamps, data in iter_data_point_blocks(db, sid, block_size):
+            update_channel_stats(db, sid, timestamps, data)
+        chunks = (
+            db.query(models.BCISignalChunk)
+            .filter(models.BCISignalChunk.session_id == sid)
+            .order_by(models.BCISignalChunk.start_time)
+            .yield_per(16)
+        )
+        for chunk in chunks:
+            update_channel_stats(db, sid, chunk_timestamps(chunk), chunk_to_array(chunk))
+        db.commit()
+    return len(session_ids)
+
+def get_signal_chunks(db: Session, session_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> List[models.BCISignalChunk]:
+    chunk = models.BCISignalChunk
+    query = db.query(chunk).filter(chunk.session_id == session_id)
+    session = get_session(db, session_id) if start_time is not None or end_time is not None else None
+    if session is not None and session.is_indexed and session.start_time is not None:
+        # 고정 레이트 세션은 구간을 샘플 인덱스로 바꿔 (session_id, start_index) 인덱스만 탐색한다
+        if start_time is not None:
+            lo = session.index_at(start_time)
+            # lo를 포함하는 청크는 시작 인덱스가 lo 이하인 마지막 청크다
+            first = (
+                select(chunk.start_index)
+                .where(chunk.session_id == session_id, chunk.start_index <= lo)
+                .order_by(chunk.start_index.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+            query = query.filter(chunk.start_index >= func.coalesce(first, lo))
+        if end_time is not None:
+            query = query.filter(chunk.start_index <= session.index_at(end_time))
+        return query.order_by(chunk.start_index).all()
+    if start_time is not None:
+        query = query.filter(chunk.end_time >= start_time)
+    if end_time is not None:
+        query = query.filter(chunk.start_time <= end_time)
+    return query.order_by(chunk.start_time).all()
+
+def _contiguous_in_file(chunks: List[models.BCISignalChunk]) -> bool:
+    if any(c.data is not None for c in chunks):
+        return False
+    return all(
+        prev.file_offset + prev.sample_count * prev.channel_count * SIGNAL_DTYPE.itemsize == cur.file_offset
+        for prev, cur in zip(chunks, chunks[1:])
+    )
+
+def get_signal(db: Session, session_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """세션의 신호를 (timestamps, data) NumPy 배열로 반환합니다.
+
+    블록 단위로 조회하므로 비용은 샘플 수가 아니라 블록 수에 비례합니다.
+    파일 저장 세션에서 요청 구간이 파일 안에서 연속이면 data는 memmap 뷰입니다.
+    """
+    chunks = get_signal_chunks(db, session_id, start_time, end_time)
+    if not chunks:
+        # 보관된 세션은 청크 대신 Parquet 파일에서 읽는다
+        session = get_session(db, session_id)
+        if session is not None and session.archive_path:
+            return session_archive.read_session_archive(session.archive_path, start_time, end_time)
+        return np.empty(0, dtype="datetime64[us]"), np.empty((0, 0), dtype=SIGNAL_DTYPE)
+    timestamps = np.concatenate([chunk_timestamps(c) for c in chunks])
+    if len(chunks) > 1 and _contiguous_in_file(chunks):
+        first = chunks[0]
+        data = signal_files.read_samples(first.session.signal_path, first.channel_count, first.file_offset, len(timestamps))
+    elif len(chunks) == 1:
+        data = chunk_to_array(chunks[0])
+    else:
+        data = np.concatenate([chunk_to_array(c) for c in chunks])
+    if len(chunks) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+        # 시간 구간이 겹치는 청크가 있으면 이어 붙인 결과가 정렬되어 있지 않으므로 합쳐 정렬한다
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, data = timestamps[order], np.asarray(data)[order]
+    # 정렬된 타임스탬프에서 구간 경계를 이진 탐색으로 잘라 뷰를 유지한다
+    lo = 0 if start_time is None else np.searchsorted(timestamps, np.datetime64(start_time, "us"), side="left")
+    hi = len(timestamps) if end_time is None else np.searchsorted(timestamps, np.datetime64(end_time, "us"), side="right")
+    return timestamps[lo:hi], data[lo:hi]
+
+def _data_point_query(db: Session, session_id: int):
+    # ORM 객체를 만들지 않고 (session_id, timestamp) 인덱스 구간에서 컬럼만 읽는다
+    columns = [models.BCIData.timestamp, models.BCIData.vector] + [getattr(models.BCIData, c) for c in LEGACY_CHANNEL_COLUMNS]
+    return db.query(*columns).filter(models.BCIData.session_id == session_id)
+
+def _data_point_rows_to_arrays(rows) -> Tuple[np.ndarray, np.ndarray]:
+    timestamps = np.array([r[0] for r in rows], dtype="datetime64[us]")
+    if all(r[1] is not None for r in rows):
+        # 벡터를 이어 붙여 한 번에 (samples, channels) 배열로 만든다
+        data = np.frombuffer(b"".join(r[1] for r in rows), dtype=SIGNAL_DTYPE).reshape(len(rows), -1)
+    else:
+        data = np.array([
+            np.frombuffer(r[1], dtype=SIGNAL_DTYPE) if r[1] is not None else r[2:] for r in rows
+        ], dtype=SIGNAL_DTYPE)
+    return timestamps, data
+
+def get_data_point_arrays(db: Session, session_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    query = _data_point_query(db, session_id)
+    if start_time is not None:
+        query = query.filter(models.BCIData.timestamp >= start_time)
+    if end_time is not None:
+        query = query.filter(models.BCIData.timestamp <= end_time)
+    rows = query.order_by(models.BCIData.timestamp, models.BCIData.id).all()
+    if not rows:
+        return np.empty(0, dtype="datetime64[us]"), np.empty((0, 0), dtype=SIGNAL_DTYPE)
+    return _data_point_rows_to_arrays(rows)
+
+def iter_data_point_blocks(db: Session, session_id: int, block_size: int = 50000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """세션의 데이터 포인트를 시간순으로 block_size개씩 (timestamps, data) 배열로 돌려줍니다."""
+    rows = _data_point_query(db, session_id).order_by(models.BCIData.timestamp, models.BCIData.id).yield_per(block_size)
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) == block_size:
+            yield _data_point_rows_to_arrays(block)
+            block = []
+    if block:
+        yield _data_point_rows_to_arrays(block)
+
+def iter_signal_chunk_blocks(db: Session, session_id: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """세션의 신호 청크를 시작 시각 순으로 하나씩 (timestamps, data) 배열로 돌려줍니다."""
+    chunks = (
+        db.query(models.BCISignalChunk)
+        .filter(models.BCISignalChunk.session_id == session_id)
+        .order_by(models.BCISignalChunk.start_time)
+        .yield_per(16)
+    )
+    for chunk in chunks:
+        yield chunk_timestamps(chunk), chunk_to_array(chunk)
+
+def merge_block_streams(
+    left: Iterator[Tuple[np.ndarray, np.ndarray]],
+    right: Iterator[Tuple[np.ndarray, np.ndarray]]
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """시간순인 두 블록 스트림을 시간순 블록 스트림 하나로 합칩니다.
+
+    두 쪽의 현재 블록 중 끝 시각이 이른 쪽까지만 내보내므로 한 번에 블록 두 개만 메모리에 둡니다.
+    """
+    a, b = next(left, None), next(right, None)
+    while a is not None and b is not None:
+        limit = min(a[0][-1], b[0][-1])
+        ia = np.searchsorted(a[0], limit, side="right")
+        ib = np.searchsorted(b[0], limit, side="right")
+        if a[1].shape[1] != b[1].shape[1]:
+            raise ValueError("Chunked and row-level data of this session have different channel counts")
+        timestamps = np.concatenate([a[0][:ia], b[0][:ib]])
+        order = np.argsort(timestamps, kind="stable")
+        yield timestamps[order], np.concatenate([a[1][:ia], b[1][:ib]])[order]
+        a = (a[0][ia:], a[1][ia:]) if ia < len(a[0]) else next(left, None)
+        b = (b[0][ib:], b[1][ib:]) if ib < len(b[0]) else next(right, None)
+    for block in (a, b):
+        if block is not None:
+            yield block
+    yield from left
+    yield from right
+
+def iter_session_blocks(db: Session, session_id: int, block_size: int = 50000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """세션 전체 신호(청크, 데이터 포인트, 보관 파일)를 시간순 블록으로 돌려줍니다.
+
+    서버 측 커서(yield_per)로 읽으므로 메모리 사용량은 세션 길이와 관계없이 일정합니다.
+    """
+    session = get_session(db, session_id)
+    if session is not None and session.archive_path:
+        yield from session_archive.iter_session_archive(session.archive_path, block_size)
+        return
+    yield from merge_block_streams(iter_signal_chunk_blocks(db, session_id), iter_data_point_blocks(db, session_id, block_size))
+
+def get_session_signal(db: Session, session_id: int, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """청크 저장 신호와 행 단위 데이터 포인트를 합쳐 시간순 (timestamps, data)로 반환합니다.
+
+    보관된 세션은 get_signal이 보관 파일에서 청크와 데이터 포인트를 모두 읽습니다.
+    """
+    chunk_ts, chunk_data = get_signal(db, session_id, start_time, end_time)
+    row_ts, row_data = get_data_point_arrays(db, session_id, start_time, end_time)
+    if len(row_ts) == 0:
+        return chunk_ts, chunk_data
+    if len(chunk_ts) == 0:
+        return row_ts, row_data
+    if chunk_data.shape[1] != row_data.shape[1]:
+        raise ValueError("Chunked and row-level data of this session have different channel counts")
+    timestamps = np.concatenate([chunk_ts, row_ts])
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], np.concatenate([chunk_data, row_data])[order]
+
+def add_analysis_results(db: Session, results: List[dict]) -> int:
+    """배치 분석 결과(run_id, session_id, mode, status, result, error, duration_seconds)를 추가합니다 (커밋하지 않음)."""
+    db.bulk_insert_mappings(models.BCIAnalysisResult, [dict(r, created_at=r.get("created_at") or datetime.utcnow()) for r in results])
+    return len(results)
+
+def get_latest_analysis_result(db: Session, session_id: int) -> Optional[models.BCIAnalysisResult]:
+    return (
+        db.query(models.BCIAnalysisResult)
+        .filter(models.BCIAnalysisResult.session_id == session_id)
+        .order_by(models.BCIAnalysisResult.created_at.desc(), models.BCIAnalysisResult.id.desc())
+        .first()
+    )
+
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
@@ -41,12 +728,89 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+# 세션에 속한 원시 데이터 테이블과, 원시 데이터를 지워도 남겨 두는 요약 테이블
+RAW_DATA_TABLES = (models.BCIData, models.BCISignalChunk)
+SUMMARY_TABLES = (models.BCIChannelStats, models.BCISignalPyramid, models.BCIAnalysisResult)
+
 def delete_session(db: Session, session_id: int):
     session = db.query(models.BCISession).filter(models.BCISession.id == session_id).first()
     if not session:
         logger.error(f"Session with id {session_id} not found")
         raise HTTPException(status_code=404, detail="Session not found")
-    db.delete(session)
+    signal_path, archive_path = session.signal_path, session.archive_path
+    # 관계를 통해 자식 행을 하나씩 불러오지 않도록 집합 단위 DELETE를 사용한다
+    for table in RAW_DATA_TABLES:
+        db.execute(delete(table).where(table.session_id == session_id))
+    delete_session_record(db, session_id)
     db.commit()
+    live_buffer.live_buffers.drop(session_id)
+    if signal_path:
+        signal_files.delete_signal_file(signal_path)
+    if archive_path:
+        session_archive.delete_session_archive(archive_path)
     logger.info(f"Session with id {session_id} deleted successfully")
     return True
+
+def delete_raw_rows_chunk(db: Session, table, session_id: int, limit: int) -> int:
+    """세션의 원시 데이터 행을 최대 limit개 삭제하고 삭제한 행 수를 반환합니다 (커밋하지 않음).
+
+    한 번에 지우는 양을 제한해 쓰기 잠금을 짧게 유지합니다.
+    """
+    ids = select(table.id).where(table.session_id == session_id).limit(limit).scalar_subquery()
+    result = db.execute(
+        delete(table).where(table.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def delete_session_record(db: Session, session_id: int) -> None:
+    """요약 테이블과 세션 행을 삭제합니다. 원시 데이터는 먼저 지워져 있어야 합니다 (커밋하지 않음)."""
+    for table in SUMMARY_TABLES:
+        db.execute(delete(table).where(table.session_id == session_id))
+    db.execute(
+        delete(models.BCISession).where(models.BCISession.id == session_id).execution_options(synchronize_session=False)
+    )
+
+def mark_raw_data_purged(db: Session, session_id: int, purged_at: datetime) -> None:
+    """원시 데이터를 지운 세션을 표시합니다. 통계와 피라미드는 그대로 남습니다 (커밋하지 않음)."""
+    db.query(models.BCISession).filter(models.BCISession.id == session_id).update(
+        {"raw_data_purged_at": purged_at, "signal_path": None, "archive_path": None}, synchronize_session=False
+    )
+
+def mark_session_archived(db: Session, session_id: int, archive_path: Optional[str], archived_at: datetime) -> None:
+    """세션을 보관됨으로 표시합니다. 이후 신호 조회는 보관 파일을 읽습니다 (커밋하지 않음)."""
+    db.query(models.BCISession).filter(models.BCISession.id == session_id).update(
+        {"archived_at": archived_at, "archive_path": archive_path}, synchronize_session=False
+    )
+
+def get_expired_sessions(db: Session, cutoff: datetime, raw_only: bool = False, limit: int = 100) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """date_recorded가 cutoff보다 오래된 세션의 (id, signal_path, archive_path) 목록을 반환합니다.
+
+    raw_only가 True이면 아직 원시 데이터가 남아 있는 세션만 반환합니다.
+    """
+    session = models.BCISession
+    query = db.query(session.id, session.signal_path, session.archive_path).filter(session.date_recorded < cutoff)
+    if raw_only:
+        query = query.filter(session.raw_data_purged_at.is_(None))
+    return [tuple(row) for row in query.order_by(session.date_recorded).limit(limit).all()]
+
+def get_archivable_sessions(db: Session, cutoff: datetime, limit: int = 100) -> List[int]:
+    """date_recorded가 cutoff보다 오래됐고 아직 보관되지 않은 세션 id 목록을 반환합니다."""
+    session = models.BCISession
+    query = db.query(session.id).filter(
+        session.date_recorded < cutoff,
+        session.archived_at.is_(None),
+        session.raw_data_purged_at.is_(None)
+    )
+    return [row[0] for row in query.order_by(session.date_recorded).limit(limit).all()]
+
+def incremental_vacuum(db: Session, pages: int) -> int:
+    """auto_vacuum=INCREMENTAL 데이터베이스에서 빈 페이지를 최대 pages개 파일 시스템에 반환합니다.
+
+    Returns:
+        반환한 페이지 수 (INCREMENTAL 모드가 아니면 0)
+    """
+    if db.execute(text("PRAGMA auto_vacuum")).scalar() != 2:
+        return 0
+    before = db.execute(text("PRAGMA freelist_count")).scalar()
+    db.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+    return before - db.execute(text("PRAGMA freelist_count")).scalar()
@@ -0,0 +1,80 @@
+"""
+비동기 라우트를 위한 crud 함수 모음입니다.
+
+crud.py와 같은 쿼리를 AsyncSession으로 실행하므로 async def 라우트에서
+데이터베이스를 기다리는 동안 이벤트 루프가 다른 요청을 처리할 수 있습니다.
+NumPy 변환이 많은 신호 조회나 writer를 거치는 쓰기(세션 생성/삭제 포함)는
+crud.py의 동기 함수를 스레드 풀에서 사용합니다.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, or_, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, schemas
+
+logger = logging.getLogger(__name__)
+
+async def get_session(db: AsyncSession, session_id: int) -> Optional[models.BCISession]:
+    return await db.get(models.BCISession, session_id)
+
+async def get_sessions(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[models.BCISession]:
+    result = await db.execute(select(models.BCISession).offset(skip).limit(limit))
+    return result.scalars().all()
+
+async def get_session_summaries(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[schemas.BCISessionSummary]:
+    result = await db.execute(crud.session_summary_query(skip, limit))
+    return [crud.to_session_summary(row) for row in result.all()]
+
+async def get_data_point(db: AsyncSession, data_id: int) -> Optional[models.BCIData]:
+    return await db.get(models.BCIData, data_id)
+
+async def get_data_points(db: AsyncSession, session_id: int, skip: int = 0, limit: int = 100) -> List[models.BCIData]:
+    result = await db.execute(
+        select(models.BCIData).filter(models.BCIData.session_id == session_id).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_data_points_page(
+    db: AsyncSession, session_id: int, after_timestamp: Optional[datetime] = None, after_id: Optional[int] = None, limit: int = 100
+) -> Tuple[List[models.BCIData], Optional[schemas.DataPointCursor]]:
+    crud.check_page_cursor(after_timestamp, after_id)
+    query = select(models.BCIData).filter(models.BCIData.session_id == session_id)
+    if after_timestamp is not None:
+        query = query.filter(or_(
+            models.BCIData.timestamp > after_timestamp,
+            and_(models.BCIData.timestamp == after_timestamp, models.BCIData.id > (after_id or 0))
+        ))
+    result = await db.execute(query.order_by(models.BCIData.timestamp, models.BCIData.id).limit(limit + 1))
+    return crud.data_points_page(result.scalars().all(), limit)
+
+async def get_signal_sample_count(db: AsyncSession, session_id: int) -> int:
+    """세션의 청크(BCISignalChunk)에 저장된 샘플 수. 데이터 포인트 행은 세지 않습니다."""
+    result = await db.execute(
+        select(func.coalesce(func.sum(models.BCISignalChunk.sample_count), 0)).filter(models.BCISignalChunk.session_id == session_id)
+    )
+    return result.scalar()
+
+async def get_dashboard_summary(db: AsyncSession) -> dict:
+    # 샘플 수는 누적 통계 테이블(채널 0 행)에서 읽으므로 샘플을 다시 읽지 않는다.
+    # 세 값을 스칼라 서브쿼리로 묶어 한 번의 쿼리로 가져온다
+    session, stats = models.BCISession, models.BCIChannelStats
+    row = (await db.execute(select(
+        select(func.count(session.id)).scalar_subquery(),
+        select(func.count(session.id)).filter(session.date_recorded >= datetime.now() - timedelta(days=7)).scalar_subquery(),
+        select(func.sum(stats.count)).filter(stats.channel_index == 0).scalar_subquery()
+    ))).one()
+    total_sessions, recent_sessions, total_data_points = row[0] or 0, row[1] or 0, row[2] or 0
+    return {
+        "total_sessions": total_sessions,
+        "total_data_points": total_data_points,
+        "recent_sessions": recent_sessions,
+        "avg_data_points_per_session": total_data_points / total_sessions if total_sessions else 0.0,
+    }
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).filter(models.User.username == username))
+    return result.scalars().first()
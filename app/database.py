@@ -1,18 +1,74 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, literal, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from .config import settings
 
 # SQLite 데이터베이스 URL 설정
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# SQLite용 엔진 생성
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+WAL_MODE = settings.DB_STORAGE_MODE == "wal" and IS_SQLITE
+
+def _set_auto_vacuum(dbapi_connection, connection_record):
+    # 새 데이터베이스 파일에만 적용된다. 기존 파일은 VACUUM을 한 번 실행해야 전환된다
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA auto_vacuum={settings.SQLITE_AUTO_VACUUM}")
+    cursor.close()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+if WAL_MODE:
+    # 읽기 요청은 풀링된 커넥션을 사용하고, 쓰기는 writer_engine 하나로만 수행한다
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=settings.DB_READER_POOL_SIZE,
+        max_overflow=settings.DB_READER_POOL_SIZE
+    )
+    writer_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(writer_engine, "connect", _set_sqlite_pragmas)
+else:
+    # SQLite용 엔진 생성
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    )
+    writer_engine = engine
+
+if IS_SQLITE:
+    # 보존 정책으로 지운 공간을 incremental_vacuum으로 조금씩 반환할 수 있게 한다
+    event.listen(engine, "connect", _set_auto_vacuum)
+    if writer_engine is not engine:
+        event.listen(writer_engine, "connect", _set_auto_vacuum)
+
+# 비동기 엔진: 이벤트 루프를 막지 않도록 aiosqlite 드라이버를 사용한다
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+if WAL_MODE:
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 # 세션 설정
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# writer 스레드용 세션: 커밋 후에도 속성을 유지해 다른 스레드에 분리된 객체로 넘길 수 있게 한다
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=writer_engine)
+
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # 기본 베이스 클래스
 Base = declarative_base()
@@ -24,3 +80,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# 비동기 데이터베이스 연결 함수
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def upgrade_schema(bind) -> None:
+    """모델의 테이블을 만들고, 이전 버전이 만든 테이블에 빠진 컬럼과 인덱스를 추가합니다.
+
+    create_all은 이미 존재하는 테이블을 건드리지 않으므로, 기존 데이터베이스에서는 새 컬럼을
+    ALTER TABLE ... ADD COLUMN으로 추가합니다. NOT NULL 컬럼은 모델의 기본값으로 채웁니다.
+    """
+    from . import models  # noqa: F401  모든 테이블을 Base.metadata에 등록한다
+    Base.metadata.create_all(bind=bind)
+    dialect = bind.dialect
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=dialect)}"
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    value = literal(default, column.type).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+                    ddl += f"{' NOT NULL' if not column.nullable else ''} DEFAULT {value}"
+                conn.execute(text(ddl))
+    # 기존 테이블에는 새 인덱스도 없으므로 따로 보장한다
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
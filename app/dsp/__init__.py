@@ -0,0 +1,3 @@
+"""
+신호 처리(DSP) 구성 요소를 위한 패키지입니다.
+"""
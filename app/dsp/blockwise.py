@@ -0,0 +1,134 @@
+"""
+메모리보다 큰 세션을 블록 단위로 처리하기 위한 모듈입니다.
+
+filter_blocks는 앞뒤로 겹치는 구간을 붙인 블록에 zero-phase 필터를 적용하고 겹친
+부분을 버린 가운데(core)만 내보냅니다 (overlap-save). 겹침 길이가 필터 임펄스 응답이
+충분히 감쇠하는 길이 이상이면 결과는 전체 신호에 한 번에 적용한 것과 (허용 오차 안에서)
+같습니다. RunningMoments는 블록별 평균/공분산/최솟값/최댓값을 병합해 전체 통계와
+PCA를 계산합니다. 어느 쪽도 세션 길이에 비례하는 메모리를 쓰지 않습니다.
+"""
+
+import math
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .filterbank import FilterBank
+
+def settle_samples(bank: FilterBank, tolerance: float = 1e-7) -> int:
+    """필터 임펄스 응답이 tolerance 아래로 감쇠하는 데 필요한 샘플 수를 추정합니다.
+
+    가장 느리게 감쇠하는 극점(반지름이 가장 큰 극점) r에 대해 r**n < tolerance인 n입니다.
+    """
+    radius = max((np.abs(np.roots(section[3:])).max() for section in bank.sos), default=0.0)
+    if radius <= 0:
+        return 0
+    return int(math.ceil(math.log(tolerance) / math.log(min(radius, 1 - 1e-12))))
+
+def filter_blocks(
+    blocks: Iterator[Tuple[np.ndarray, np.ndarray]],
+    bank: FilterBank,
+    block_size: int,
+    overlap: Optional[int] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """시간순 (timestamps, data) 블록 스트림에 zero-phase 필터를 적용합니다.
+
+    입력 블록 크기와 관계없이 block_size개 안팎의 core를 모아 앞뒤 overlap개 샘플을 붙여
+    필터링하므로, 한 번에 메모리에 두는 샘플은 block_size + 2 * overlap개 정도입니다.
+
+    Args:
+        blocks: crud.iter_session_blocks 같은 시간순 블록 스트림
+        bank: 적용할 필터 체인
+        block_size: 한 번에 내보낼 core 샘플 수
+        overlap: 양쪽에 붙일 샘플 수 (None이면 settle_samples(bank))
+
+    Raises:
+        ValueError: 블록마다 채널 수가 다른 경우
+    """
+    overlap = settle_samples(bank) if overlap is None else overlap
+    # pending: 아직 필터링하지 않은 블록들, 그 앞의 left개는 이미 내보낸 샘플(왼쪽 겹침)
+    pending_ts: List[np.ndarray] = []
+    pending: List[np.ndarray] = []
+    size = 0
+    left = 0
+    for timestamps, data in blocks:
+        if len(timestamps) == 0:
+            continue
+        if pending and pending[0].shape[1:] != data.shape[1:]:
+            raise ValueError("Blocks of this session have different channel counts")
+        pending_ts.append(timestamps)
+        pending.append(data)
+        size += len(timestamps)
+        if size < left + block_size + overlap:
+            continue
+        timestamps, data = np.concatenate(pending_ts), np.concatenate(pending)
+        filtered = bank.apply(data)
+        end = len(data) - overlap
+        yield timestamps[left:end], filtered[left:end]
+        # 방금 내보낸 마지막 overlap개(다음 블록의 왼쪽 겹침)와 아직 내보내지 않은 overlap개를 남긴다
+        keep = max(end - overlap, 0)
+        pending_ts, pending = [timestamps[keep:]], [data[keep:]]
+        size = len(data) - keep
+        left = end - keep
+    if size > left:
+        timestamps, data = np.concatenate(pending_ts), np.concatenate(pending)
+        yield timestamps[left:], bank.apply(data)[left:]
+
+class RunningMoments:
+    """블록 단위로 채널별 평균, 공분산, 최솟값, 최댓값을 누적합니다.
+
+    블록마다 평균과 중심화된 곱의 합을 구해 병렬 분산 공식(Chan et al.)으로 합치므로
+    큰 오프셋이 있어도 sum/sum_sq 방식보다 수치적으로 안정적입니다.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean: Optional[np.ndarray] = None
+        self._comoment: Optional[np.ndarray] = None  # sum((x - mean)(x - mean)^T)
+        self.min: Optional[np.ndarray] = None
+        self.max: Optional[np.ndarray] = None
+
+    def update(self, data: np.ndarray) -> None:
+        """(samples, channels) 블록을 누적합니다."""
+        n = len(data)
+        if n == 0:
+            return
+        x = np.asarray(data, dtype=np.float64)
+        mean = x.mean(axis=0)
+        centered = x - mean
+        comoment = centered.T @ centered
+        if self.count == 0:
+            self.count, self.mean, self._comoment = n, mean, comoment
+            self.min, self.max = x.min(axis=0), x.max(axis=0)
+            return
+        if mean.shape != self.mean.shape:
+            raise ValueError("Blocks of this session have different channel counts")
+        total = self.count + n
+        delta = mean - self.mean
+        self._comoment += comoment + np.outer(delta, delta) * (self.count * n / total)
+        self.mean = self.mean + delta * (n / total)
+        self.count = total
+        self.min = np.minimum(self.min, x.min(axis=0))
+        self.max = np.maximum(self.max, x.max(axis=0))
+
+    @property
+    def std(self) -> np.ndarray:
+        """모표준편차 (np.std와 같은 ddof=0)"""
+        return np.sqrt(np.diag(self._comoment) / self.count)
+
+    @property
+    def covariance(self) -> np.ndarray:
+        """표본 공분산 (ddof=1)"""
+        return self._comoment / max(self.count - 1, 1)
+
+    def principal_components(self, n_components: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+        """공분산 행렬의 고유벡터로 (components, explained_variance)를 반환합니다.
+
+        components는 (n_components, channels)이며 sklearn PCA처럼 각 성분에서 절댓값이
+        가장 큰 원소가 양수가 되도록 부호를 맞춥니다.
+        """
+        variance, vectors = np.linalg.eigh(self.covariance)
+        order = np.argsort(variance)[::-1][:n_components]
+        components = vectors[:, order].T
+        signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+        return components * signs[:, np.newaxis], variance[order]
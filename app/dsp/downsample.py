@@ -0,0 +1,66 @@
+"""
+시각화와 조회 응답 크기를 제한하기 위한 다운샘플링 모듈입니다.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+def stride_decimate(timestamps: np.ndarray, data: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """k번째 샘플마다 하나씩 골라 최대 max_points개로 줄입니다.
+
+    Args:
+        timestamps: (samples,) 타임스탬프 배열
+        data: (samples, channels) 신호 배열
+        max_points: 반환할 최대 샘플 수
+
+    Returns:
+        줄어든 (timestamps, data). 뷰이므로 복사가 일어나지 않습니다.
+    """
+    n = len(timestamps)
+    if n <= max_points:
+        return timestamps, data
+    step = -(-n // max_points)  # ceil
+    return timestamps[::step], data[::step]
+
+def minmax_decimate(timestamps: np.ndarray, data: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """구간(bucket)마다 채널별 최솟값과 최댓값을 남겨 최대 max_points개로 줄입니다.
+
+    stride 방식과 달리 스파이크 같은 짧은 피크가 사라지지 않습니다.
+    각 구간은 두 행을 만듭니다: 구간 시작 시각의 최솟값, 구간 마지막 시각의 최댓값.
+
+    Args:
+        timestamps: (samples,) 타임스탬프 배열
+        data: (samples, channels) 신호 배열
+        max_points: 반환할 최대 샘플 수 (2 이상)
+
+    Returns:
+        줄어든 (timestamps, data)
+    """
+    n = len(timestamps)
+    if n <= max_points:
+        return timestamps, data
+    buckets = max(max_points // 2, 1)
+    starts = (np.arange(buckets) * n) // buckets
+    ends = np.append(starts[1:], n) - 1
+    mins = np.minimum.reduceat(data, starts, axis=0)
+    maxs = np.maximum.reduceat(data, starts, axis=0)
+
+    out_ts = np.empty(2 * buckets, dtype=timestamps.dtype)
+    out_ts[0::2] = timestamps[starts]
+    out_ts[1::2] = timestamps[ends]
+    out = np.empty((2 * buckets, data.shape[1]), dtype=data.dtype)
+    out[0::2] = mins
+    out[1::2] = maxs
+    return out_ts, out
+
+DECIMATORS = {
+    "stride": stride_decimate,
+    "minmax": minmax_decimate,
+}
+
+def decimate(timestamps: np.ndarray, data: np.ndarray, max_points: int, mode: str = "minmax") -> Tuple[np.ndarray, np.ndarray]:
+    """mode("stride" 또는 "minmax")에 맞는 방식으로 다운샘플링합니다."""
+    if mode not in DECIMATORS:
+        raise ValueError(f"Unknown decimation mode '{mode}'")
+    return DECIMATORS[mode](timestamps, data, max_points)
@@ -0,0 +1,141 @@
+"""
+EEG 전처리를 위한 2차 구간(SOS) 필터 뱅크 모듈입니다.
+
+대역 통과(Butterworth)와 전원 잡음 노치 필터를 하나의 SOS 배열로 이어 붙여 한 번에
+적용합니다. 오프라인 분석은 FilterBank.apply(zero-phase), 라이브 경로는 청크 사이 필터
+상태를 유지하는 StreamingFilter(인과적)를 씁니다. (b, a) 형식보다 높은 차수에서 수치적으로 안정적이고, 필터마다 배열을
+새로 만들지 않습니다. 설계 결과는 (샘플링 레이트, 대역, 차수, 노치) 조합별로
+캐시되므로 같은 구성의 세션을 여러 번 분석해도 다시 설계하지 않습니다.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import signal
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """전처리 필터 구성. 세션마다 전원 주파수와 통과 대역이 다를 수 있습니다."""
+    band: Optional[Tuple[float, float]] = (1.0, 50.0)  # None이면 대역 통과 필터 없음
+    order: int = 4
+    notch: Optional[float] = 60.0  # 전원 잡음 주파수 (50 또는 60 Hz), None이면 노치 없음
+    notch_q: float = 30.0
+
+@lru_cache(maxsize=256)
+def design_sos(sampling_rate: float, spec: FilterSpec) -> np.ndarray:
+    """spec의 필터들을 이어 붙인 (sections, 6) SOS 배열을 설계합니다 (읽기 전용, 캐시됨).
+
+    나이퀴스트 주파수 이상인 차단 주파수는 건너뜁니다. 예를 들어 100 Hz로 샘플링한
+    세션에서는 60 Hz 노치가 빠지고 1~50 Hz 대역 통과는 1 Hz 고역 통과가 됩니다.
+    """
+    nyquist = sampling_rate / 2
+    sections = []
+    if spec.band is not None:
+        low, high = spec.band
+        if high < nyquist:
+            sections.append(signal.butter(spec.order, [low, high], btype="bandpass", fs=sampling_rate, output="sos"))
+        else:
+            sections.append(signal.butter(spec.order, low, btype="highpass", fs=sampling_rate, output="sos"))
+    if spec.notch is not None and spec.notch < nyquist:
+        b, a = signal.iirnotch(spec.notch, spec.notch_q, sampling_rate)
+        sections.append(signal.tf2sos(b, a))
+    sos = np.vstack(sections) if sections else np.array([[1.0, 0.0, 0.0, 1.0, 0.0, 0.0]])
+    sos.setflags(write=False)
+    return sos
+
+class FilterBank:
+    """한 (샘플링 레이트, FilterSpec) 조합의 필터 체인"""
+
+    def __init__(self, sampling_rate: float, spec: FilterSpec = FilterSpec(), dtype: np.dtype = np.float64):
+        """
+        Args:
+            sampling_rate: 샘플링 레이트 (Hz)
+            spec: 필터 구성
+            dtype: 계산 정밀도 (np.float32이면 메모리와 대역폭이 절반)
+        """
+        self.sampling_rate = sampling_rate
+        self.spec = spec
+        self.dtype = np.dtype(dtype)
+        sos = design_sos(float(sampling_rate), spec)
+        # 계수와 초기 상태도 같은 정밀도여야 scipy가 입력을 float64로 올려 복사하지 않는다.
+        # scipy의 sosfilt는 쓰기 가능한 계수 배열을 요구하므로 캐시된 설계의 (작은) 사본을 쓴다
+        self.sos = np.array(sos, dtype=self.dtype)
+        self.zi = signal.sosfilt_zi(sos).astype(self.dtype)  # 단위 계단 입력의 정상 상태, (sections, 2)
+
+    @property
+    def n_sections(self) -> int:
+        return len(self.sos)
+
+    def apply(self, data: np.ndarray, zero_phase: bool = True) -> np.ndarray:
+        """(samples, channels) 신호에 필터 체인을 적용합니다.
+
+        Args:
+            data: 입력 신호
+            zero_phase: True면 sosfiltfilt(위상 왜곡 없음, 오프라인 분석용), False면 sosfilt(인과적)
+
+        Returns:
+            dtype 정밀도의 필터링된 신호 (새 배열)
+        """
+        x = np.asarray(data, dtype=self.dtype)
+        if not zero_phase:
+            return signal.sosfilt(self.sos, x, axis=0)
+        return self._filtfilt(x)
+
+    def stream(self) -> "StreamingFilter":
+        """이 필터 체인을 청크 단위로 인과적으로 적용하는 StreamingFilter를 만듭니다."""
+        return StreamingFilter(self)
+
+    def _filtfilt(self, x: np.ndarray) -> np.ndarray:
+        # scipy.signal.sosfiltfilt와 같은 방식(홀수 확장 + 정상 상태 초기화)이지만
+        # 초기 상태를 입력 정밀도로 만들어 float32 입력이 float32로 계산되게 한다
+        squeeze = x.ndim == 1
+        if squeeze:
+            x = x[:, np.newaxis]
+        # 짧은 구간에서도 동작하도록 패딩 길이를 신호 길이보다 짧게 제한한다
+        pad = max(min(3 * (2 * self.n_sections + 1), len(x) - 1), 0)
+        if pad:
+            x = np.concatenate([2 * x[0] - x[pad:0:-1], x, 2 * x[-1] - x[-2:-pad - 2:-1]])
+        zi = self.zi[:, :, np.newaxis]
+        y, _ = signal.sosfilt(self.sos, x, axis=0, zi=zi * x[0])
+        y = y[::-1]
+        y, _ = signal.sosfilt(self.sos, y, axis=0, zi=zi * y[0])
+        y = np.ascontiguousarray(y[::-1][pad:len(y) - pad])
+        return y[:, 0] if squeeze else y
+
+class StreamingFilter:
+    """FilterBank를 연속된 청크에 인과적으로 적용합니다 (sosfilt + 청크 사이 필터 상태).
+
+    청크 하나의 처리 비용은 청크 길이에 비례하고, 결과는 이어 붙인 전체 신호에
+    sosfilt를 한 번 적용한 것과 같습니다. zero-phase가 아니므로 위상 지연이 있습니다.
+    """
+
+    def __init__(self, bank: FilterBank):
+        self.bank = bank
+        self.samples = 0  # 지금까지 처리한 샘플 수
+        self._zi: Optional[np.ndarray] = None  # (sections, 2, channels...)
+
+    def reset(self) -> None:
+        """필터 상태를 버립니다. 신호가 끊겼을 때 (샘플 누락, 세션 재시작) 호출합니다."""
+        self.samples = 0
+        self._zi = None
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """다음 (samples, channels) 청크를 필터링해 dtype 정밀도의 새 배열로 반환합니다.
+
+        Raises:
+            ValueError: 채널 수가 이전 청크와 다른 경우
+        """
+        x = np.asarray(chunk, dtype=self.bank.dtype)
+        if len(x) == 0:
+            return x.copy()
+        if self._zi is None:
+            # 첫 샘플 값의 정상 상태에서 시작해 DC 오프셋이 계단 응답을 만들지 않게 한다
+            zi = self.bank.zi.reshape(self.bank.zi.shape + (1,) * (x.ndim - 1))
+            self._zi = zi * x[0]
+        elif self._zi.shape[2:] != x.shape[1:]:
+            raise ValueError(f"Expected chunks shaped (samples, {', '.join(map(str, self._zi.shape[2:]))}), got {x.shape}")
+        y, self._zi = signal.sosfilt(self.bank.sos, x, axis=0, zi=self._zi)
+        self.samples += len(x)
+        return y
@@ -0,0 +1,66 @@
+"""
+긴 세션 시각화를 위한 다중 해상도 min/max 피라미드 모듈입니다.
+
+레벨 L의 구간(bucket) 폭은 BASE_BUCKET_US × LEVEL_FACTOR^L 마이크로초이며,
+구간 번호는 epoch 기준 절대 시각을 폭으로 나눈 값입니다. 따라서 새 샘플이
+들어오면 그 샘플이 속한 구간만 갱신하면 됩니다.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+BASE_BUCKET_US = 100_000  # 레벨 0: 0.1초
+LEVEL_FACTOR = 8
+NUM_LEVELS = 6  # 0.1초 ~ 약 55분
+
+def bucket_width_us(level: int) -> int:
+    """레벨의 구간 폭(마이크로초)을 반환합니다."""
+    return BASE_BUCKET_US * LEVEL_FACTOR ** level
+
+def aggregate_buckets(timestamps: np.ndarray, data: np.ndarray, level: int) -> Dict[str, np.ndarray]:
+    """샘플을 레벨의 구간별로 묶어 min/max/sum/count를 계산합니다.
+
+    Args:
+        timestamps: (samples,) datetime64 배열
+        data: (samples, channels) 신호 배열
+        level: 피라미드 레벨
+
+    Returns:
+        "bucket", "count", "min", "max", "sum" 키를 가진 배열 사전
+    """
+    ticks = timestamps.astype("datetime64[us]").astype(np.int64)
+    buckets = ticks // bucket_width_us(level)
+    if len(buckets) > 1 and np.any(buckets[1:] < buckets[:-1]):
+        order = np.argsort(buckets, kind="stable")
+        buckets, data = buckets[order], data[order]
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    values = np.asarray(data, dtype=np.float64)
+    return {
+        "bucket": buckets[starts],
+        "count": np.diff(np.r_[starts, len(buckets)]),
+        "min": np.minimum.reduceat(values, starts, axis=0),
+        "max": np.maximum.reduceat(values, starts, axis=0),
+        "sum": np.add.reduceat(values, starts, axis=0),
+    }
+
+def choose_level(span_us: int, width: int) -> int:
+    """구간 수가 width(픽셀)를 넘지 않는 가장 세밀한 레벨을 고릅니다.
+
+    가장 거친 레벨로도 width를 넘으면 가장 거친 레벨을 반환하므로, 호출자는 group_size로
+    이웃 구간을 합쳐야 width 이하가 됩니다.
+    """
+    for level in range(NUM_LEVELS):
+        if span_us / bucket_width_us(level) <= width:
+            return level
+    return NUM_LEVELS - 1
+
+def bucket_range(start_us: int, end_us: int, level: int) -> Tuple[int, int]:
+    """[start, end] 구간을 덮는 첫/마지막 구간 번호를 반환합니다."""
+    width = bucket_width_us(level)
+    return start_us // width, end_us // width
+
+def group_size(start_us: int, end_us: int, level: int, width: int) -> int:
+    """[start, end]의 레벨 구간을 width개 이하로 만들려면 몇 개씩 합쳐야 하는지 반환합니다."""
+    first, last = bucket_range(start_us, end_us, level)
+    return max(-(-(last - first + 1) // width), 1)
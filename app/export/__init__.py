@@ -0,0 +1,3 @@
+"""
+세션 데이터를 파일 형식으로 내보내기 위한 패키지입니다.
+"""
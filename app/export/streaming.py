@@ -0,0 +1,78 @@
+"""
+세션 신호를 CSV / NDJSON / Parquet 바이트 스트림으로 변환하는 모듈입니다.
+
+각 인코더는 (timestamps, data) 블록 이터레이터를 받아 블록마다 바이트 조각을
+돌려주므로, StreamingResponse로 보내면 메모리 사용량이 세션 길이와 관계없이
+블록 하나 크기로 유지됩니다.
+"""
+
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+Block = Tuple[np.ndarray, np.ndarray]
+
+def _frame(channel_names: List[str], timestamps: np.ndarray, data: np.ndarray) -> pd.DataFrame:
+    frame = pd.DataFrame(np.asarray(data), columns=channel_names)
+    frame.insert(0, "timestamp", timestamps.astype("datetime64[us]"))
+    return frame
+
+def iter_csv(channel_names: List[str], blocks: Iterable[Block]) -> Iterator[bytes]:
+    """헤더 행을 먼저 보내고, 블록마다 CSV 행들을 보냅니다."""
+    yield (",".join(["timestamp"] + channel_names) + "\n").encode()
+    for timestamps, data in blocks:
+        yield _frame(channel_names, timestamps, data).to_csv(header=False, index=False, date_format="%Y-%m-%dT%H:%M:%S.%f").encode()
+
+def iter_ndjson(channel_names: List[str], blocks: Iterable[Block]) -> Iterator[bytes]:
+    """샘플 하나를 {"timestamp": ..., "values": [...]} JSON 한 줄로 보냅니다."""
+    for timestamps, data in blocks:
+        stamps = np.datetime_as_string(timestamps.astype("datetime64[us]"), unit="us")
+        rows = np.asarray(data, dtype=np.float64).tolist()
+        yield "".join(
+            f'{{"timestamp":"{stamp}","values":[{",".join(map(repr, row))}]}}\n' for stamp, row in zip(stamps, rows)
+        ).encode()
+
+class _DrainableSink(io.RawIOBase):
+    # ParquetWriter가 쓴 바이트를 모아 두었다가 row group마다 꺼내 보낸다
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+def iter_parquet(channel_names: List[str], blocks: Iterable[Block]) -> Iterator[bytes]:
+    """블록 하나를 row group 하나로 쓰고, 쓸 때마다 쌓인 바이트를 보냅니다."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow")
+    schema = pa.schema(
+        [pa.field("timestamp", pa.timestamp("us"))] + [pa.field(name, pa.float32()) for name in channel_names]
+    )
+    sink = _DrainableSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as out:
+        for timestamps, data in blocks:
+            data = np.asarray(data, dtype=np.float32)
+            columns = [pa.array(timestamps.astype("datetime64[us]"))] + [pa.array(data[:, i]) for i in range(data.shape[1])]
+            out.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    # 닫을 때 기록되는 footer
+    yield sink.drain()
+
+# 형식 이름 -> (media type, 파일 확장자, 인코더)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, Callable[[List[str], Iterable[Block]], Iterator[bytes]]]] = {
+    "csv": ("text/csv", "csv", iter_csv),
+    "ndjson": ("application/x-ndjson", "ndjson", iter_ndjson),
+    "parquet": ("application/vnd.apache.parquet", "parquet", iter_parquet),
+}
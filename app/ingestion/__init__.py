@@ -0,0 +1,3 @@
+"""
+신호 수집(ingestion) 경로를 위한 패키지입니다.
+"""
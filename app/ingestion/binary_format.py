@@ -0,0 +1,150 @@
+"""
+바이너리 신호 업로드 형식을 디코딩하는 모듈입니다.
+
+지원 형식:
+    - application/octet-stream: 24바이트 헤더 + little-endian float32 프레임
+    - application/x-npy: NumPy .npy 파일
+    - application/vnd.apache.arrow.stream / .file: Arrow IPC (채널별 컬럼)
+
+모든 형식은 np.frombuffer로 디코딩하며 샘플 단위의 Python 객체를 만들지 않습니다.
+"""
+
+import io
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+# 프레임 헤더: magic(4s), version(H), channel_count(H), sampling_rate(d), start_time(d, unix 초)
+FRAME_MAGIC = b"BCIF"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sHHdd")
+
+OCTET_STREAM = "application/octet-stream"
+NPY = "application/x-npy"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+SUPPORTED_CONTENT_TYPES = (OCTET_STREAM, NPY, ARROW_STREAM, ARROW_FILE)
+
+class SignalDecodeError(ValueError):
+    """업로드된 신호 본문을 해석할 수 없을 때 발생하는 예외"""
+    pass
+
+class UnsupportedFormatError(SignalDecodeError):
+    """지원하지 않는 Content-Type이거나 선택적 의존성이 없을 때 발생하는 예외"""
+    pass
+
+@dataclass
+class DecodedSignal:
+    """디코딩된 신호 블록"""
+    data: np.ndarray  # (samples, channels) float32
+    sampling_rate: Optional[float] = None
+    start_time: Optional[datetime] = None
+
+def encode_frame(data: np.ndarray, sampling_rate: float, start_time: datetime) -> bytes:
+    """(samples, channels) 배열을 프레임 형식으로 인코딩합니다."""
+    samples = np.ascontiguousarray(data, dtype="<f4")
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, samples.shape[1], sampling_rate, start_time.timestamp())
+    return header + samples.tobytes()
+
+def decode_frame(body: bytes) -> DecodedSignal:
+    """헤더가 붙은 float32 프레임을 디코딩합니다."""
+    if len(body) < FRAME_HEADER.size:
+        raise SignalDecodeError("Frame is shorter than its header")
+    magic, version, channel_count, sampling_rate, start_ts = FRAME_HEADER.unpack_from(body)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise SignalDecodeError("Unknown frame magic or version")
+    if channel_count == 0:
+        raise SignalDecodeError("Frame must declare at least one channel")
+    payload = len(body) - FRAME_HEADER.size
+    if payload % (4 * channel_count):
+        raise SignalDecodeError("Frame payload is not a whole number of samples")
+    data = np.frombuffer(body, dtype="<f4", offset=FRAME_HEADER.size).reshape(-1, channel_count)
+    return DecodedSignal(data=data, sampling_rate=sampling_rate, start_time=datetime.fromtimestamp(start_ts))
+
+def decode_npy(body: bytes) -> DecodedSignal:
+    """.npy 본문을 복사 없이 디코딩합니다."""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise SignalDecodeError(f"Invalid .npy body: {e}")
+    if dtype.kind != "f" or len(shape) not in (1, 2):
+        raise SignalDecodeError("Expected a 1-D or 2-D floating point array")
+    count = int(np.prod(shape))
+    if len(body) - stream.tell() < count * dtype.itemsize:
+        raise SignalDecodeError(".npy body is truncated")
+    data = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    data = data.reshape(shape, order="F" if fortran_order else "C")
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+    return DecodedSignal(data=data)
+
+def decode_arrow(body: bytes, file_format: bool = False) -> DecodedSignal:
+    """Arrow IPC 본문을 디코딩합니다. 각 컬럼이 채널 하나입니다.
+
+    스키마 메타데이터에 sampling_rate, start_time(unix 초)이 있으면 함께 사용합니다.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise UnsupportedFormatError("Arrow IPC uploads require pyarrow")
+    try:
+        reader = pa.ipc.open_file(body) if file_format else pa.ipc.open_stream(body)
+        table = reader.read_all()
+    except pa.ArrowInvalid as e:
+        raise SignalDecodeError(f"Invalid Arrow IPC body: {e}")
+    if table.num_columns == 0:
+        raise SignalDecodeError("Arrow table has no channel columns")
+    data = np.empty((table.num_rows, table.num_columns), dtype="<f4")
+    for i, column in enumerate(table.columns):
+        if not pa.types.is_floating(column.type) and not pa.types.is_integer(column.type):
+            raise SignalDecodeError(f"Column '{table.column_names[i]}' is not numeric")
+        data[:, i] = column.to_numpy()
+    metadata = table.schema.metadata or {}
+    sampling_rate = metadata.get(b"sampling_rate")
+    start_time = metadata.get(b"start_time")
+    return DecodedSignal(
+        data=data,
+        sampling_rate=float(sampling_rate) if sampling_rate else None,
+        start_time=datetime.fromtimestamp(float(start_time)) if start_time else None
+    )
+
+def decode_signal(body: bytes, content_type: str) -> DecodedSignal:
+    """Content-Type에 맞는 디코더로 본문을 해석합니다.
+
+    Args:
+        body: 요청 본문
+        content_type: 요청의 Content-Type (파라미터 포함 가능)
+
+    Returns:
+        디코딩된 신호 블록
+
+    Raises:
+        UnsupportedFormatError: 지원하지 않는 형식인 경우
+        SignalDecodeError: 본문이 잘못된 경우
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == OCTET_STREAM:
+        decoded = decode_frame(body)
+    elif media_type == NPY:
+        decoded = decode_npy(body)
+    elif media_type == ARROW_STREAM:
+        decoded = decode_arrow(body)
+    elif media_type == ARROW_FILE:
+        decoded = decode_arrow(body, file_format=True)
+    else:
+        raise UnsupportedFormatError(f"Unsupported content type '{media_type}'")
+    if decoded.data.shape[0] == 0:
+        raise SignalDecodeError("Signal body contains no samples")
+    if not np.isfinite(decoded.data).all():
+        raise SignalDecodeError("Signal contains NaN or infinite values")
+    return decoded
@@ -0,0 +1,252 @@
+"""
+요청 처리기와 저장소 사이의 비동기 수집 큐 모듈입니다.
+
+데이터 라우터는 쓰기 작업을 큐에 넣고 결과만 기다립니다. 백그라운드 flusher가
+큐를 꺼내 샘플 수(INGEST_FLUSH_SAMPLES) 또는 시간(INGEST_FLUSH_INTERVAL_MS) 중
+먼저 도달한 기준으로 묶어 한 번에 저장합니다.
+
+큐는 대기 중인 샘플 수로 용량을 제한합니다. 가득 차면 submit이 최대
+INGEST_ENQUEUE_TIMEOUT_MS 동안 자리를 기다리고(클라이언트가 느려짐), 그래도
+자리가 없으면 IngestionQueueFull을 발생시켜 라우터가 429로 응답합니다.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..monitoring.ingestion_monitor import (
+    INGEST_QUEUE_JOBS, INGEST_QUEUE_SAMPLES, INGEST_QUEUE_REJECTED, INGEST_FLUSH_SAMPLES, INGEST_FLUSH_LATENCY
+)
+from . import writer
+
+logger = logging.getLogger(__name__)
+
+class IngestionQueueFull(Exception):
+    """큐에 자리가 없어 작업을 받을 수 없을 때 발생합니다."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Ingestion queue is full")
+        self.retry_after = retry_after
+
+@dataclass
+class IngestJob:
+    fn: Callable[..., Any]
+    args: tuple
+    samples: int
+    future: "asyncio.Future[Any]"
+
+class IngestionQueue:
+    """샘플 수로 용량이 제한된 쓰기 작업 큐와 배치 flusher"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_samples: int = 500000,
+        flush_samples: int = 50000,
+        flush_interval: float = 0.02,
+        enqueue_timeout: float = 0.5
+    ):
+        """
+        Args:
+            session_factory: writer가 없을 때 쓰기에 사용할 세션 팩토리 (expire_on_commit=False 권장)
+            max_samples: 큐에 대기하거나 저장 중일 수 있는 최대 샘플 수
+            flush_samples: 한 번에 저장할 최대 샘플 수
+            flush_interval: 첫 작업 이후 배치를 모으는 최대 시간 (초)
+            enqueue_timeout: 큐가 가득 찼을 때 자리를 기다리는 최대 시간 (초)
+        """
+        self.session_factory = session_factory
+        self.max_samples = max_samples
+        self.flush_samples = flush_samples
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._jobs: Deque[IngestJob] = deque()
+        self._pending_samples = 0  # 대기 중 + 저장 중인 샘플 수
+        self._changed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+        self.rejected = 0
+        self.last_flush_latency = 0.0
+
+    def start(self) -> None:
+        """flusher 태스크를 시작합니다. 실행 중인 이벤트 루프 안에서 호출해야 합니다."""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+            logger.info("Ingestion queue flusher started")
+
+    async def stop(self) -> None:
+        """남은 작업을 모두 저장한 뒤 flusher를 종료합니다."""
+        if self._task is None:
+            return
+        async with self._changed:
+            self._closing = True
+            self._changed.notify_all()
+        await self._task
+        self._task = None
+        logger.info("Ingestion queue flusher stopped")
+
+    async def submit(self, fn: Callable[..., Any], *args: Any, samples: int = 1) -> Any:
+        """쓰기 작업을 큐에 넣고 저장될 때까지 기다립니다.
+
+        fn(db, *args)는 커밋하지 않는 crud.add_* 함수여야 합니다.
+
+        Raises:
+            IngestionQueueFull: enqueue_timeout 안에 자리가 나지 않은 경우
+        """
+        future = asyncio.get_running_loop().create_future()
+        async with self._changed:
+            # 큐가 비어 있으면 용량보다 큰 작업도 받는다
+            if self._pending_samples and self._pending_samples + samples > self.max_samples:
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: self._pending_samples + samples <= self.max_samples),
+                        self.enqueue_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    INGEST_QUEUE_REJECTED.inc()
+                    raise IngestionQueueFull(retry_after=max(self.flush_interval, self.last_flush_latency, 0.1))
+            self._jobs.append(IngestJob(fn, args, samples, future))
+            self._pending_samples += samples
+            self._observe_depth()
+            self._changed.notify_all()
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._jobs)
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 길이, 대기 샘플 수와 flush 통계를 반환합니다."""
+        return {
+            "queue_depth": self.queue_depth,
+            "pending_samples": self._pending_samples,
+            "max_samples": self.max_samples,
+            "flushes": self.flushes,
+            "rejected": self.rejected,
+            "last_flush_latency_ms": self.last_flush_latency * 1000,
+        }
+
+    def _observe_depth(self) -> None:
+        INGEST_QUEUE_JOBS.set(len(self._jobs))
+        INGEST_QUEUE_SAMPLES.set(self._pending_samples)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._jobs or self._closing)
+                if not self._jobs:
+                    return
+                # 첫 작업 이후 flush_interval 동안, 또는 flush_samples가 찰 때까지 모은다
+                deadline = loop.time() + self.flush_interval
+                while not self._closing and sum(job.samples for job in self._jobs) < self.flush_samples:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                batch = [self._jobs.popleft()]
+                samples = batch[0].samples
+                while self._jobs and samples + self._jobs[0].samples <= self.flush_samples:
+                    samples += self._jobs[0].samples
+                    batch.append(self._jobs.popleft())
+                self._observe_depth()
+            try:
+                await self._flush(batch, samples)
+            except Exception as e:
+                # flush 자체가 실패해도 루프는 계속 돈다: 이 배치의 요청만 실패시킨다
+                logger.exception(f"Ingestion flush of {len(batch)} jobs failed")
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            finally:
+                async with self._changed:
+                    self._pending_samples -= samples
+                    self._observe_depth()
+                    self._changed.notify_all()
+
+    async def _flush(self, batch: List[IngestJob], samples: int) -> None:
+        start = time.perf_counter()
+        active_writer = writer.get_writer()
+        if active_writer is not None:
+            # writer 큐에 한꺼번에 넣으면 writer가 같은 그룹 커밋으로 묶는다
+            futures = await run_in_threadpool(lambda: [active_writer.submit(job.fn, *job.args) for job in batch])
+            results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+        else:
+            results = await run_in_threadpool(self._write_batch, batch)
+        self.last_flush_latency = time.perf_counter() - start
+        self.flushes += 1
+        INGEST_FLUSH_LATENCY.observe(self.last_flush_latency)
+        INGEST_FLUSH_SAMPLES.observe(samples)
+        for job, result in zip(batch, results):
+            if job.future.done():
+                continue
+            if isinstance(result, Exception):
+                job.future.set_exception(result)
+            else:
+                job.future.set_result(result)
+
+    def _write_batch(self, batch: List[IngestJob]) -> List[Any]:
+        db = self.session_factory()
+        try:
+            try:
+                results = [job.fn(db, *job.args) for job in batch]
+                db.commit()
+                db.expunge_all()
+                return results
+            except Exception:
+                db.rollback()
+            # 묶음 중 하나가 실패하면 나머지가 함께 실패하지 않도록 하나씩 다시 커밋한다
+            results = []
+            for job in batch:
+                try:
+                    results.append(job.fn(db, *job.args))
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Ingestion job {getattr(job.fn, '__name__', job.fn)} failed: {e}")
+                    results.append(e)
+            db.expunge_all()
+            return results
+        finally:
+            db.close()
+
+# 애플리케이션 전역 수집 큐 (시작 이벤트에서 시작됨)
+_queue: Optional[IngestionQueue] = None
+
+def start_ingestion_queue(session_factory: Callable[[], Session], **options: Any) -> IngestionQueue:
+    """전역 수집 큐를 만들고 flusher를 시작합니다."""
+    global _queue
+    if _queue is None:
+        _queue = IngestionQueue(session_factory, **options)
+    _queue.start()
+    return _queue
+
+async def stop_ingestion_queue() -> None:
+    """전역 수집 큐에 남은 작업을 저장하고 종료합니다."""
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
+
+def get_ingestion_queue() -> Optional[IngestionQueue]:
+    return _queue
+
+async def submit(db: Session, fn: Callable[..., Any], *args: Any, samples: int = 1) -> Any:
+    """쓰기 작업을 수집 큐로 보내고 저장될 때까지 기다립니다.
+
+    큐가 시작되지 않았으면 writer.write_async로 바로 저장합니다.
+    """
+    if _queue is not None:
+        return await _queue.submit(fn, *args, samples=samples)
+    return await writer.write_async(db, fn, *args)
@@ -0,0 +1,187 @@
+"""
+라이브 세션의 최근 샘플을 메모리에 보관하는 링 버퍼 모듈입니다.
+
+세션마다 고정 크기 NumPy 링 버퍼를 두고, 수집 경로가 커밋한 샘플을 채웁니다.
+버퍼는 같은 내용을 두 번(앞/뒤 절반) 기록하는 미러 구조이므로 용량 이하의
+"최근 n개" 구간은 항상 연속된 메모리이고, 복사 없이 뷰로 돌려줄 수 있습니다.
+
+샘플은 crud.record_samples가 세션(db.info)에 모아 두었다가 트랜잭션이 커밋된
+뒤에만 버퍼에 들어가므로, 롤백된 쓰기는 라이브 뷰에 나타나지 않습니다.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+SIGNAL_DTYPE = np.dtype("<f4")
+_STAGED_KEY = "live_buffer_staged"
+
+class RingBuffer:
+    """(timestamps, data) 샘플을 capacity개까지 보관하는 링 버퍼"""
+
+    def __init__(self, capacity: int, channel_count: int):
+        self.capacity = capacity
+        self.channel_count = channel_count
+        # 미러 구조: 위치 i의 샘플을 i와 i + capacity 두 곳에 기록한다
+        self._timestamps = np.zeros(2 * capacity, dtype="datetime64[us]")
+        self._data = np.zeros((2 * capacity, channel_count), dtype=SIGNAL_DTYPE)
+        self.total = 0  # 지금까지 추가된 샘플 수 (커서로 사용)
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._data.nbytes
+
+    def append(self, timestamps: np.ndarray, data: np.ndarray) -> None:
+        """샘플을 추가합니다. 용량보다 많으면 마지막 capacity개만 남습니다."""
+        count = len(timestamps)
+        if count == 0:
+            return
+        # 용량을 넘는 앞부분은 어차피 덮어쓰이므로 기록하지 않는다 (커서는 전체 수만큼 증가)
+        skipped = max(count - self.capacity, 0)
+        with self._lock:
+            positions = (self.total + skipped + np.arange(count - skipped)) % self.capacity
+            for offset in (0, self.capacity):
+                self._timestamps[positions + offset] = timestamps[skipped:]
+                self._data[positions + offset] = data[skipped:]
+            self.total += count
+
+    def latest(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """최근 count개 샘플의 뷰를 반환합니다. 다음 append가 덮어쓸 수 있으므로 바로 사용해야 합니다."""
+        with self._lock:
+            count = min(count, self.total, self.capacity)
+            return self._view(self.total, count)
+
+    def since(self, cursor: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """cursor(이전 응답의 total) 이후에 추가된 샘플의 복사본과 새 커서를 반환합니다.
+
+        버퍼가 이미 덮어쓴 샘플은 건너뛰고 남아 있는 가장 오래된 샘플부터 반환합니다.
+        복사량은 새로 추가된 샘플 수에 비례합니다.
+        """
+        with self._lock:
+            count = min(max(self.total - cursor, 0), self.capacity)
+            timestamps, data = self._view(self.total, count)
+            return timestamps.copy(), data.copy(), self.total
+
+    def window(self, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        """가장 늦은 샘플 기준 seconds초 안의 샘플 복사본을 시간순으로 반환합니다.
+
+        뷰를 잠금 밖으로 내보내면 그 사이 append가 덮어쓸 수 있으므로 잠금 안에서 복사합니다.
+        백필 업로드처럼 이전 시각의 샘플이 나중에 추가될 수 있으므로 버퍼가 시간순이라고
+        가정하지 않고 마스크로 고른 뒤 필요하면 정렬합니다.
+        """
+        with self._lock:
+            timestamps, data = self._view(self.total, min(self.total, self.capacity))
+            if len(timestamps) == 0:
+                return timestamps.copy(), data.copy()
+            keep = timestamps >= timestamps.max() - np.timedelta64(int(seconds * 1e6), "us")
+            timestamps, data = timestamps[keep], data[keep]
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, data = timestamps[order], data[order]
+        return timestamps, data
+
+    def _view(self, total: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        end = total % self.capacity + self.capacity
+        return self._timestamps[end - count:end], self._data[end - count:end]
+
+class LiveBufferRegistry:
+    """세션별 링 버퍼를 관리합니다. 세션 수를 제한하며 가장 오래 쓰이지 않은 버퍼를 버립니다."""
+
+    def __init__(self, max_bytes_per_session: int, max_sessions: int):
+        self.max_bytes_per_session = max_bytes_per_session
+        self.max_sessions = max_sessions
+        self._buffers: "OrderedDict[int, RingBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def capacity_for(self, channel_count: int) -> int:
+        # 미러 구조이므로 샘플 하나가 (타임스탬프 8바이트 + 채널 × 4바이트) × 2를 차지한다
+        return max(self.max_bytes_per_session // (2 * (8 + 4 * channel_count)), 1)
+
+    def append(self, session_id: int, timestamps: np.ndarray, data: np.ndarray) -> None:
+        data = np.asarray(data, dtype=SIGNAL_DTYPE)
+        if data.ndim != 2 or len(data) == 0:
+            return
+        with self._lock:
+            buffer = self._buffers.get(session_id)
+            if buffer is None or buffer.channel_count != data.shape[1]:
+                buffer = RingBuffer(self.capacity_for(data.shape[1]), data.shape[1])
+                self._buffers[session_id] = buffer
+            self._buffers.move_to_end(session_id)
+            while len(self._buffers) > self.max_sessions:
+                self._buffers.popitem(last=False)
+        buffer.append(timestamps.astype("datetime64[us]"), data)
+
+    def get(self, session_id: int) -> Optional[RingBuffer]:
+        with self._lock:
+            return self._buffers.get(session_id)
+
+    def drop(self, session_id: int) -> None:
+        with self._lock:
+            self._buffers.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buffers.clear()
+
+class LiveCursor:
+    """세션의 라이브 버퍼를 따라가며 마지막으로 읽은 이후의 샘플만 돌려줍니다.
+
+    cursor가 None이면 연결한 시점부터 읽습니다. 그 뒤에 버퍼가 새로 만들어지면
+    (첫 샘플, 서버 재시작, 교체, 축출 후 재생성) 이전 커서는 의미가 없으므로 처음부터 읽습니다.
+    이때나 읽기 전에 덮어쓰인 샘플이 있을 때는 contiguous가 False가 되어, 상태를 가진
+    소비자(스트리밍 필터 등)가 이전 샘플과 이어 붙이지 않게 합니다.
+    """
+
+    def __init__(self, session_id: int, cursor: Optional[int] = None, registry: Optional[LiveBufferRegistry] = None):
+        self.session_id = session_id
+        self.cursor = cursor
+        self._registry = registry or live_buffers
+        self._buffer: Optional[RingBuffer] = None
+        self._restarted = False
+        self.contiguous = True  # 마지막 poll 결과가 직전 결과 바로 다음 샘플부터인지
+
+    def poll(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """새 샘플이 있으면 (timestamps, data)를, 없으면 None을 반환합니다."""
+        buffer = self._registry.get(self.session_id)
+        if buffer is None:
+            if self.cursor is None:
+                self.cursor = 0
+            return None
+        if buffer is not self._buffer:
+            if self._buffer is not None or (self.cursor is not None and self.cursor > buffer.total):
+                self.cursor = 0
+                self._restarted = self._buffer is not None
+            elif self.cursor is None:
+                self.cursor = buffer.total
+            self._buffer = buffer
+        previous = self.cursor
+        timestamps, data, self.cursor = buffer.since(self.cursor)
+        if len(timestamps) == 0:
+            return None
+        self.contiguous = not self._restarted and self.cursor - len(timestamps) == previous
+        self._restarted = False
+        return timestamps, data
+
+live_buffers = LiveBufferRegistry(settings.LIVE_BUFFER_BYTES_PER_SESSION, settings.LIVE_BUFFER_MAX_SESSIONS)
+
+def stage(db: Session, session_id: int, timestamps: np.ndarray, data: np.ndarray) -> None:
+    """커밋되면 라이브 버퍼에 들어갈 샘플을 세션에 모아 둡니다."""
+    staged: List[Tuple[int, np.ndarray, np.ndarray]] = db.info.setdefault(_STAGED_KEY, [])
+    # 요청 본문 위의 뷰일 수 있으므로 커밋 시점까지 유지되도록 복사한다
+    staged.append((session_id, np.array(timestamps, dtype="datetime64[us]"), np.array(data, dtype=SIGNAL_DTYPE)))
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged(db: Session) -> None:
+    for session_id, timestamps, data in db.info.pop(_STAGED_KEY, []):
+        live_buffers.append(session_id, timestamps, data)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(db: Session) -> None:
+    db.info.pop(_STAGED_KEY, None)
@@ -0,0 +1,251 @@
+"""
+WebSocket 스트리밍 수집을 처리하는 모듈입니다.
+
+장치는 연결 하나로 프레임을 계속 보내고, 서버는 프레임을 모아 한 번의 쓰기로
+저장한 뒤 마지막으로 커밋된 시퀀스 번호를 돌려줍니다 (누적 ack).
+
+메시지 형식:
+    - 바이너리: 8바이트 little-endian 시퀀스 번호 + binary_format 프레임 (BCIF 헤더 + float32)
+    - 텍스트: {"seq": 1, "data": [[...], ...], "sampling_rate": 250.0, "start_time": "..."} JSON
+      (sampling_rate, start_time을 생략하면 직전 프레임에 이어지는 것으로 봅니다)
+
+서버 응답:
+    - {"ack": seq, "samples": n, "pending": 대기 중인 프레임 수}
+    - {"error": 메시지, "first_seq": a, "last_seq": b}  (해당 범위는 저장되지 않았으므로 장치가 다시 보내야 함)
+
+쓰기를 기다리는 프레임이 WS_MAX_PENDING_FRAMES개를 넘으면 소켓 읽기를 멈추므로
+저장이 밀릴 때는 TCP 흐름 제어로 장치 쪽 전송이 느려집니다.
+"""
+
+import asyncio
+import json
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+from fastapi import WebSocket
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..monitoring.ingestion_monitor import observe_batch, WEBSOCKET_CONNECTIONS, WEBSOCKET_BACKPRESSURE
+from . import writer
+from .binary_format import decode_frame, SignalDecodeError
+
+logger = logging.getLogger(__name__)
+
+SEQ_HEADER = struct.Struct("<Q")
+
+@dataclass
+class StreamFrame:
+    """시퀀스 번호가 붙은 신호 프레임"""
+    seq: int
+    data: np.ndarray  # (samples, channels) float32
+    sampling_rate: Optional[float] = None
+    start_time: Optional[datetime] = None
+    epoch: int = 0  # 큐에 넣을 때의 StreamIngestor._epoch. 배치가 거부되면 이전 epoch 프레임은 버린다
+
+def parse_message(message: dict) -> StreamFrame:
+    """WebSocket 메시지 하나를 프레임으로 해석합니다.
+
+    Raises:
+        SignalDecodeError: 메시지 형식이 잘못된 경우
+    """
+    if message.get("bytes") is not None:
+        body = message["bytes"]
+        if len(body) < SEQ_HEADER.size:
+            raise SignalDecodeError("Binary message is shorter than its sequence header")
+        (seq,) = SEQ_HEADER.unpack_from(body)
+        decoded = decode_frame(body[SEQ_HEADER.size:])
+        frame = StreamFrame(seq=seq, data=decoded.data, sampling_rate=decoded.sampling_rate, start_time=decoded.start_time)
+    else:
+        try:
+            payload = json.loads(message.get("text") or "")
+            frame = StreamFrame(
+                seq=int(payload["seq"]),
+                data=np.asarray(payload["data"], dtype="<f4"),
+                sampling_rate=payload.get("sampling_rate"),
+                start_time=datetime.fromisoformat(payload["start_time"]) if payload.get("start_time") else None
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise SignalDecodeError(f"Invalid JSON frame: {e}")
+        if frame.data.ndim == 1:
+            frame.data = frame.data[:, np.newaxis]
+    if frame.data.ndim != 2 or frame.data.shape[0] == 0:
+        raise SignalDecodeError("Frame contains no samples")
+    if not np.isfinite(frame.data).all():
+        raise SignalDecodeError("Frame contains NaN or infinite values")
+    return frame
+
+def coalesce_frames(frames: List[StreamFrame]) -> List[Tuple[np.ndarray, datetime, float]]:
+    """시간상 이어지는 프레임들을 (data, start_time, sampling_rate) 블록 하나로 합칩니다.
+
+    프레임마다 청크를 만들지 않으므로 작은 프레임을 많이 보내도 행 수가 늘지 않습니다.
+    """
+    blocks: List[Tuple[List[np.ndarray], datetime, float]] = []
+    next_start: Optional[datetime] = None
+    for frame in frames:
+        rate = frame.sampling_rate
+        if blocks:
+            parts, start, block_rate = blocks[-1]
+            tolerance = timedelta(seconds=0.5 / block_rate)
+            if rate == block_rate and parts[-1].shape[1] == frame.data.shape[1] and abs(frame.start_time - next_start) <= tolerance:
+                parts.append(frame.data)
+                next_start += timedelta(seconds=len(frame.data) / rate)
+                continue
+        blocks.append(([frame.data], frame.start_time, rate))
+        next_start = frame.start_time + timedelta(seconds=len(frame.data) / rate)
+    return [(parts[0] if len(parts) == 1 else np.concatenate(parts), start, rate) for parts, start, rate in blocks]
+
+class StreamIngestor:
+    """WebSocket 연결 하나의 수신 루프와 배치 쓰기 루프"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        db: Session,
+        session_id: int,
+        sampling_rate: Optional[float] = None,
+        max_pending: int = 256,
+        max_batch_samples: int = 50000,
+        flush_interval: float = 0.05
+    ):
+        """
+        Args:
+            websocket: accept된 WebSocket
+            db: 요청 세션 (writer가 없을 때 쓰기에 사용)
+            session_id: 데이터를 저장할 세션 id
+            sampling_rate: 프레임에 샘플링 레이트가 없을 때 사용할 값
+            max_pending: 쓰기를 기다릴 수 있는 최대 프레임 수
+            max_batch_samples: 한 번의 쓰기로 묶을 최대 샘플 수
+            flush_interval: 첫 프레임 이후 배치를 모으는 최대 시간 (초)
+        """
+        self.websocket = websocket
+        self.db = db
+        self.session_id = session_id
+        self.sampling_rate = sampling_rate
+        self.max_batch_samples = max_batch_samples
+        self.flush_interval = flush_interval
+        self._queue: "asyncio.Queue[Optional[StreamFrame]]" = asyncio.Queue(maxsize=max_pending)
+        self._next_start: Optional[datetime] = None
+        self._epoch = 0
+        self._closing = False
+        self.last_received = -1  # 큐에 넣었거나 저장한 마지막 시퀀스 번호
+        self.last_acked = -1  # 커밋된 마지막 시퀀스 번호
+
+    async def run(self) -> None:
+        """연결이 끊길 때까지 프레임을 받아 저장합니다. 끊긴 뒤 남은 프레임도 저장합니다."""
+        WEBSOCKET_CONNECTIONS.inc()
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await self._receive_loop()
+        finally:
+            # 큐가 가득 차 있어도 기다리지 않는다. flusher는 큐를 비운 뒤 _closing을 보고 끝난다
+            self._closing = True
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+            await flusher
+            WEBSOCKET_CONNECTIONS.dec()
+
+    async def _receive_loop(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                frame = parse_message(message)
+                if frame.seq <= self.last_received:
+                    # 이미 저장했거나 저장 중인 프레임의 재전송은 다시 저장하지 않고, 시작 시각도 진행시키지 않는다
+                    await self._send({"ack": self.last_acked, "duplicate": frame.seq})
+                    continue
+                frame = self._complete(frame)
+            except SignalDecodeError as e:
+                await self._send({"error": str(e)})
+                continue
+            self.last_received = frame.seq
+            frame.epoch = self._epoch
+            if self._queue.full():
+                WEBSOCKET_BACKPRESSURE.inc()
+            await self._queue.put(frame)
+
+    def _complete(self, frame: StreamFrame) -> StreamFrame:
+        # 생략된 샘플링 레이트와 시작 시각을 채운다
+        frame.sampling_rate = frame.sampling_rate or self.sampling_rate
+        if not frame.sampling_rate or frame.sampling_rate <= 0:
+            raise SignalDecodeError("A positive sampling_rate is required")
+        frame.start_time = frame.start_time or self._next_start or datetime.now()
+        self._next_start = frame.start_time + timedelta(seconds=len(frame.data) / frame.sampling_rate)
+        return frame
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._closing and self._queue.empty():
+                return
+            frame = await self._queue.get()
+            if frame is None:
+                return
+            batch, samples, stop = [frame], len(frame.data), False
+            deadline = loop.time() + self.flush_interval
+            # 이미 도착했거나 곧 도착할 프레임을 한 번의 쓰기로 묶는다
+            while samples < self.max_batch_samples:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    frame = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if frame is None:
+                    stop = True
+                    break
+                batch.append(frame)
+                samples += len(frame.data)
+            # 앞선 배치가 거부된 뒤 큐에 남아 있던 프레임은 장치가 다시 보낸다
+            batch = [f for f in batch if f.epoch == self._epoch]
+            if batch:
+                await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[StreamFrame]) -> None:
+        start = time.perf_counter()
+        try:
+            written = await writer.write_async(self.db, crud.add_signal_chunks, self.session_id, coalesce_frames(batch))
+        except Exception as e:
+            # 어떤 오류든 이 배치만 실패로 알리고 연결은 유지한다 (flusher가 죽으면 수신 루프가 막힌다)
+            if isinstance(e, ValueError):
+                logger.warning(f"Stream batch for session {self.session_id} rejected: {e}")
+                error = str(e)
+            else:
+                logger.exception(f"Stream batch for session {self.session_id} failed")
+                error = f"Failed to store frames: {type(e).__name__}"
+            await self._send({"error": error, "first_seq": batch[0].seq, "last_seq": self._reject_pending(batch)})
+            return
+        observe_batch("websocket", written, time.perf_counter() - start)
+        self.last_acked = batch[-1].seq
+        await self._send({"ack": self.last_acked, "samples": written, "pending": self._queue.qsize()})
+
+    def _reject_pending(self, batch: List[StreamFrame]) -> int:
+        """거부된 배치 이후 받은 프레임도 버리고, 장치가 다시 보낼 수 있게 수신 상태를 되돌립니다.
+
+        Returns:
+            버린 마지막 시퀀스 번호 (first_seq부터 여기까지 다시 보내야 함)
+        """
+        last_seq = self.last_received
+        self._epoch += 1  # 큐에 있거나 put을 기다리는 프레임은 이전 epoch이므로 저장되지 않는다
+        self.last_received = self.last_acked
+        self._next_start = batch[0].start_time
+        return last_seq
+
+    async def _send(self, payload: dict) -> None:
+        try:
+            await self.websocket.send_json(payload)
+        except Exception:
+            # 장치가 이미 연결을 끊었으면 ack를 보낼 수 없다. 데이터는 이미 저장되었다.
+            pass
@@ -0,0 +1,201 @@
+"""
+단일 writer 스레드로 모든 쓰기를 처리하는 모듈입니다.
+
+WAL 모드에서 여러 요청이 각자 커밋하면 데이터베이스 잠금을 두고 경쟁하게 됩니다.
+SingleWriter는 큐에 쌓인 쓰기 작업을 하나의 스레드에서 꺼내 여러 개를 묶어
+한 트랜잭션으로 커밋(group commit)합니다. 읽기는 별도의 커넥션 풀을 사용하므로
+writer 뒤에서 막히지 않습니다.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..monitoring.ingestion_monitor import WRITER_QUEUE_DEPTH, WRITER_COMMIT_LATENCY, WRITER_BATCH_JOBS
+
+logger = logging.getLogger(__name__)
+
+WriteJob = Tuple[Callable[..., Any], tuple, dict, Future]
+
+class SingleWriter:
+    """쓰기 작업을 그룹 커밋하는 단일 스레드 writer"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_batch: int = 64,
+        max_queue: int = 1024
+    ):
+        """
+        Args:
+            session_factory: writer 전용 세션 팩토리 (expire_on_commit=False 권장)
+            max_batch: 한 번에 커밋할 최대 작업 수
+            max_queue: 큐에 대기할 수 있는 최대 작업 수 (가득 차면 submit이 대기)
+        """
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[WriteJob]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.jobs = 0
+        self.last_commit_latency = 0.0
+
+    def start(self) -> None:
+        """writer 스레드를 시작합니다."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="bci-single-writer", daemon=True)
+        self._thread.start()
+        logger.info("Single writer thread started")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """남은 작업을 모두 처리한 뒤 writer 스레드를 종료합니다."""
+        if not self._thread:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("Single writer thread stopped")
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """쓰기 작업을 큐에 넣습니다.
+
+        fn(db, *args, **kwargs)는 writer 스레드에서 실행되며 커밋하지 않아야 합니다.
+        반환값은 커밋 후 세션에서 분리(expunge)되어 Future로 전달됩니다.
+
+        Args:
+            fn: 실행할 쓰기 함수 (crud.add_* 등)
+
+        Returns:
+            커밋이 끝나면 결과가 설정되는 Future
+        """
+        future: Future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        WRITER_QUEUE_DEPTH.set(self._queue.qsize())
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 깊이와 커밋 지연 시간 통계를 반환합니다."""
+        return {
+            "queue_depth": self.queue_depth,
+            "batches_committed": self.batches,
+            "jobs_committed": self.jobs,
+            "last_commit_latency_ms": self.last_commit_latency * 1000,
+        }
+
+    def _run(self) -> None:
+        db = self.session_factory()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                batch = [job]
+                stop = False
+                # 이미 대기 중인 작업을 최대 max_batch개까지 함께 커밋한다
+                while len(batch) < self.max_batch:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stop = True
+                        break
+                    batch.append(job)
+                WRITER_QUEUE_DEPTH.set(self._queue.qsize())
+                self._commit_batch(db, batch)
+                if stop:
+                    break
+        finally:
+            db.close()
+
+    def _commit_batch(self, db: Session, batch: List[WriteJob]) -> None:
+        start = time.perf_counter()
+        try:
+            results = [fn(db, *args, **kwargs) for fn, args, kwargs, _ in batch]
+            db.commit()
+        except Exception:
+            db.rollback()
+            # 묶음 중 하나가 실패하면 나머지가 함께 실패하지 않도록 하나씩 다시 커밋한다
+            for job in batch:
+                self._commit_batch_single(db, job)
+            return
+        db.expunge_all()
+        self._record(start, len(batch))
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _commit_batch_single(self, db: Session, job: WriteJob) -> None:
+        fn, args, kwargs, future = job
+        start = time.perf_counter()
+        try:
+            result = fn(db, *args, **kwargs)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Write job {getattr(fn, '__name__', fn)} failed: {e}")
+            future.set_exception(e)
+            return
+        db.expunge_all()
+        self._record(start, 1)
+        future.set_result(result)
+
+    def _record(self, start: float, jobs: int) -> None:
+        self.last_commit_latency = time.perf_counter() - start
+        self.batches += 1
+        self.jobs += jobs
+        WRITER_COMMIT_LATENCY.observe(self.last_commit_latency)
+        WRITER_BATCH_JOBS.observe(jobs)
+
+# 애플리케이션 전역 writer (WAL 모드에서만 시작됨)
+_writer: Optional[SingleWriter] = None
+
+def start_writer(session_factory: Callable[[], Session], max_batch: int = 64, max_queue: int = 1024) -> SingleWriter:
+    """전역 writer를 만들고 시작합니다."""
+    global _writer
+    if _writer is None:
+        _writer = SingleWriter(session_factory, max_batch=max_batch, max_queue=max_queue)
+    _writer.start()
+    return _writer
+
+def stop_writer() -> None:
+    """전역 writer를 종료합니다."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+def get_writer() -> Optional[SingleWriter]:
+    return _writer
+
+def _write_inline(db: Session, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    result = fn(db, *args, **kwargs)
+    db.commit()
+    return result
+
+def write(db: Session, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """쓰기 작업을 실행하고 커밋될 때까지 기다립니다 (동기 버전).
+
+    writer가 실행 중이면 큐로 보내고, 아니면 요청 세션에서 바로 실행 후 커밋합니다.
+    """
+    if _writer is not None:
+        return _writer.submit(fn, *args, **kwargs).result()
+    return _write_inline(db, fn, *args, **kwargs)
+
+async def write_async(db: Session, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """write()의 비동기 버전. 이벤트 루프를 막지 않고 커밋을 기다립니다."""
+    if _writer is not None:
+        future = await run_in_threadpool(_writer.submit, fn, *args, **kwargs)
+        return await asyncio.wrap_future(future)
+    return await run_in_threadpool(_write_inline, db, fn, *args, **kwargs)
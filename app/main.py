@@ -1,12 +1,17 @@
 from fastapi import FastAPI, Request, Depends
+from datetime import datetime
+from typing import Optional
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
-from app import crud, models, schemas
-from app.database import engine, get_db
+from app import crud_async, schemas
+from app.database import engine, get_async_db, upgrade_schema, WAL_MODE, SessionLocal, WriterSessionLocal
+from app.ingestion import writer, ingest_queue
+from app.maintenance import retention
+from prometheus_client import make_asgi_app
 from app.config import settings
 from app.routers import bci_sessions, bci_data
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 import logging
 
@@ -14,7 +19,8 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-models.Base.metadata.create_all(bind=engine)
+# 이전 버전이 만든 데이터베이스에도 새 컬럼/인덱스를 추가한다
+upgrade_schema(engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -28,18 +34,59 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
 
+# Prometheus 메트릭 엔드포인트 (monitoring/prometheus_config.yml의 /metrics 스크랩 대상)
+app.mount("/metrics", make_asgi_app())
+
+@app.on_event("startup")
+def start_background_workers():
+    if WAL_MODE:
+        writer.start_writer(WriterSessionLocal, settings.WRITER_MAX_BATCH, settings.WRITER_QUEUE_SIZE)
+    policies = (settings.RETENTION_SESSION_DAYS, settings.RETENTION_RAW_DATA_DAYS, settings.ARCHIVE_AFTER_DAYS)
+    if any(days is not None for days in policies):
+        retention.start_retention_worker(
+            SessionLocal,
+            settings.RETENTION_INTERVAL_SECONDS,
+            session_days=settings.RETENTION_SESSION_DAYS,
+            raw_data_days=settings.RETENTION_RAW_DATA_DAYS,
+            chunk_size=settings.RETENTION_DELETE_CHUNK,
+            vacuum_pages=settings.RETENTION_VACUUM_PAGES,
+            archive_after_days=settings.ARCHIVE_AFTER_DAYS
+        )
+
+@app.on_event("startup")
+async def start_ingestion_queue():
+    # flusher는 이벤트 루프의 태스크이므로 비동기 시작 이벤트에서 만든다
+    ingest_queue.start_ingestion_queue(
+        WriterSessionLocal,
+        max_samples=settings.INGEST_QUEUE_MAX_SAMPLES,
+        flush_samples=settings.INGEST_FLUSH_SAMPLES,
+        flush_interval=settings.INGEST_FLUSH_INTERVAL_MS / 1000,
+        enqueue_timeout=settings.INGEST_ENQUEUE_TIMEOUT_MS / 1000
+    )
+
+@app.on_event("shutdown")
+async def stop_ingestion_queue():
+    # 남은 작업이 writer로 가야 하므로 writer보다 먼저 멈춘다 (종료 핸들러는 등록 순서대로 실행)
+    await ingest_queue.stop_ingestion_queue()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # 보존 정책 스레드가 writer에 작업을 넣으므로 writer보다 먼저 멈춘다
+    retention.stop_retention_worker()
+    writer.stop_writer()
+
 # 라우터 설정
 app.include_router(bci_sessions.router, prefix=settings.API_V1_STR, tags=["sessions"])
 app.include_router(bci_data.router, prefix=settings.API_V1_STR, tags=["data"])
 
 @app.get("/", response_class=HTMLResponse)
-async def root(request: Request, db: Session = Depends(get_db)):
-    sessions = crud.get_sessions(db)
+async def root(request: Request, db: AsyncSession = Depends(get_async_db)):
+    sessions = await crud_async.get_session_summaries(db)
     return templates.TemplateResponse("session_list.html", {"request": request, "sessions": sessions})
 
 @app.get("/add-data-point/{session_id}", response_class=HTMLResponse)
-async def add_data_point(request: Request, session_id: int, db: Session = Depends(get_db)):
-    session = crud.get_session(db, session_id)
+async def add_data_point(request: Request, session_id: int, db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(db, session_id)
     return templates.TemplateResponse("add_data_point.html", {"request": request, "session": session})
 
 @app.get("/create-session", response_class=HTMLResponse)
@@ -47,27 +94,32 @@ async def create_session(request: Request):
     return templates.TemplateResponse("create_session.html", {"request": request})
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db)):
-    sessions = crud.get_sessions(db)
-    return templates.TemplateResponse("dashboard.html", {"request": request, "sessions": sessions})
+async def dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    sessions = await crud_async.get_session_summaries(db, limit=10)
+    summary = await crud_async.get_dashboard_summary(db)
+    return templates.TemplateResponse("dashboard.html", {"request": request, "sessions": sessions, **summary})
 
 @app.get("/delete-data-point/{data_id}", response_class=HTMLResponse)
-async def delete_data_point(request: Request, data_id: int, db: Session = Depends(get_db)):
-    data_point = crud.get_data_point(db, data_id)
+async def delete_data_point(request: Request, data_id: int, db: AsyncSession = Depends(get_async_db)):
+    data_point = await crud_async.get_data_point(db, data_id)
     return templates.TemplateResponse("delete_data_point.html", {"request": request, "data_point": data_point})
 
 @app.get("/delete-session/{session_id}", response_class=HTMLResponse)
-async def delete_session(request: Request, session_id: int, db: Session = Depends(get_db)):
-    session = crud.get_session(db, session_id)
+async def delete_session(request: Request, session_id: int, db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(db, session_id)
     return templates.TemplateResponse("delete_session.html", {"request": request, "session": session})
 
 @app.get("/session-detail/{session_id}", response_class=HTMLResponse)
-async def session_detail(request: Request, session_id: int, db: Session = Depends(get_db)):
-    session = crud.get_session(db, session_id)
-    data_points = crud.get_data_points(db, session_id)
-    return templates.TemplateResponse("session_detail.html", {"request": request, "session": session, "data_points": data_points})
+async def session_detail(request: Request, session_id: int, after_timestamp: Optional[datetime] = None, after_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(db, session_id)
+    data_points, next_cursor = await crud_async.get_data_points_page(db, session_id, after_timestamp, after_id)
+    # 청크로 저장된 샘플(파일/고정 레이트 세션, 신호 업로드)은 표 대신 신호 조회/내보내기로 안내한다
+    signal_samples = await crud_async.get_signal_sample_count(db, session_id)
+    return templates.TemplateResponse("session_detail.html", {
+        "request": request, "session": session, "data_points": data_points, "next_cursor": next_cursor, "signal_samples": signal_samples
+    })
 
 @app.get("/session-list", response_class=HTMLResponse)
-async def session_list(request: Request, db: Session = Depends(get_db)):
-    sessions = crud.get_sessions(db)
+async def session_list(request: Request, db: AsyncSession = Depends(get_async_db)):
+    sessions = await crud_async.get_session_summaries(db)
     return templates.TemplateResponse("session_list.html", {"request": request, "sessions": sessions})
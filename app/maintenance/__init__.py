@@ -0,0 +1,3 @@
+"""
+데이터 보존 정책 등 백그라운드 유지 관리 작업을 위한 패키지입니다.
+"""
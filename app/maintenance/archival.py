@@ -0,0 +1,77 @@
+"""
+닫힌 세션을 Parquet 파일로 옮기는 보관 작업 모듈입니다.
+
+date_recorded가 ARCHIVE_AFTER_DAYS보다 오래된 세션의 청크와 데이터 포인트를
+시간순 블록 단위로 읽어 storage/archive의 Parquet 파일 하나에 쓰고, 세션을 보관됨으로
+표시한 뒤 원시 데이터 행을 보존 정책과 같은 방식(묶음 단위 DELETE)으로 지웁니다.
+채널 통계와 피라미드는 데이터베이스에 남으므로 대시보드와 개요 차트는 그대로
+동작하고, crud.get_signal은 보관 파일을 읽습니다.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..ingestion import writer
+from ..storage import signal_files, session_archive
+from .retention import purge_raw_rows
+
+logger = logging.getLogger(__name__)
+
+def archive_session(db: Session, session_id: int, chunk_size: int = 5000, now: Optional[datetime] = None) -> int:
+    """세션 하나를 보관하고, 보관 파일에 기록한 샘플 수를 반환합니다."""
+    session = crud.get_session(db, session_id)
+    if session is None:
+        raise ValueError(f"Session {session_id} not found")
+    if session.archived_at is not None:
+        return 0
+    signal_path, labels = session.signal_path, session.channel_labels
+    has_data = session.channel_count is not None or db.query(models.BCIData.id).filter(models.BCIData.session_id == session_id).first()
+    archived_at = now or datetime.utcnow()
+    # 먼저 보관 표시를 커밋해 새 쓰기를 막는다 (claim_channel_count가 거부). archive_path가 아직
+    # 없으므로 조회는 계속 데이터베이스를 읽고, 이후 읽는 블록이 세션의 마지막 데이터가 된다
+    writer.write(db, crud.mark_session_archived, session_id, None, archived_at)
+    path, written = None, 0
+    try:
+        if has_data:
+            path = session_archive.session_archive_path(session_id)
+            written = session_archive.write_session_archive(path, labels, crud.iter_session_blocks(db, session_id, chunk_size))
+            # 파일이 완성된 뒤에야 조회를 보관 파일로 돌린다
+            writer.write(db, crud.mark_session_archived, session_id, str(path), archived_at)
+    except Exception:
+        writer.write(db, crud.mark_session_archived, session_id, None, None)
+        raise
+    purge_raw_rows(db, session_id, chunk_size)
+    if signal_path:
+        signal_files.delete_signal_file(signal_path)
+    logger.info(f"Archived session {session_id} ({written} samples) to {path}")
+    return written
+
+def run_archival(
+    db: Session,
+    after_days: int,
+    chunk_size: int = 5000,
+    vacuum_pages: int = 2000,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """date_recorded가 after_days보다 오래된 세션을 모두 보관합니다.
+
+    Returns:
+        보관한 세션 수와 샘플 수, 반환한 페이지 수
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=after_days)
+    result = {"sessions_archived": 0, "samples_archived": 0, "archive_pages_vacuumed": 0}
+    while True:
+        session_ids = crud.get_archivable_sessions(db, cutoff)
+        if not session_ids:
+            break
+        for session_id in session_ids:
+            result["samples_archived"] += archive_session(db, session_id, chunk_size, now)
+            result["sessions_archived"] += 1
+    if vacuum_pages and result["sessions_archived"]:
+        result["archive_pages_vacuumed"] = writer.write(db, crud.incremental_vacuum, vacuum_pages)
+    return result
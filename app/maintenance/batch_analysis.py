@@ -0,0 +1,223 @@
+"""
+여러 세션을 프로세스 풀에서 병렬로 다시 분석하는 배치 작업 모듈입니다.
+
+세션 하나가 작업 하나이며, 각 worker 프로세스는 시작할 때 자기 엔진(커넥션)을 만들고
+BLAS/OpenMP 스레드를 1개로 제한하므로 코어 수만큼 거의 선형으로 확장됩니다.
+worker는 결과만 돌려주고, 저장은 호출한 프로세스가 writer를 통해 묶어서 합니다
+(SQLite 쓰기는 한 곳에서만). 결과는 bci_analysis_results 테이블과, 지정하면
+JSON Lines 파일에 run_id와 함께 기록됩니다.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .. import analysis, crud, models
+from ..config import settings
+from ..ingestion import writer
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODES = ("chunked", "full")
+
+# worker 프로세스 전역: _init_worker가 만든다
+_worker_session_factory: Optional[Callable[[], Session]] = None
+
+def _init_worker(database_url: str) -> None:
+    global _worker_session_factory
+    # 프로세스마다 코어 하나: 라이브러리 스레드까지 쓰면 프로세스끼리 코어를 다툰다
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    engine = create_engine(database_url, connect_args={"check_same_thread": False} if database_url.startswith("sqlite") else {})
+    _worker_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def analyze_session_job(session_id: int, mode: str = "chunked") -> Dict[str, Any]:
+    """worker에서 세션 하나를 분석합니다. 예외는 실패 결과로 바꿔 반환합니다."""
+    start = time.perf_counter()
+    result, error = None, None
+    db = _worker_session_factory()
+    try:
+        session = crud.get_session(db, session_id)
+        if session is None:
+            raise ValueError(f"Session {session_id} not found")
+        if mode == "chunked":
+            result = analysis.analyze_session_chunked(db, session)
+        else:
+            result = analysis.analyze_session_full(db, session)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        db.close()
+    return {
+        "session_id": session_id,
+        "mode": mode,
+        "status": "failed" if error else "ok",
+        "result": result,
+        "error": error,
+        "duration_seconds": time.perf_counter() - start,
+    }
+
+@dataclass
+class BatchReport:
+    run_id: str
+    mode: str
+    workers: int
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    timings: Dict[int, float] = field(default_factory=dict)  # 세션별 분석 시간 (초)
+    failures: Dict[int, str] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        durations = sorted(self.timings.values())
+        return {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "workers": self.workers,
+            "sessions": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "sessions_per_second": round(self.total / self.elapsed_seconds, 3) if self.elapsed_seconds else None,
+            "median_session_seconds": round(durations[len(durations) // 2], 3) if durations else None,
+            "max_session_seconds": round(durations[-1], 3) if durations else None,
+        }
+
+def run_batch_analysis(
+    db: Session,
+    session_ids: Optional[List[int]] = None,
+    workers: Optional[int] = None,
+    mode: str = "chunked",
+    database_url: Optional[str] = None,
+    store: bool = True,
+    output_path: Optional[str] = None,
+    run_id: Optional[str] = None,
+    progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+    flush_every: int = 20
+) -> BatchReport:
+    """세션들을 프로세스 풀에서 분석하고 결과를 저장합니다.
+
+    Args:
+        db: 세션 목록 조회와 결과 저장에 쓰는 데이터베이스 세션
+        session_ids: 분석할 세션 (None이면 모든 세션)
+        workers: worker 프로세스 수 (None이면 ANALYSIS_WORKERS 또는 CPU 수)
+        mode: "chunked"(블록 단위, 메모리 일정) 또는 "full"(세션 전체를 메모리에 올림)
+        database_url: worker가 연결할 데이터베이스 (None이면 DATABASE_URL)
+        store: bci_analysis_results에 결과를 저장할지
+        output_path: 결과를 한 줄에 하나씩 쓸 JSON Lines 파일
+        run_id: 실행 식별자 (None이면 새로 만듦)
+        progress: 세션 하나가 끝날 때마다 (완료 수, 전체 수, 결과)로 호출
+        flush_every: 결과를 이만큼 모아 한 트랜잭션으로 저장
+
+    Returns:
+        성공/실패 수, 세션별 시간, 실패 사유를 담은 BatchReport
+    """
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode: {mode}")
+    if session_ids is None:
+        session_ids = [row[0] for row in db.query(models.BCISession.id).order_by(models.BCISession.id).all()]
+    workers = max(1, min(workers or settings.ANALYSIS_WORKERS or os.cpu_count() or 1, len(session_ids) or 1))
+    report = BatchReport(run_id=run_id or uuid.uuid4().hex, mode=mode, workers=workers, total=len(session_ids))
+    pending: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        if store and pending:
+            writer.write(db, crud.add_analysis_results, list(pending))
+        pending.clear()
+
+    output = open(output_path, "a", encoding="utf-8") if output_path else None
+    start = time.perf_counter()
+    try:
+        # fork는 부모의 스레드(writer 등)와 열린 커넥션까지 복제하므로 spawn으로 새 프로세스를 띄운다
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(database_url or settings.DATABASE_URL,)
+        ) as pool:
+            futures = {pool.submit(analyze_session_job, session_id, mode): session_id for session_id in session_ids}
+            for done, future in enumerate(as_completed(futures), start=1):
+                session_id = futures[future]
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool as e:
+                    # worker가 비정상 종료(예: 메모리 초과로 강제 종료)하면 남은 작업도 모두 실패한다
+                    outcome = {"session_id": session_id, "mode": mode, "status": "failed", "result": None,
+                               "error": f"Worker process died: {e}", "duration_seconds": 0.0}
+                if outcome["status"] == "ok":
+                    report.succeeded += 1
+                    report.timings[session_id] = outcome["duration_seconds"]
+                else:
+                    report.failed += 1
+                    report.failures[session_id] = outcome["error"]
+                    logger.warning(f"Batch analysis {report.run_id}: session {session_id} failed: {outcome['error']}")
+                record = dict(outcome, run_id=report.run_id)
+                pending.append(record)
+                if output is not None:
+                    output.write(json.dumps(record) + "\n")
+                if len(pending) >= flush_every:
+                    flush()
+                if progress is not None:
+                    progress(done, report.total, outcome)
+        flush()
+    finally:
+        if output is not None:
+            output.close()
+    report.elapsed_seconds = time.perf_counter() - start
+    logger.info(f"Batch analysis {report.run_id} finished: {report.summary()}")
+    return report
+
+# API로 시작한 배치 실행의 진행 상황 (run_id -> 상태)
+_runs: Dict[str, Dict[str, Any]] = {}
+_runs_lock = threading.Lock()
+
+def start_batch_analysis(
+    session_factory: Callable[[], Session],
+    session_ids: Optional[List[int]] = None,
+    workers: Optional[int] = None,
+    mode: str = "chunked"
+) -> str:
+    """배치 분석을 백그라운드 스레드에서 시작하고 run_id를 반환합니다."""
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode: {mode}")
+    run_id = uuid.uuid4().hex
+    state: Dict[str, Any] = {"run_id": run_id, "mode": mode, "status": "running", "done": 0, "total": None, "failed": 0}
+    with _runs_lock:
+        _runs[run_id] = state
+
+    def progress(done: int, total: int, outcome: Dict[str, Any]) -> None:
+        with _runs_lock:
+            state.update(done=done, total=total, failed=state["failed"] + (outcome["status"] != "ok"))
+
+    def run() -> None:
+        db = session_factory()
+        try:
+            report = run_batch_analysis(db, session_ids, workers, mode, run_id=run_id, progress=progress)
+            with _runs_lock:
+                state.update(status="finished", summary=report.summary(), failures=report.failures)
+        except Exception as e:
+            logger.error(f"Batch analysis {run_id} failed: {e}")
+            with _runs_lock:
+                state.update(status="failed", error=str(e))
+        finally:
+            db.close()
+
+    threading.Thread(target=run, name=f"bci-batch-analysis-{run_id[:8]}", daemon=True).start()
+    return run_id
+
+def get_batch_analysis(run_id: str) -> Optional[Dict[str, Any]]:
+    with _runs_lock:
+        state = _runs.get(run_id)
+        return dict(state) if state is not None else None
@@ -0,0 +1,192 @@
+"""
+세션 보존 정책을 실행하는 모듈입니다.
+
+오래된 세션은 통째로 지우고(RETENTION_SESSION_DAYS), 그보다 덜 오래된 세션은
+원시 데이터(BCIData, BCISignalChunk, 신호 파일)만 지운 뒤 채널 통계와 피라미드는
+남겨 둡니다(RETENTION_RAW_DATA_DAYS). 행은 ORM으로 불러오지 않고 chunk_size개씩
+집합 단위 DELETE로 지우며, 각 묶음은 writer를 거쳐 별도 트랜잭션으로 커밋되므로
+수집 중인 쓰기가 오래 막히지 않습니다. 실행이 끝나면 incremental_vacuum으로
+빈 페이지 일부를 파일 시스템에 돌려줍니다.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..ingestion import live_buffer, writer
+from ..storage import signal_files, session_archive
+
+logger = logging.getLogger(__name__)
+
+def purge_raw_rows(db: Session, session_id: int, chunk_size: int) -> int:
+    """세션의 원시 데이터 행을 chunk_size개씩 나눠 삭제하고, 삭제한 총 행 수를 반환합니다."""
+    total = 0
+    for table in crud.RAW_DATA_TABLES:
+        while True:
+            deleted = writer.write(db, crud.delete_raw_rows_chunk, table, session_id, chunk_size)
+            total += deleted
+            if deleted < chunk_size:
+                break
+    return total
+
+def _delete_files(signal_path: Optional[str], archive_path: Optional[str]) -> None:
+    if signal_path:
+        signal_files.delete_signal_file(signal_path)
+    if archive_path:
+        session_archive.delete_session_archive(archive_path)
+
+def delete_session(db: Session, session_id: int, signal_path: Optional[str], archive_path: Optional[str], chunk_size: int) -> int:
+    """세션과 그에 속한 모든 데이터를 삭제합니다."""
+    deleted = purge_raw_rows(db, session_id, chunk_size)
+    writer.write(db, crud.delete_session_record, session_id)
+    live_buffer.live_buffers.drop(session_id)
+    _delete_files(signal_path, archive_path)
+    return deleted
+
+def purge_raw_data(db: Session, session_id: int, signal_path: Optional[str], archive_path: Optional[str], chunk_size: int, now: datetime) -> int:
+    """세션의 원시 데이터(보관 파일 포함)만 삭제하고 요약 테이블은 남깁니다."""
+    deleted = purge_raw_rows(db, session_id, chunk_size)
+    writer.write(db, crud.mark_raw_data_purged, session_id, now)
+    live_buffer.live_buffers.drop(session_id)
+    _delete_files(signal_path, archive_path)
+    return deleted
+
+def run_retention(
+    db: Session,
+    session_days: Optional[int] = None,
+    raw_data_days: Optional[int] = None,
+    chunk_size: int = 5000,
+    vacuum_pages: int = 2000,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """보존 정책을 한 번 실행합니다.
+
+    Args:
+        db: 데이터베이스 세션
+        session_days: 이보다 오래된 세션을 삭제 (None이면 건너뜀)
+        raw_data_days: 이보다 오래된 세션의 원시 데이터를 삭제 (None이면 건너뜀)
+        chunk_size: DELETE 한 번에 지우는 최대 행 수
+        vacuum_pages: 실행 후 반환할 최대 빈 페이지 수 (0이면 건너뜀)
+        now: 기준 시각 (테스트용)
+
+    Returns:
+        삭제한 세션 수, 원시 데이터를 지운 세션 수, 삭제한 행 수, 반환한 페이지 수
+    """
+    now = now or datetime.utcnow()
+    result = {"sessions_deleted": 0, "sessions_purged": 0, "rows_deleted": 0, "pages_vacuumed": 0}
+
+    if session_days is not None:
+        cutoff = now - timedelta(days=session_days)
+        while True:
+            expired = crud.get_expired_sessions(db, cutoff)
+            if not expired:
+                break
+            for session_id, signal_path, archive_path in expired:
+                result["rows_deleted"] += delete_session(db, session_id, signal_path, archive_path, chunk_size)
+                result["sessions_deleted"] += 1
+                logger.info(f"Retention: deleted session {session_id}")
+
+    if raw_data_days is not None:
+        cutoff = now - timedelta(days=raw_data_days)
+        while True:
+            expired = crud.get_expired_sessions(db, cutoff, raw_only=True)
+            if not expired:
+                break
+            for session_id, signal_path, archive_path in expired:
+                result["rows_deleted"] += purge_raw_data(db, session_id, signal_path, archive_path, chunk_size, now)
+                result["sessions_purged"] += 1
+                logger.info(f"Retention: purged raw data of session {session_id}")
+
+    if vacuum_pages and result["rows_deleted"]:
+        result["pages_vacuumed"] = writer.write(db, crud.incremental_vacuum, vacuum_pages)
+    return result
+
+class RetentionWorker:
+    """보존 정책(과 설정된 경우 세션 보관)을 주기적으로 실행하는 백그라운드 스레드"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval_seconds: float,
+        session_days: Optional[int] = None,
+        raw_data_days: Optional[int] = None,
+        chunk_size: int = 5000,
+        vacuum_pages: int = 2000,
+        archive_after_days: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.session_days = session_days
+        self.raw_data_days = raw_data_days
+        self.chunk_size = chunk_size
+        self.vacuum_pages = vacuum_pages
+        self.archive_after_days = archive_after_days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """스레드를 시작합니다."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bci-retention", daemon=True)
+        self._thread.start()
+        logger.info("Retention worker started")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """진행 중인 묶음을 마친 뒤 스레드를 종료합니다."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info("Retention worker stopped")
+
+    def run_once(self) -> Dict[str, int]:
+        # 순환 import를 피하기 위해 여기서 불러온다 (archival이 이 모듈을 사용함)
+        from .archival import run_archival
+        db = self.session_factory()
+        try:
+            result = run_retention(
+                db,
+                session_days=self.session_days,
+                raw_data_days=self.raw_data_days,
+                chunk_size=self.chunk_size,
+                vacuum_pages=self.vacuum_pages
+            )
+            if self.archive_after_days is not None:
+                result.update(run_archival(db, self.archive_after_days, chunk_size=self.chunk_size, vacuum_pages=self.vacuum_pages))
+            return result
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                result = self.run_once()
+                logger.info(f"Retention pass finished: {result}")
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+# 애플리케이션 전역 보존 정책 스레드 (정책이 설정된 경우에만 시작됨)
+_worker: Optional[RetentionWorker] = None
+
+def start_retention_worker(session_factory: Callable[[], Session], interval_seconds: float, **policy) -> RetentionWorker:
+    """전역 보존 정책 스레드를 만들고 시작합니다."""
+    global _worker
+    if _worker is None:
+        _worker = RetentionWorker(session_factory, interval_seconds, **policy)
+    _worker.start()
+    return _worker
+
+def stop_retention_worker() -> None:
+    """전역 보존 정책 스레드를 종료합니다."""
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import Column, ForeignKey, Integer, BigInteger, String, DateTime, Float, Boolean, LargeBinary, Index, JSON
 from sqlalchemy.orm import relationship
+from datetime import datetime, timedelta
+from typing import List
+import numpy as np
 from .database import Base
 
+# 채널 구성을 모르는 세션(데이터가 아직 없는 세션)의 입력 폼 기본 채널 수
+DEFAULT_CHANNEL_COUNT = 4
+
 class BCISession(Base):
     __tablename__ = "bci_sessions"
 
@@ -9,15 +15,58 @@ class BCISession(Base):
     session_name = Column(String, index=True)
     date_recorded = Column(DateTime)
     subject_id = Column(String)
+    # "db": 신호를 BCISignalChunk.data에 저장, "file": storage/의 memmap 파일에 저장
+    storage_mode = Column(String, default="db", nullable=False)
+    signal_path = Column(String, nullable=True)
+    channel_count = Column(Integer, nullable=True)
+    # 몽타주 채널 이름 목록 (예: ["Fp1", "Fp2", ...]); 없으면 번호로 표시
+    channel_names = Column(JSON, nullable=True)
+    # 보존 정책으로 원시 데이터를 지운 시각 (요약 테이블은 유지됨)
+    raw_data_purged_at = Column(DateTime, nullable=True)
+    # Parquet으로 보관된 세션: 원시 데이터는 archive_path 파일에만 있다
+    archived_at = Column(DateTime, nullable=True)
+    archive_path = Column(String, nullable=True)
+    # 고정 샘플링 레이트 세션: 샘플은 인덱스로 저장하고 시각은 start_time + index / sampling_rate로 계산한다
+    sampling_rate = Column(Float, nullable=True)
+    start_time = Column(DateTime, nullable=True)  # 인덱스 0의 시각 (첫 쓰기에서 정해질 수 있음)
+    # 분석 전처리 필터 구성 (None이면 설정의 기본값)
+    line_frequency = Column(Float, nullable=True)
+    passband_low = Column(Float, nullable=True)
+    passband_high = Column(Float, nullable=True)
 
     data_points = relationship("BCIData", back_populates="session")
+    signal_chunks = relationship("BCISignalChunk", back_populates="session")
+
+    @property
+    def channel_labels(self) -> List[str]:
+        if self.channel_names:
+            return list(self.channel_names)
+        return [f"Channel {i + 1}" for i in range(self.channel_count or DEFAULT_CHANNEL_COUNT)]
+
+    @property
+    def is_indexed(self) -> bool:
+        return bool(self.sampling_rate)
+
+    def index_at(self, timestamp: datetime) -> int:
+        """시각에 가장 가까운 샘플 인덱스"""
+        return round((timestamp - self.start_time).total_seconds() * self.sampling_rate)
+
+    def time_at(self, index: int) -> datetime:
+        return self.start_time + timedelta(microseconds=round(index * 1e6 / self.sampling_rate))
 
 class BCIData(Base):
     __tablename__ = "bci_data"
+    __table_args__ = (
+        # 세션별 시간순 키셋 페이지네이션과 구간 조회용
+        Index("ix_bci_data_session_timestamp", "session_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("bci_sessions.id"))
     timestamp = Column(DateTime, index=True)
+    # 한 시점의 모든 채널 값: little-endian float32 벡터 (길이는 세션의 channel_count)
+    vector = Column(LargeBinary, nullable=True)
+    # 채널 벡터 도입 전에 기록된 4채널 행에서만 사용 (새 행은 NULL)
     channel_1 = Column(Float)
     channel_2 = Column(Float)
     channel_3 = Column(Float)
@@ -25,6 +74,80 @@ class BCIData(Base):
 
     session = relationship("BCISession", back_populates="data_points")
 
+    @property
+    def values(self) -> List[float]:
+        if self.vector is not None:
+            return np.frombuffer(self.vector, dtype="<f4").tolist()
+        return [self.channel_1, self.channel_2, self.channel_3, self.channel_4]
+
+class BCISignalChunk(Base):
+    """연속된 샘플 블록을 float32 배열 하나로 묶어 저장하는 테이블"""
+    __tablename__ = "bci_signal_chunks"
+    __table_args__ = (
+        Index("ix_bci_signal_chunks_session_start", "session_id", "start_time"),
+        Index("ix_bci_signal_chunks_session_index", "session_id", "start_index"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("bci_sessions.id"), nullable=False)
+    start_time = Column(DateTime, nullable=False)  # 첫 샘플 시각
+    end_time = Column(DateTime, nullable=False)  # 마지막 샘플 시각
+    sampling_rate = Column(Float, nullable=False)
+    sample_count = Column(Integer, nullable=False)
+    channel_count = Column(Integer, nullable=False)
+    # little-endian float32, (sample_count, channel_count) 행 우선 배열
+    data = Column(LargeBinary, nullable=True)
+    # 파일 저장 세션일 때 신호 파일 안의 바이트 오프셋 (data는 NULL)
+    file_offset = Column(Integer, nullable=True)
+    # 고정 레이트 세션에서 첫 샘플의 세션 내 인덱스 (그 외 세션은 NULL)
+    start_index = Column(BigInteger, nullable=True)
+
+    session = relationship("BCISession", back_populates="signal_chunks")
+
+class BCIChannelStats(Base):
+    """세션/채널별 누적 통계. 삽입 배치와 같은 트랜잭션에서 갱신된다."""
+    __tablename__ = "bci_channel_stats"
+
+    session_id = Column(Integer, ForeignKey("bci_sessions.id"), primary_key=True)
+    channel_index = Column(Integer, primary_key=True)  # 0부터 시작
+    count = Column(Integer, nullable=False, default=0)
+    sum = Column(Float, nullable=False, default=0.0)
+    sum_sq = Column(Float, nullable=False, default=0.0)
+    min = Column(Float)
+    max = Column(Float)
+    first_timestamp = Column(DateTime)
+    last_timestamp = Column(DateTime)
+
+class BCISignalPyramid(Base):
+    """다중 해상도 min/max/mean 구간 요약. 채널별 값은 배열 blob으로 저장한다."""
+    __tablename__ = "bci_signal_pyramid"
+
+    session_id = Column(Integer, ForeignKey("bci_sessions.id"), primary_key=True)
+    level = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)  # epoch 마이크로초 // 레벨 구간 폭
+    channel_count = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False)
+    min_values = Column(LargeBinary, nullable=False)  # float32 (channels,)
+    max_values = Column(LargeBinary, nullable=False)  # float32 (channels,)
+    sum_values = Column(LargeBinary, nullable=False)  # float64 (channels,)
+
+class BCIAnalysisResult(Base):
+    """배치 분석 실행(run_id)별 세션 분석 결과. 실패한 세션은 error만 기록한다."""
+    __tablename__ = "bci_analysis_results"
+    __table_args__ = (
+        Index("ix_bci_analysis_results_session_created", "session_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, nullable=False, index=True)
+    session_id = Column(Integer, ForeignKey("bci_sessions.id"), nullable=False)
+    mode = Column(String, nullable=False)  # "chunked" 또는 "full"
+    status = Column(String, nullable=False)  # "ok" 또는 "failed"
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    duration_seconds = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -32,4 +155,4 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
@@ -0,0 +1,86 @@
+"""
+데이터 수집(ingestion) 경로 모니터링을 위한 모듈입니다.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus 메트릭 정의
+BULK_INSERT_LATENCY = Histogram(
+    'bci_bulk_insert_latency_seconds',
+    'Time spent writing one ingestion batch in a single transaction',
+    ['path'],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+BULK_INSERT_BATCH_SIZE = Histogram(
+    'bci_bulk_insert_batch_size',
+    'Number of samples written per ingestion batch',
+    ['path'],
+    buckets=[1, 10, 100, 500, 1000, 2500, 5000, 10000, 50000]
+)
+INGESTED_SAMPLES = Counter(
+    'bci_ingested_samples_total',
+    'Total number of samples written',
+    ['path']
+)
+
+# 단일 writer 스레드 메트릭
+WRITER_QUEUE_DEPTH = Gauge(
+    'bci_writer_queue_depth',
+    'Number of write jobs waiting for the single writer thread'
+)
+WRITER_COMMIT_LATENCY = Histogram(
+    'bci_writer_commit_latency_seconds',
+    'Time spent executing and committing one group of write jobs',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+WRITER_BATCH_JOBS = Histogram(
+    'bci_writer_batch_jobs',
+    'Number of write jobs committed per group commit',
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+# WebSocket 스트리밍 수집 메트릭
+WEBSOCKET_CONNECTIONS = Gauge(
+    'bci_websocket_connections',
+    'Number of open WebSocket ingestion connections'
+)
+WEBSOCKET_BACKPRESSURE = Counter(
+    'bci_websocket_backpressure_total',
+    'Number of times a WebSocket stream stopped reading because its write queue was full'
+)
+
+# 비동기 수집 큐 메트릭
+INGEST_QUEUE_JOBS = Gauge(
+    'bci_ingest_queue_jobs',
+    'Number of write jobs waiting in the async ingestion queue'
+)
+INGEST_QUEUE_SAMPLES = Gauge(
+    'bci_ingest_queue_samples',
+    'Number of samples queued or being flushed by the async ingestion queue'
+)
+INGEST_QUEUE_REJECTED = Counter(
+    'bci_ingest_queue_rejected_total',
+    'Number of write requests rejected with 429 because the ingestion queue was full'
+)
+INGEST_FLUSH_SAMPLES = Histogram(
+    'bci_ingest_flush_samples',
+    'Number of samples written per ingestion queue flush',
+    buckets=[1, 10, 100, 500, 1000, 5000, 10000, 50000, 100000]
+)
+INGEST_FLUSH_LATENCY = Histogram(
+    'bci_ingest_flush_latency_seconds',
+    'Time spent writing one ingestion queue flush',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+
+def observe_batch(path: str, samples: int, latency: float) -> None:
+    """배치 하나의 쓰기 결과를 기록합니다.
+
+    Args:
+        path: 수집 경로 이름 (예: "bulk")
+        samples: 배치에 포함된 샘플 수
+        latency: 트랜잭션에 걸린 시간 (초)
+    """
+    BULK_INSERT_LATENCY.labels(path=path).observe(latency)
+    BULK_INSERT_BATCH_SIZE.labels(path=path).observe(samples)
+    INGESTED_SAMPLES.labels(path=path).inc(samples)
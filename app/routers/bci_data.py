@@ -1,10 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Form, Query, WebSocket, status
 from sqlalchemy.orm import Session
-from .. import crud, schemas
-from ..database import get_db
-from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import analysis, crud, crud_async, schemas
+from ..database import get_db, get_async_db, SessionLocal
+from ..config import settings
+from ..monitoring.ingestion_monitor import observe_batch
+from ..dsp.downsample import decimate
+from ..dsp import pyramid
+from ..ingestion import writer, live_buffer, ingest_queue
+from ..ingestion.ingest_queue import IngestionQueueFull
+from ..ingestion.stream import StreamIngestor
+from ..maintenance import batch_analysis
+from ..export.streaming import EXPORT_FORMATS
+from ..ingestion.binary_format import decode_signal, SignalDecodeError, UnsupportedFormatError
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -31,8 +49,8 @@ def delete_data_point(data_id: int, db: Session = Depends(get_db)):
     return {"message": "Data point deleted successfully"}
 
 @router.get("/add/{session_id}", response_class=HTMLResponse)
-async def add_data_point_form(request: Request, session_id: int, db: Session = Depends(get_db)):
-    session = crud.get_session(db, session_id)
+async def add_data_point_form(request: Request, session_id: int, db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     return templates.TemplateResponse("add_data_point.html", {"request": request, "session": session})
@@ -41,22 +59,409 @@ async def add_data_point_form(request: Request, session_id: int, db: Session = D
 async def add_data_point(
     request: Request, 
     session_id: int, 
-    channel_1: float = Form(...),
-    channel_2: float = Form(...),
-    channel_3: float = Form(...),
-    channel_4: float = Form(...),
+    values: List[float] = Form(...),
     db: Session = Depends(get_db)
 ):
-    data_point = schemas.BCIDataCreate(
-        timestamp=datetime.now(),
-        channel_1=channel_1,
-        channel_2=channel_2,
-        channel_3=channel_3,
-        channel_4=channel_4
-    )
-    crud.create_data_point(db, data_point, session_id)
+    # 시각은 저장 시 정한다: 고정 레이트 세션은 다음 샘플 인덱스, 그 외에는 현재 시각
+    data_point = schemas.BCIDataCreate(values=values)
+    try:
+        await ingest_queue.submit(db, crud.add_data_point, data_point, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IngestionQueueFull as e:
+        raise _queue_full(e)
     return RedirectResponse(url=f"/session-detail/{session_id}", status_code=303)
 
+@router.get("/sessions/{session_id}/data", response_model=schemas.BCIDataPage)
+def read_data_points_page(
+    session_id: int,
+    after_timestamp: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """세션의 데이터 포인트를 (timestamp, id) 커서 기준으로 페이지 단위 조회합니다."""
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    items, next_cursor = crud.get_data_points_page(db, session_id, after_timestamp, after_id, limit)
+    return schemas.BCIDataPage(items=items, next_cursor=next_cursor)
+
+@router.get("/sessions/{session_id}/signal", response_model=schemas.SignalWindow)
+def read_signal_window(
+    session_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    channels: Optional[List[int]] = Query(None, description="1부터 시작하는 채널 번호"),
+    max_points: int = Query(2000, ge=2, le=20000),
+    mode: str = Query("minmax", regex="^(stride|minmax)$"),
+    db: Session = Depends(get_db)
+):
+    """시간 구간의 신호를 최대 max_points개로 다운샘플링해 반환합니다.
+
+    응답 크기는 구간 길이와 관계없이 max_points × 채널 수로 제한됩니다.
+    """
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        timestamps, data = crud.get_session_signal(db, session_id, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _signal_window(session_id, timestamps, data, channels, max_points, mode, start, end)
+
+@router.get("/sessions/{session_id}/live", response_model=schemas.SignalWindow)
+def read_live_signal(
+    session_id: int,
+    seconds: float = Query(10.0, gt=0, le=3600),
+    channels: Optional[List[int]] = Query(None, description="1부터 시작하는 채널 번호"),
+    max_points: int = Query(2000, ge=2, le=20000),
+    mode: str = Query("minmax", regex="^(stride|minmax)$"),
+    db: Session = Depends(get_db)
+):
+    """세션의 최근 seconds초 신호를 다운샘플링해 반환합니다.
+
+    라이브 버퍼에 있으면 DB를 읽지 않고 메모리에서 응답합니다(source="live").
+    버퍼가 없으면(서버 재시작, 종료된 세션 등) DB에서 같은 구간을 읽습니다.
+    """
+    buffer = live_buffer.live_buffers.get(session_id)
+    if buffer is not None:
+        # window는 잠금 안에서 구간만 복사하므로 응답을 만드는 동안 수집 스레드가 덮어써도 안전하다
+        timestamps, data = buffer.window(seconds)
+        if len(timestamps):
+            return _signal_window(session_id, timestamps, data, channels, max_points, mode, source="live")
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    stats = crud.get_channel_stats(db, session_id)
+    if not stats:
+        return _signal_window(session_id, np.array([], dtype="datetime64[us]"), np.empty((0, 0)), channels, max_points, mode)
+    end = stats[0].last_timestamp
+    start = end - timedelta(seconds=seconds)
+    try:
+        timestamps, data = crud.get_session_signal(db, session_id, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _signal_window(session_id, timestamps, data, channels, max_points, mode, start, end)
+
+@router.get("/sessions/{session_id}/live/events")
+async def stream_live_signal(
+    request: Request,
+    session_id: int,
+    cursor: Optional[int] = Query(None, ge=0, description="이전 이벤트의 id. 없으면 지금부터 전송"),
+    channels: Optional[List[int]] = Query(None, description="1부터 시작하는 채널 번호"),
+    max_points: int = Query(500, ge=2, le=20000, description="이벤트 하나에 담을 최대 포인트 수"),
+    mode: str = Query("minmax", regex="^(stride|minmax)$"),
+    filtered: bool = Query(False, description="세션 필터 구성(대역 통과 + 노치)으로 인과적 전처리한 값을 전송"),
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """라이브 버퍼에 새로 커밋된 샘플만 Server-Sent Events로 전송합니다.
+
+    각 이벤트는 직전 이벤트 이후의 샘플을 max_points개 이하로 줄인 SignalWindow이며,
+    이벤트 id가 다음 커서입니다. 브라우저 EventSource가 재연결할 때 보내는
+    Last-Event-ID를 커서로 사용하므로 끊겼던 구간부터 이어서 받습니다.
+
+    filtered이면 연결마다 필터 상태를 유지하며 새 샘플만 필터링합니다 (이벤트당 O(새 샘플)).
+    샘플이 끊기면 필터를 다시 시작합니다. sampling_rate가 없는 세션은 filtered를 쓸 수 없습니다.
+    """
+    session = crud.get_session(db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    n_channels = len(session.channel_labels)
+    # 스트림 동안 커넥션을 붙잡지 않도록 검증이 끝나면 바로 반환한다
+    db.close()
+    if channels and any(c < 1 or c > n_channels for c in channels):
+        raise HTTPException(status_code=400, detail=f"Channels must be between 1 and {n_channels}")
+    if filtered:
+        # 추정한 레이트로는 스트림 도중에 필터 설계가 실패할 수 있으므로 미리 거부한다
+        if not session.sampling_rate:
+            raise HTTPException(status_code=400, detail="Filtered live events require a session sampling_rate")
+        try:
+            analysis.streaming_preprocessor(session, dtype=live_buffer.SIGNAL_DTYPE)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    live = live_buffer.LiveCursor(session_id, last_event_id if last_event_id is not None else cursor)
+    poll_interval = settings.LIVE_EVENTS_POLL_MS / 1000
+    keepalive = settings.LIVE_EVENTS_KEEPALIVE_SECONDS
+
+    preprocessor = None
+
+    def preprocess(data: np.ndarray) -> np.ndarray:
+        nonlocal preprocessor
+        if preprocessor is None or not live.contiguous:
+            preprocessor = analysis.streaming_preprocessor(session, dtype=live_buffer.SIGNAL_DTYPE)
+        return preprocessor.process(data)
+
+    async def events():
+        idle_since = time.monotonic()
+        yield "retry: 1000\n\n"
+        while not await request.is_disconnected():
+            update = live.poll()
+            if update is not None:
+                timestamps, data = update
+                if filtered:
+                    data = preprocess(data)
+                window = _signal_window(session_id, timestamps, data, channels, max_points, mode, source="live")
+                yield f"id: {live.cursor}\nevent: samples\ndata: {window.json()}\n\n"
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= keepalive:
+                yield ": keepalive\n\n"
+                idle_since = time.monotonic()
+            await asyncio.sleep(poll_interval)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _signal_window(
+    session_id: int,
+    timestamps: np.ndarray,
+    data: np.ndarray,
+    channels: Optional[List[int]],
+    max_points: int,
+    mode: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: str = "db"
+) -> schemas.SignalWindow:
+    n_channels = data.shape[1] if data.ndim == 2 else 0
+    selected = channels or list(range(1, n_channels + 1))
+    if len(timestamps) and any(c < 1 or c > n_channels for c in selected):
+        raise HTTPException(status_code=400, detail=f"Channels must be between 1 and {n_channels}")
+    if len(timestamps):
+        data = data[:, [c - 1 for c in selected]]
+    out_ts, out_data = decimate(timestamps, data, max_points, mode)
+    return schemas.SignalWindow(
+        session_id=session_id,
+        start_time=start,
+        end_time=end,
+        channels=selected,
+        mode=mode,
+        source_samples=len(timestamps),
+        timestamps=out_ts.astype("datetime64[us]").tolist(),
+        data=np.asarray(out_data, dtype=np.float64).T.tolist(),
+        source=source
+    )
+
+@router.get("/sessions/{session_id}/overview", response_model=schemas.SignalOverview)
+def read_signal_overview(
+    session_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    width: int = Query(800, ge=10, le=10000, description="그릴 픽셀 폭"),
+    channels: Optional[List[int]] = Query(None, description="1부터 시작하는 채널 번호"),
+    db: Session = Depends(get_db)
+):
+    """요청한 시간 범위와 픽셀 폭에 맞는 피라미드 레벨의 min/max/mean을 반환합니다.
+
+    구간 수는 항상 width 이하이므로 축소된 화면일수록 읽는 행이 적습니다.
+    범위가 가장 세밀한 레벨보다도 좁으면 원시 샘플을 min/max로 다운샘플링합니다.
+    """
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    if start is None or end is None:
+        stats = crud.get_channel_stats(db, session_id)
+        if not stats:
+            return schemas.SignalOverview(session_id=session_id, level=0, channels=[], timestamps=[], min=[], max=[], mean=[])
+        start = start or stats[0].first_timestamp
+        end = end or stats[0].last_timestamp
+    span_us = max(int((end - start).total_seconds() * 1e6), 1)
+    level = pyramid.choose_level(span_us, width)
+
+    if level == 0 and span_us / pyramid.bucket_width_us(0) < width / 2:
+        timestamps, data = crud.get_session_signal(db, session_id, start, end)
+        timestamps, data = decimate(timestamps, data, 2 * width, "minmax")
+        data = np.asarray(data, dtype=np.float64)
+        mins = maxs = means = data
+        level, bucket_seconds = -1, None
+    else:
+        # 가장 거친 레벨로도 width를 넘으면 이웃 구간을 합쳐 width 이하로 맞춘다
+        start_us = int(np.datetime64(start, "us").astype(np.int64))
+        group = pyramid.group_size(start_us, start_us + span_us, level, width)
+        timestamps, mins, maxs, means = crud.get_pyramid_buckets(db, session_id, level, start, end, group)
+        bucket_seconds = pyramid.bucket_width_us(level) * group / 1e6
+
+    n_channels = mins.shape[1] if len(timestamps) else 0
+    selected = channels or list(range(1, n_channels + 1))
+    if len(timestamps) and any(c < 1 or c > n_channels for c in selected):
+        raise HTTPException(status_code=400, detail=f"Channels must be between 1 and {n_channels}")
+    columns = [c - 1 for c in selected]
+    return schemas.SignalOverview(
+        session_id=session_id,
+        level=level,
+        bucket_seconds=bucket_seconds,
+        channels=selected if len(timestamps) else [],
+        timestamps=timestamps.astype("datetime64[us]").tolist(),
+        min=mins[:, columns].T.tolist() if len(timestamps) else [],
+        max=maxs[:, columns].T.tolist() if len(timestamps) else [],
+        mean=means[:, columns].T.tolist() if len(timestamps) else []
+    )
+
+@router.get("/sessions/{session_id}/export")
+def export_session(
+    session_id: int,
+    format: str = Query("csv", regex="^(csv|ndjson|parquet)$"),
+    block_size: int = Query(10000, ge=100, le=100000, description="한 번에 읽고 보낼 샘플 수"),
+    db: Session = Depends(get_db)
+):
+    """세션 전체 신호를 시간순으로 스트리밍합니다.
+
+    서버 측 커서로 block_size개씩 읽어 바로 인코딩해 보내므로, 세션 길이와 관계없이
+    메모리 사용량이 일정하고 첫 바이트가 곧바로 전송됩니다.
+    """
+    session = crud.get_session(db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    media_type, extension, encode = EXPORT_FORMATS[format]
+    blocks = crud.iter_session_blocks(db, session_id, block_size)
+    return StreamingResponse(
+        encode(session.channel_labels, blocks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="session_{session_id}.{extension}"'}
+    )
+
+@router.get("/sessions/{session_id}/stats", response_model=List[schemas.ChannelSummary])
+def read_channel_stats(session_id: int, db: Session = Depends(get_db)):
+    """세션의 채널별 요약 통계(개수, 평균, 표준편차, 최소/최대, 시간 범위)를 반환합니다."""
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return crud.summarize_channel_stats(crud.get_channel_stats(db, session_id))
+
+@router.get("/sessions/{session_id}/analysis", response_model=schemas.AnalysisResult)
+def read_latest_analysis(session_id: int, db: Session = Depends(get_db)):
+    """배치 분석이 저장한 세션의 가장 최근 분석 결과를 반환합니다."""
+    if not crud.get_session(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    result = crud.get_latest_analysis_result(db, session_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No analysis result for this session")
+    return result
+
+@router.post("/analysis/batch", status_code=202)
+def start_batch_analysis(request: schemas.BatchAnalysisRequest):
+    """세션들을 프로세스 풀에서 다시 분석하는 배치 실행을 시작하고 run_id를 반환합니다."""
+    run_id = batch_analysis.start_batch_analysis(SessionLocal, request.session_ids, request.workers, request.mode)
+    return batch_analysis.get_batch_analysis(run_id)
+
+@router.get("/analysis/batch/{run_id}")
+def read_batch_analysis(run_id: str):
+    """배치 실행의 진행 상황(완료/전체/실패 수)과, 끝났으면 요약과 실패 사유를 반환합니다."""
+    state = batch_analysis.get_batch_analysis(run_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Batch analysis run not found")
+    return state
+
+@router.post("/sessions/{session_id}/data/bulk", response_model=schemas.BulkInsertResult)
+async def add_data_points_bulk(
+    session_id: int,
+    batch: schemas.BCIDataBulkCreate,
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
+):
+    if not await crud_async.get_session(async_db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    start = time.perf_counter()
+    try:
+        inserted = await ingest_queue.submit(db, crud.add_data_points_bulk, batch.data_points, session_id, samples=len(batch.data_points))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IngestionQueueFull as e:
+        raise _queue_full(e)
+    latency = time.perf_counter() - start
+    observe_batch("bulk", inserted, latency)
+    logger.info(f"Inserted {inserted} data points into session {session_id} in {latency * 1000:.1f} ms")
+    return schemas.BulkInsertResult(session_id=session_id, inserted=inserted, latency_ms=latency * 1000)
+
+@router.post("/sessions/{session_id}/signal", response_model=schemas.SignalIngestResult)
+async def upload_signal(
+    request: Request,
+    session_id: int,
+    sampling_rate: Optional[float] = None,
+    start_time: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
+):
+    """바이너리 신호 블록(float32 프레임, .npy, Arrow IPC)을 청크 하나로 저장합니다.
+
+    본문에 샘플링 레이트나 시작 시각이 없으면 쿼리 파라미터 값을, 그것도 없으면
+    세션의 샘플링 레이트를 사용합니다.
+    """
+    session = await crud_async.get_session(async_db, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    body = await request.body()
+    try:
+        decoded = decode_signal(body, request.headers.get("content-type"))
+    except UnsupportedFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except SignalDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rate = decoded.sampling_rate if decoded.sampling_rate is not None else sampling_rate or session.sampling_rate
+    if not rate or rate <= 0:
+        raise HTTPException(status_code=400, detail="A positive sampling_rate is required")
+    start = decoded.start_time or start_time
+
+    t0 = time.perf_counter()
+    try:
+        chunk = await ingest_queue.submit(db, crud.add_signal_chunk, session_id, decoded.data, start, rate, samples=len(decoded.data))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IngestionQueueFull as e:
+        raise _queue_full(e)
+    latency = time.perf_counter() - t0
+    observe_batch("binary", chunk.sample_count, latency)
+    return schemas.SignalIngestResult(
+        session_id=session_id,
+        chunk_id=chunk.id,
+        start_time=chunk.start_time,
+        sample_count=chunk.sample_count,
+        channel_count=chunk.channel_count,
+        latency_ms=latency * 1000
+    )
+
+@router.websocket("/sessions/{session_id}/stream")
+async def stream_signal(
+    websocket: WebSocket,
+    session_id: int,
+    sampling_rate: Optional[float] = None,
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
+):
+    """실시간 장치용 WebSocket 수집. 프레임을 모아 저장하고 시퀀스 번호로 ack합니다.
+
+    메시지 형식은 app/ingestion/stream.py를 참고하세요.
+    """
+    session = await crud_async.get_session(async_db, session_id)
+    if not session:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await StreamIngestor(
+        websocket,
+        db,
+        session_id,
+        sampling_rate=sampling_rate or session.sampling_rate,
+        max_pending=settings.WS_MAX_PENDING_FRAMES,
+        max_batch_samples=settings.WS_MAX_BATCH_SAMPLES,
+        flush_interval=settings.WS_FLUSH_INTERVAL_MS / 1000
+    ).run()
+
+@router.get("/ingestion/stats")
+def read_ingestion_stats():
+    """저장소 모드, 수집 큐와 단일 writer의 큐 깊이, 지연 시간을 반환합니다."""
+    active_writer = writer.get_writer()
+    active_queue = ingest_queue.get_ingestion_queue()
+    return {
+        "storage_mode": settings.DB_STORAGE_MODE,
+        "queue": active_queue.stats() if active_queue else None,
+        "writer": active_writer.stats() if active_writer else None
+    }
+
+def _queue_full(e: IngestionQueueFull) -> HTTPException:
+    # 클라이언트가 잠시 뒤 다시 보내도록 Retry-After를 알려준다
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(max(int(e.retry_after + 0.999), 1))}
+    )
+
 @router.post("/{data_id}/delete", response_class=HTMLResponse)
 async def delete_data_point(request: Request, data_id: int, db: Session = Depends(get_db)):
     deleted = crud.delete_data_point(db, data_id)
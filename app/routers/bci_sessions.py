@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
-from .. import crud, models, schemas
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import crud, crud_async, models, schemas
+from ..config import settings
+from ..database import get_async_db, get_db
+from ..ingestion import writer
+from ..maintenance import retention
 from fastapi.templating import Jinja2Templates
 from datetime import datetime
 from typing import List, Optional
-from app import crud
 
 router = APIRouter()
 templates = Jinja2Templates(directory="/code/templates")
@@ -18,20 +22,57 @@ class SessionForm:
         self.session_name: Optional[str] = None
         self.date_recorded: Optional[str] = None
         self.subject_id: Optional[str] = None
+        self.storage_mode: str = "db"
+        self.channel_names: Optional[List[str]] = None
+        self.sampling_rate: Optional[float] = None
+        self.line_frequency: Optional[float] = None
+        self.passband_low: Optional[float] = None
+        self.passband_high: Optional[float] = None
 
     async def load_data(self):
         form = await self.request.form()
         self.session_name = form.get("session_name")
         self.date_recorded = form.get("date_recorded")
         self.subject_id = form.get("subject_id")
+        self.storage_mode = form.get("storage_mode") or "db"
+        # 쉼표로 구분한 채널 이름 (예: "Fp1, Fp2, C3, C4")
+        names = [name.strip() for name in (form.get("channel_names") or "").split(",") if name.strip()]
+        self.channel_names = names or None
+        rate = form.get("sampling_rate")
+        try:
+            self.sampling_rate = float(rate) if rate else None
+        except ValueError:
+            self.errors.append("Sampling rate must be a number")
+        # 분석 필터 구성: 비워 두면 설정의 기본값
+        try:
+            for field in ("line_frequency", "passband_low", "passband_high"):
+                value = form.get(field)
+                setattr(self, field, float(value) if value else None)
+        except ValueError:
+            self.errors.append("Filter frequencies must be numbers")
 
     def is_valid(self):
         if not self.session_name or not self.date_recorded or not self.subject_id:
             self.errors.append("All fields are required")
+        if self.storage_mode not in ("db", "file"):
+            self.errors.append("Invalid storage mode")
+        if self.channel_names and len(set(self.channel_names)) != len(self.channel_names):
+            self.errors.append("Channel names must be unique")
+        if self.sampling_rate is not None and self.sampling_rate <= 0:
+            self.errors.append("Sampling rate must be positive")
+        if any(v is not None and v <= 0 for v in (self.line_frequency, self.passband_low, self.passband_high)):
+            self.errors.append("Filter frequencies must be positive")
+        if self.passband_low is not None and self.passband_high is not None and self.passband_low >= self.passband_high:
+            self.errors.append("Passband low must be lower than passband high")
         if not self.errors:
             return True
         return False
 
+@router.get("/sessions/", response_model=List[schemas.BCISessionSummary])
+async def read_session_summaries(skip: int = 0, limit: int = Query(100, ge=1, le=1000), db: AsyncSession = Depends(get_async_db)):
+    """세션 목록을 샘플 수, 기간, 마지막 샘플 시각과 함께 쿼리 한 번으로 반환합니다."""
+    return await crud_async.get_session_summaries(db, skip, limit)
+
 @router.get("/create", response_class=HTMLResponse)
 async def create_session_form(request: Request):
     return templates.TemplateResponse("create_session.html", {"request": request, "form": SessionForm(request)})
@@ -44,23 +85,38 @@ async def create_session(request: Request, db: Session = Depends(get_db)):
         session = schemas.BCISessionCreate(
             session_name=form.session_name,
             date_recorded=datetime.strptime(form.date_recorded, "%Y-%m-%d"),
-            subject_id=form.subject_id
+            subject_id=form.subject_id,
+            storage_mode=form.storage_mode,
+            channel_names=form.channel_names,
+            sampling_rate=form.sampling_rate,
+            line_frequency=form.line_frequency,
+            passband_low=form.passband_low,
+            passband_high=form.passband_high
         )
-        crud.create_session(db, session)
+        # SQLite 쓰기는 writer 한 곳에서만 하므로 세션 생성도 writer를 거친다
+        await writer.write_async(db, crud.add_session, session)
         return RedirectResponse(url="/session-list", status_code=303)
     return templates.TemplateResponse("create_session.html", {"request": request, "form": form})
 
 @router.get("/{session_id}", response_class=HTMLResponse)
-async def session_detail(request: Request, session_id: int, db: Session = Depends(get_db)):
-    session = crud.get_session(db, session_id)
+async def session_detail(request: Request, session_id: int, after_timestamp: Optional[datetime] = None, after_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    data_points = crud.get_data_points(db, session_id)
-    return templates.TemplateResponse("session_detail.html", {"request": request, "session": session, "data_points": data_points})
+    data_points, next_cursor = await crud_async.get_data_points_page(db, session_id, after_timestamp, after_id)
+    # 청크로 저장된 샘플(파일/고정 레이트 세션, 신호 업로드)은 표 대신 신호 조회/내보내기로 안내한다
+    signal_samples = await crud_async.get_signal_sample_count(db, session_id)
+    return templates.TemplateResponse("session_detail.html", {
+        "request": request, "session": session, "data_points": data_points, "next_cursor": next_cursor, "signal_samples": signal_samples
+    })
 
 @router.post("/{session_id}/delete", response_class=HTMLResponse)
-async def delete_session(request: Request, session_id: int, db: Session = Depends(get_db)):
-    deleted = crud.delete_session(db, session_id)
-    if not deleted:
+async def delete_session(request: Request, session_id: int, db: Session = Depends(get_db), async_db: AsyncSession = Depends(get_async_db)):
+    session = await crud_async.get_session(async_db, session_id)
+    if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    # 보존 정책과 같이 writer를 거쳐 나눠 지우므로 큰 세션도 쓰기 잠금을 오래 잡지 않는다
+    await run_in_threadpool(
+        retention.delete_session, db, session_id, session.signal_path, session.archive_path, settings.RETENTION_DELETE_CHUNK
+    )
     return RedirectResponse(url="/sessions", status_code=303)
@@ -1,3 +1,28 @@
 """
 데이터 검증을 위한 스키마 모듈입니다.
 """
+
+from .bci import (
+    BCIDataBase,
+    BCIDataCreate,
+    BCIData,
+    DataPointCursor,
+    BCIDataPage,
+    BCIDataBulkCreate,
+    BulkInsertResult,
+    SignalIngestResult,
+    SignalWindow,
+    SignalOverview,
+    ChannelSummary,
+    AnalysisResult,
+    BatchAnalysisRequest,
+    BCISessionBase,
+    BCISessionCreate,
+    BCISession,
+    BCISessionSummary,
+    UserBase,
+    UserCreate,
+    User,
+    Token,
+    TokenData,
+)
@@ -0,0 +1,215 @@
+from pydantic import BaseModel, validator, root_validator
+from datetime import datetime
+from typing import List, Optional
+
+class BCIDataBase(BaseModel):
+    timestamp: datetime
+    values: List[float]  # 채널 순서대로의 값
+
+class BCIDataCreate(BCIDataBase):
+    # 생략하면 고정 레이트 세션에서는 다음 샘플 인덱스, 그 외 세션에서는 현재 시각으로 기록
+    timestamp: Optional[datetime] = None
+
+    @root_validator(pre=True)
+    def legacy_channels_to_values(cls, fields):
+        # 이전 형식(channel_1, channel_2, ...) 요청도 values로 바꿔 받는다
+        if "values" in fields or "channel_1" not in fields:
+            return fields
+        fields = dict(fields)
+        values = []
+        while f"channel_{len(values) + 1}" in fields:
+            values.append(fields.pop(f"channel_{len(values) + 1}"))
+        fields["values"] = values
+        return fields
+
+    @validator('values')
+    def validate_not_empty(cls, v):
+        if not v:
+            raise ValueError("values must contain at least one channel")
+        return v
+
+class BCIData(BCIDataBase):
+    id: int
+    session_id: int
+
+    class Config:
+        orm_mode = True
+
+class DataPointCursor(BaseModel):
+    after_timestamp: datetime
+    after_id: int
+
+class BCIDataPage(BaseModel):
+    items: List[BCIData]
+    next_cursor: Optional[DataPointCursor] = None
+
+class BCIDataBulkCreate(BaseModel):
+    data_points: List[BCIDataCreate]
+
+    @validator('data_points')
+    def validate_not_empty(cls, v):
+        if not v:
+            raise ValueError("data_points must not be empty")
+        return v
+
+class BulkInsertResult(BaseModel):
+    session_id: int
+    inserted: int
+    latency_ms: float
+
+class SignalIngestResult(BaseModel):
+    session_id: int
+    chunk_id: int
+    start_time: datetime
+    sample_count: int
+    channel_count: int
+    latency_ms: float
+
+class SignalWindow(BaseModel):
+    session_id: int
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    channels: List[int]
+    mode: str
+    source_samples: int
+    timestamps: List[datetime]
+    data: List[List[float]]  # [채널][포인트]
+    source: str = "db"  # "live"이면 메모리 링 버퍼에서 읽은 결과
+
+class SignalOverview(BaseModel):
+    session_id: int
+    level: int  # -1이면 원시 샘플을 다운샘플링한 결과
+    bucket_seconds: Optional[float] = None
+    channels: List[int]
+    timestamps: List[datetime]
+    min: List[List[float]]  # [채널][구간]
+    max: List[List[float]]
+    mean: List[List[float]]
+
+class ChannelSummary(BaseModel):
+    channel: int  # 1부터 시작
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+
+class AnalysisResult(BaseModel):
+    session_id: int
+    run_id: str
+    mode: str
+    status: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    duration_seconds: float
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class BatchAnalysisRequest(BaseModel):
+    session_ids: Optional[List[int]] = None  # 생략하면 모든 세션
+    workers: Optional[int] = None
+    mode: str = "chunked"
+
+    @validator('mode')
+    def validate_mode(cls, v):
+        if v not in ("chunked", "full"):
+            raise ValueError("mode must be 'chunked' or 'full'")
+        return v
+
+    @validator('workers')
+    def validate_workers(cls, v):
+        if v is not None and v < 1:
+            raise ValueError("workers must be positive")
+        return v
+
+class BCISessionBase(BaseModel):
+    session_name: str
+    date_recorded: datetime
+    subject_id: str
+
+class BCISessionCreate(BCISessionBase):
+    storage_mode: str = "db"
+    channel_names: Optional[List[str]] = None
+    sampling_rate: Optional[float] = None  # 지정하면 샘플을 인덱스로 저장
+    start_time: Optional[datetime] = None  # 생략하면 첫 샘플 시각
+    # 분석 전처리 필터 (생략하면 설정의 기본값)
+    line_frequency: Optional[float] = None  # 전원 잡음 주파수 (50 또는 60 Hz)
+    passband_low: Optional[float] = None
+    passband_high: Optional[float] = None
+
+    @validator('storage_mode')
+    def validate_storage_mode(cls, v):
+        if v not in ("db", "file"):
+            raise ValueError("storage_mode must be 'db' or 'file'")
+        return v
+
+    @validator('channel_names')
+    def validate_channel_names(cls, v):
+        if v is not None and (not v or len(set(v)) != len(v)):
+            raise ValueError("channel_names must be a non-empty list of unique names")
+        return v
+
+    @validator('sampling_rate')
+    def validate_sampling_rate(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("sampling_rate must be positive")
+        return v
+
+    @validator('line_frequency', 'passband_low', 'passband_high')
+    def validate_filter_frequency(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("filter frequencies must be positive")
+        return v
+
+    @validator('passband_high')
+    def validate_passband(cls, v, values):
+        low = values.get('passband_low')
+        if v is not None and low is not None and low >= v:
+            raise ValueError("passband_low must be lower than passband_high")
+        return v
+
+class BCISession(BCISessionBase):
+    id: int
+    channel_count: Optional[int] = None
+    channel_names: Optional[List[str]] = None
+    archived_at: Optional[datetime] = None
+    sampling_rate: Optional[float] = None
+    start_time: Optional[datetime] = None
+    line_frequency: Optional[float] = None
+    passband_low: Optional[float] = None
+    passband_high: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class BCISessionSummary(BCISession):
+    # 데이터 포인트 목록 대신 집계 값만 담는다. 샘플은 /sessions/{id}/data로 페이지 단위 조회
+    sample_count: int = 0
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None  # 마지막 샘플 시각 (최근 활동)
+    duration_seconds: Optional[float] = None
+
+class UserBase(BaseModel):
+    username: str
+    email: str
+
+class UserCreate(UserBase):
+    password: str
+
+class User(UserBase):
+    id: int
+    is_active: bool
+
+    class Config:
+        orm_mode = True
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+class TokenData(BaseModel):
+    username: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+신호 데이터를 데이터베이스 밖에 저장하기 위한 패키지입니다.
+"""
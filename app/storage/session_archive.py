@@ -0,0 +1,107 @@
+"""
+닫힌 세션을 Parquet 파일로 보관하는 모듈입니다.
+
+파일 하나가 세션 하나이며, "timestamp" 컬럼(timestamp[us]) 뒤에 채널별 float32
+컬럼이 채널 순서대로 옵니다. 청크나 데이터 포인트 블록 하나가 row group 하나가
+되고 블록은 시간순으로 기록되므로, 시간 구간 조회는 row group 통계로 필요 없는
+블록을 건너뜁니다.
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..config import settings
+
+SIGNAL_DTYPE = np.dtype("<f4")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Session archival requires pyarrow")
+    return pyarrow
+
+def session_archive_path(session_id: int) -> Path:
+    """세션의 보관 파일 경로를 반환합니다."""
+    return Path(settings.ARCHIVE_STORAGE_DIR) / f"session_{session_id}.parquet"
+
+def write_session_archive(
+    path: Union[str, Path],
+    channel_names: List[str],
+    blocks: Iterable[Tuple[np.ndarray, np.ndarray]]
+) -> int:
+    """(timestamps, data) 블록들을 Parquet 파일로 씁니다. 블록 하나씩만 메모리에 올립니다.
+
+    임시 파일에 쓴 뒤 fsync 후 이름을 바꾸므로, 중간에 실패해도 불완전한 파일이 남지 않습니다.
+
+    Returns:
+        기록한 샘플 수
+    """
+    pa = _pyarrow()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    schema = pa.schema(
+        [pa.field("timestamp", pa.timestamp("us"))] + [pa.field(name, pa.float32()) for name in channel_names]
+    )
+    tmp_path = path.with_suffix(".parquet.tmp")
+    written = 0
+    with pa.parquet.ParquetWriter(tmp_path, schema, compression=settings.ARCHIVE_COMPRESSION) as out:
+        for timestamps, data in blocks:
+            if len(timestamps) == 0:
+                continue
+            data = np.asarray(data, dtype=SIGNAL_DTYPE)
+            if data.shape[1] != len(channel_names):
+                raise ValueError(f"Expected {len(channel_names)} channels, got {data.shape[1]}")
+            columns = [pa.array(timestamps.astype("datetime64[us]"))] + [pa.array(data[:, i]) for i in range(data.shape[1])]
+            out.write_table(pa.Table.from_arrays(columns, schema=schema))
+            written += len(timestamps)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return written
+
+def read_session_archive(
+    path: Union[str, Path],
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """보관 파일의 [start, end] 구간을 시간순 (timestamps, data) 배열로 읽습니다."""
+    pa = _pyarrow()
+    filters = []
+    if start_time is not None:
+        filters.append(("timestamp", ">=", start_time))
+    if end_time is not None:
+        filters.append(("timestamp", "<=", end_time))
+    table = pa.parquet.read_table(path, filters=filters or None)
+    timestamps = table.column(0).to_numpy().astype("datetime64[us]")
+    data = np.empty((table.num_rows, table.num_columns - 1), dtype=SIGNAL_DTYPE)
+    for i in range(1, table.num_columns):
+        data[:, i - 1] = table.column(i).to_numpy()
+    # 보관 작업은 시간순으로 기록하지만, 순서가 어긋난 파일도 정렬해서 돌려준다
+    if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, data = timestamps[order], data[order]
+    return timestamps, data
+
+def iter_session_archive(path: Union[str, Path], batch_size: int = 50000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """보관 파일을 batch_size개씩 (timestamps, data) 배열로 돌려줍니다."""
+    pa = _pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        timestamps = batch.column(0).to_numpy().astype("datetime64[us]")
+        data = np.empty((batch.num_rows, batch.num_columns - 1), dtype=SIGNAL_DTYPE)
+        for i in range(1, batch.num_columns):
+            data[:, i - 1] = batch.column(i).to_numpy()
+        yield timestamps, data
+
+def delete_session_archive(path: Union[str, Path]) -> None:
+    """보관 파일을 삭제합니다. 파일이 없으면 무시합니다."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,121 @@
+"""
+세션별 memmap 신호 파일을 다루는 모듈입니다.
+
+파일은 헤더 없는 little-endian float32 (samples, channels) 행 우선 배열이며,
+채널 수와 각 청크의 바이트 오프셋은 데이터베이스가 보관합니다.
+추가 쓰기는 파일 끝에 이어 붙이고, 읽기는 np.memmap 슬라이스로 수행하므로
+세션 전체를 메모리에 올리지 않고 페이지 캐시를 여러 워커가 공유합니다.
+
+파일 추가는 데이터베이스 트랜잭션보다 먼저 일어나므로, track_append로 세션(db.info)에
+기록해 두었다가 트랜잭션이 커밋되지 않고 끝나면 추가한 바이트를 잘라 냅니다.
+"""
+
+import fcntl
+import os
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+
+SIGNAL_DTYPE = np.dtype("<f4")
+
+_APPENDS_KEY = "signal_file_appends"
+
+def session_signal_path(session_id: int) -> Path:
+    """세션의 신호 파일 경로를 반환합니다."""
+    return Path(settings.SIGNAL_STORAGE_DIR) / f"session_{session_id}.f32"
+
+def append_samples(path: Union[str, Path], samples: np.ndarray) -> int:
+    """샘플 블록을 파일 끝에 추가하고, 블록이 시작하는 바이트 오프셋을 반환합니다.
+
+    Args:
+        path: 신호 파일 경로
+        samples: (samples, channels) 배열
+
+    Returns:
+        추가된 블록의 바이트 오프셋
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    block = np.ascontiguousarray(samples, dtype=SIGNAL_DTYPE)
+    with open(path, "ab") as f:
+        # 여러 워커가 같은 파일에 추가해도 오프셋이 겹치지 않도록 파일 잠금 후 끝 위치를 읽는다
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(block.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    return offset
+
+def truncate_append(path: Union[str, Path], offset: int, end: int) -> bool:
+    """append_samples가 [offset, end)에 쓴 블록을 잘라 냅니다.
+
+    그 뒤에 다른 쓰기가 이어 붙었으면(파일 크기가 end가 아니면) 건드리지 않고 False를
+    반환합니다. 이 경우 남은 바이트는 어떤 청크도 가리키지 않을 뿐 읽기에는 영향이 없습니다.
+    """
+    try:
+        with open(path, "r+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if f.seek(0, os.SEEK_END) != end:
+                    return False
+                f.truncate(offset)
+                os.fsync(f.fileno())
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except FileNotFoundError:
+        return False
+    return True
+
+def track_append(db: Session, path: Union[str, Path], offset: int, end: int) -> None:
+    """트랜잭션이 커밋되지 않으면 되돌릴 파일 추가를 세션에 기록합니다."""
+    appends: List[Tuple[str, int, int]] = db.info.setdefault(_APPENDS_KEY, [])
+    appends.append((str(path), offset, end))
+
+@event.listens_for(Session, "after_commit")
+def _keep_appends(db: Session) -> None:
+    db.info.pop(_APPENDS_KEY, None)
+
+@event.listens_for(Session, "after_transaction_end")
+def _undo_appends(db: Session, transaction) -> None:
+    # 커밋되지 않고 끝난 최상위 트랜잭션(롤백, close)의 추가만 되돌린다
+    if transaction.parent is not None:
+        return
+    for path, offset, end in reversed(db.info.pop(_APPENDS_KEY, [])):
+        truncate_append(path, offset, end)
+
+def read_samples(path: Union[str, Path], channel_count: int, byte_offset: int, sample_count: int) -> np.ndarray:
+    """파일의 일부를 memmap 뷰로 반환합니다. 데이터는 접근할 때 페이지 단위로 읽힙니다.
+
+    Args:
+        path: 신호 파일 경로
+        channel_count: 채널 수
+        byte_offset: 읽기 시작할 바이트 오프셋
+        sample_count: 읽을 샘플 수
+
+    Returns:
+        (sample_count, channel_count) 읽기 전용 memmap
+    """
+    if sample_count == 0:
+        return np.empty((0, channel_count), dtype=SIGNAL_DTYPE)
+    return np.memmap(
+        path,
+        dtype=SIGNAL_DTYPE,
+        mode="r",
+        offset=byte_offset,
+        shape=(sample_count, channel_count)
+    )
+
+def delete_signal_file(path: Union[str, Path]) -> None:
+    """신호 파일을 삭제합니다. 파일이 없으면 무시합니다."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
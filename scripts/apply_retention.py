@@ -0,0 +1,54 @@
+"""
+보존 정책을 한 번 실행하는 스크립트입니다.
+
+사용 예:
+    python scripts/apply_retention.py --session-days 365 --raw-data-days 30
+    python scripts/apply_retention.py --convert-auto-vacuum   # 기존 DB를 INCREMENTAL 모드로 전환 (전체 VACUUM)
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal, engine, upgrade_schema
+from app.maintenance import retention
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply session retention policies")
+    parser.add_argument("--session-days", type=int, default=settings.RETENTION_SESSION_DAYS, help="이보다 오래된 세션 삭제")
+    parser.add_argument("--raw-data-days", type=int, default=settings.RETENTION_RAW_DATA_DAYS, help="이보다 오래된 세션의 원시 데이터 삭제")
+    parser.add_argument("--chunk-size", type=int, default=settings.RETENTION_DELETE_CHUNK)
+    parser.add_argument("--vacuum-pages", type=int, default=settings.RETENTION_VACUUM_PAGES)
+    parser.add_argument("--convert-auto-vacuum", action="store_true", help="auto_vacuum 설정을 기존 DB 파일에 적용 (잠금이 오래 걸림)")
+    args = parser.parse_args()
+
+    upgrade_schema(engine)
+    if args.convert_auto_vacuum:
+        with engine.connect() as conn:
+            conn.execute(text("VACUUM"))
+        logger.info(f"Database converted to auto_vacuum={settings.SQLITE_AUTO_VACUUM}")
+
+    db = SessionLocal()
+    try:
+        result = retention.run_retention(
+            db,
+            session_days=args.session_days,
+            raw_data_days=args.raw_data_days,
+            chunk_size=args.chunk_size,
+            vacuum_pages=args.vacuum_pages
+        )
+        logger.info(f"Retention finished: {result}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+닫힌 세션을 Parquet 파일로 보관하는 스크립트입니다.
+
+사용 예:
+    python scripts/archive_sessions.py --after-days 14   # 14일보다 오래된 세션 모두
+    python scripts/archive_sessions.py --session-id 12
+"""
+
+import argparse
+import logging
+
+from app.config import settings
+from app.database import SessionLocal, engine, upgrade_schema
+from app.maintenance import archival
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive closed sessions to Parquet")
+    parser.add_argument("--after-days", type=int, default=settings.ARCHIVE_AFTER_DAYS, help="이보다 오래된 세션 보관")
+    parser.add_argument("--session-id", type=int, default=None, help="하나의 세션만 보관")
+    parser.add_argument("--chunk-size", type=int, default=settings.RETENTION_DELETE_CHUNK)
+    args = parser.parse_args()
+    if args.session_id is None and args.after_days is None:
+        parser.error("--after-days or --session-id is required")
+
+    upgrade_schema(engine)
+    db = SessionLocal()
+    try:
+        if args.session_id is not None:
+            written = archival.archive_session(db, args.session_id, args.chunk_size)
+            logger.info(f"Archived session {args.session_id} ({written} samples)")
+        else:
+            result = archival.run_archival(db, args.after_days, chunk_size=args.chunk_size)
+            logger.info(f"Archival finished: {result}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
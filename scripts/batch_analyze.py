@@ -0,0 +1,56 @@
+"""
+여러 세션을 프로세스 풀에서 병렬로 다시 분석하는 스크립트입니다.
+
+결과는 bci_analysis_results 테이블에 run_id와 함께 저장되고, --output을 주면
+JSON Lines 파일에도 기록됩니다. 세션마다 진행 상황과 분석 시간을 출력합니다.
+
+사용 예:
+    python scripts/batch_analyze.py                          # 모든 세션, CPU 수만큼 프로세스
+    python scripts/batch_analyze.py --workers 4 --output results.jsonl
+    python scripts/batch_analyze.py --session-id 12 --session-id 13 --mode full
+"""
+
+import argparse
+import json
+import logging
+
+from app.database import SessionLocal, engine, upgrade_schema
+from app.maintenance import batch_analysis
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-run session analysis across a process pool")
+    parser.add_argument("--session-id", type=int, action="append", default=None, help="분석할 세션 (여러 번 지정 가능, 생략하면 모든 세션)")
+    parser.add_argument("--workers", type=int, default=None, help="worker 프로세스 수 (기본: ANALYSIS_WORKERS 또는 CPU 수)")
+    parser.add_argument("--mode", choices=batch_analysis.ANALYSIS_MODES, default="chunked", help="chunked: 블록 단위(메모리 일정), full: 세션 전체를 메모리에")
+    parser.add_argument("--output", default=None, help="결과를 추가할 JSON Lines 파일")
+    parser.add_argument("--no-store", action="store_true", help="결과를 데이터베이스에 저장하지 않음")
+    args = parser.parse_args()
+
+    def progress(done: int, total: int, outcome: dict) -> None:
+        if outcome["status"] == "ok":
+            logger.info(f"[{done}/{total}] session {outcome['session_id']} analyzed in {outcome['duration_seconds']:.2f}s")
+        else:
+            logger.warning(f"[{done}/{total}] session {outcome['session_id']} failed: {outcome['error']}")
+
+    upgrade_schema(engine)
+    db = SessionLocal()
+    try:
+        report = batch_analysis.run_batch_analysis(
+            db, args.session_id, args.workers, args.mode,
+            store=not args.no_store, output_path=args.output, progress=progress
+        )
+    finally:
+        db.close()
+    print(json.dumps(report.summary(), indent=2))
+    for session_id, error in sorted(report.failures.items()):
+        print(f"session {session_id}: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+가상 EEG 헤드셋으로 수집/조회 경로에 부하를 주고 처리량과 지연 시간을 측정하는 스크립트입니다.
+
+헤드셋마다 세션을 하나 만들고, 1~40 Hz 대역으로 제한된 배경 신호에 알파파(10 Hz)와
+60 Hz 전원 잡음을 더한 신호를 프레임 단위로 전송합니다. 동시에 조회 클라이언트가
+페이지(세션 상세/목록/대시보드)와 신호 조회 API를 호출합니다. 예측 라우터는 app.main에
+마운트되어 있지 않으므로 /api/v1/predict는 --predict를 줄 때만(예측 라우터를 띄운 서버에) 호출합니다.
+
+기본값은 app.main:app을 같은 프로세스에서 ASGI로 직접 호출하므로 서버를 따로 띄울
+필요가 없습니다. --base-url을 주면 이미 실행 중인 서버(localhost 등)에 요청합니다.
+
+사용 예:
+    python scripts/load_generator.py --headsets 8 --channels 32 --rate 500 --duration 30
+    python scripts/load_generator.py --transport bulk --frame-ms 40 --readers 4
+    python scripts/load_generator.py --base-url http://localhost:8000 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from scipy import signal
+
+from app.ingestion.binary_format import encode_frame
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # 요청마다 남기는 로그를 끈다
+
+API = "/api/v1"
+LINE_FREQUENCY = 60.0
+
+class SyntheticHeadset:
+    """연속된 프레임을 만들어 내는 가상 EEG 장치"""
+
+    def __init__(self, channels: int, sampling_rate: float, seed: int):
+        self.channels = channels
+        self.sampling_rate = sampling_rate
+        self.rng = np.random.default_rng(seed)
+        # 배경 신호는 백색 잡음을 1~40 Hz 대역 통과 필터에 통과시켜 만든다 (필터 상태를 이어 씀)
+        high = min(40.0, 0.45 * sampling_rate)
+        self.sos = signal.butter(4, [1.0, high], btype="bandpass", fs=sampling_rate, output="sos")
+        self.zi = np.zeros((self.sos.shape[0], 2, channels))
+        self.alpha_phase = self.rng.uniform(0, 2 * np.pi, channels)
+        self.line_phase = self.rng.uniform(0, 2 * np.pi)
+        self.line_amplitude = self.rng.uniform(5.0, 20.0, channels)  # µV
+        self.samples_sent = 0
+        self.start_time = datetime.now()
+
+    def next_frame(self, samples: int) -> np.ndarray:
+        """다음 samples개 샘플을 (samples, channels) float32 µV 배열로 반환합니다."""
+        t = (self.samples_sent + np.arange(samples))[:, np.newaxis] / self.sampling_rate
+        noise = self.rng.standard_normal((samples, self.channels)) * 30.0
+        background, self.zi = signal.sosfilt(self.sos, noise, axis=0, zi=self.zi)
+        # 알파파는 채널마다 위상이 다르고 진폭이 천천히 변한다
+        alpha = 15.0 * (1 + 0.5 * np.sin(2 * np.pi * 0.1 * t)) * np.sin(2 * np.pi * 10.0 * t + self.alpha_phase)
+        line = self.line_amplitude * np.sin(2 * np.pi * LINE_FREQUENCY * t + self.line_phase)
+        self.samples_sent += samples
+        return (background + alpha + line).astype(np.float32)
+
+    def frame_start(self, samples: int) -> datetime:
+        return self.start_time + timedelta(seconds=(self.samples_sent - samples) / self.sampling_rate)
+
+class Recorder:
+    """작업별 지연 시간과 상태 코드를 모읍니다."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.samples = 0
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.statuses[name][type(e).__name__] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][str(response.status_code)] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        operations = {}
+        for name in sorted(self.statuses):
+            latencies = np.array(self.latencies[name]) * 1000
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+            operations[name] = {
+                "requests": sum(self.statuses[name].values()),
+                "per_second": sum(self.statuses[name].values()) / elapsed,
+                "statuses": dict(self.statuses[name]),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(latencies.max()) if len(latencies) else 0.0,
+            }
+        return {
+            "elapsed_seconds": elapsed,
+            "samples_ingested": self.samples,
+            "samples_per_second": self.samples / elapsed,
+            "operations": operations,
+        }
+
+async def create_session(client: httpx.AsyncClient, recorder: Recorder, channels: int, sampling_rate: float) -> int:
+    name = f"loadgen-{uuid.uuid4().hex[:12]}"
+    form = {
+        "session_name": name,
+        "date_recorded": datetime.now().strftime("%Y-%m-%d"),
+        "subject_id": "loadgen",
+        "channel_names": ",".join(f"ch{i + 1}" for i in range(channels)),
+        "sampling_rate": f"{sampling_rate:g}",
+    }
+    await recorder.call("create_session", client.post(f"{API}/create", data=form))
+    skip = 0
+    while True:
+        response = await client.get(f"{API}/sessions/", params={"skip": skip, "limit": 1000})
+        page = response.json()
+        for session in page:
+            if session["session_name"] == name:
+                return session["id"]
+        if len(page) < 1000:
+            raise RuntimeError(f"Session {name} was not created")
+        skip += 1000
+
+async def run_headset(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    args: argparse.Namespace,
+    index: int,
+    session_ids: List[int],
+    deadline: float
+) -> None:
+    headset = SyntheticHeadset(args.channels, args.rate, seed=args.seed + index)
+    session_id = await create_session(client, recorder, args.channels, args.rate)
+    session_ids.append(session_id)  # 조회 클라이언트가 이 세션을 고를 수 있게 한다
+    frame_samples = max(int(args.rate * args.frame_ms / 1000), 1)
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        data = headset.next_frame(frame_samples)
+        start = headset.frame_start(frame_samples)
+        if args.transport == "binary":
+            request = client.post(
+                f"{API}/sessions/{session_id}/signal",
+                content=encode_frame(data, args.rate, start),
+                headers={"Content-Type": "application/octet-stream"}
+            )
+        else:
+            step = timedelta(seconds=1 / args.rate)
+            points = [
+                {"timestamp": (start + i * step).isoformat(), "values": row.tolist()}
+                for i, row in enumerate(data)
+            ]
+            request = client.post(f"{API}/sessions/{session_id}/data/bulk", json={"data_points": points})
+        response = await recorder.call(f"ingest_{args.transport}", request)
+        if response is not None and response.status_code == 200:
+            recorder.samples += frame_samples
+        elif response is not None and response.status_code == 429:
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        if args.realtime:
+            # 실제 장치처럼 샘플링 레이트에 맞춰 보낸다
+            ahead = headset.samples_sent / args.rate - (time.perf_counter() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+
+PREDICT_PAYLOAD = {
+    "preprocessed": "[1.0e-06, -2.5e-06, 3.1e-06]",
+    "subject_id": 1,
+    "run_id": "run1",
+    "channels": "Fp1,Fp2,C3,C4",
+    "coordsystem": "EEGLAB",
+    "electrodes": "Fp1,Fp2,C3,C4",
+}
+
+async def run_reader(client: httpx.AsyncClient, recorder: Recorder, args: argparse.Namespace, session_ids: List[int], deadline: float) -> None:
+    rng = np.random.default_rng()
+    while time.perf_counter() < deadline:
+        if session_ids:
+            session_id = int(rng.choice(session_ids))
+            await recorder.call("page_session_detail", client.get(f"/session-detail/{session_id}"))
+            await recorder.call("signal_live", client.get(f"{API}/sessions/{session_id}/live", params={"seconds": 5}))
+            await recorder.call("signal_overview", client.get(f"{API}/sessions/{session_id}/overview"))
+        await recorder.call("page_session_list", client.get("/session-list"))
+        await recorder.call("page_dashboard", client.get("/dashboard"))
+        if args.predict:
+            await recorder.call("predict", client.post(f"{API}/predict", json=PREDICT_PAYLOAD))
+        await asyncio.sleep(args.reader_interval)
+
+async def run(args: argparse.Namespace) -> dict:
+    app = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        from app.main import app
+        # ASGITransport는 시작/종료 이벤트를 실행하지 않으므로 직접 실행한다
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen", timeout=args.timeout)
+
+    recorder = Recorder()
+    session_ids: List[int] = []
+    try:
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+
+        headsets = [asyncio.create_task(run_headset(client, recorder, args, i, session_ids, deadline)) for i in range(args.headsets)]
+        readers = [asyncio.create_task(run_reader(client, recorder, args, session_ids, deadline)) for _ in range(args.readers)]
+        await asyncio.gather(*headsets, *readers)
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+
+    report = recorder.report(elapsed)
+    report["config"] = {
+        "headsets": args.headsets, "channels": args.channels, "sampling_rate": args.rate,
+        "frame_ms": args.frame_ms, "transport": args.transport, "readers": args.readers,
+        "realtime": args.realtime, "predict": args.predict, "target": args.base_url or "in-process",
+    }
+    report["session_ids"] = sorted(session_ids)
+    return report
+
+def print_report(report: dict) -> None:
+    config = report["config"]
+    print(
+        f"\n{config['headsets']} headsets x {config['channels']} ch @ {config['sampling_rate']:g} Hz "
+        f"({config['transport']}, {config['frame_ms']} ms frames) -> {config['target']}"
+    )
+    print(f"Ingested {report['samples_ingested']} samples in {report['elapsed_seconds']:.1f} s "
+          f"({report['samples_per_second']:.0f} samples/s)\n")
+    print(f"{'operation':<22}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses")
+    for name, op in report["operations"].items():
+        statuses = ", ".join(f"{code}: {count}" for code, count in sorted(op["statuses"].items()))
+        print(
+            f"{name:<22}{op['requests']:>9}{op['per_second']:>9.1f}{op['p50_ms']:>9.1f}"
+            f"{op['p95_ms']:>9.1f}{op['p99_ms']:>9.1f}{op['max_ms']:>9.1f}  {statuses}"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate EEG headsets and measure ingestion/query throughput and latency")
+    parser.add_argument("--headsets", type=int, default=4, help="동시에 전송하는 가상 헤드셋 수")
+    parser.add_argument("--channels", type=int, default=8, help="헤드셋당 채널 수")
+    parser.add_argument("--rate", type=float, default=250.0, help="샘플링 레이트 (Hz)")
+    parser.add_argument("--frame-ms", type=int, default=100, help="요청 하나에 담는 신호 길이 (밀리초)")
+    parser.add_argument("--transport", choices=["binary", "bulk"], default="binary", help="수집 엔드포인트")
+    parser.add_argument("--realtime", action="store_true", help="샘플링 레이트에 맞춰 전송 (기본: 최대 속도)")
+    parser.add_argument("--readers", type=int, default=2, help="페이지와 조회 API를 호출하는 클라이언트 수")
+    parser.add_argument("--reader-interval", type=float, default=0.1, help="조회 클라이언트의 반복 간격 (초)")
+    parser.add_argument("--predict", action="store_true", help="/api/v1/predict도 호출 (예측 라우터가 마운트된 서버에서만)")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간 (초)")
+    parser.add_argument("--base-url", default=None, help="실행 중인 서버 주소 (기본: 같은 프로세스의 app.main:app)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--seed", type=int, default=0, help="신호 생성 난수 시드")
+    parser.add_argument("--json", default=None, help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
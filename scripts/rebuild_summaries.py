@@ -0,0 +1,38 @@
+"""
+세션 요약 테이블(채널 누적 통계, min/max 피라미드)을 기존 데이터로부터 다시 만드는 스크립트입니다.
+
+사용 예:
+    python scripts/rebuild_summaries.py              # 모든 세션
+    python scripts/rebuild_summaries.py --session-id 12
+"""
+
+import argparse
+import logging
+
+from app import crud
+from app.database import SessionLocal, engine, upgrade_schema
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild per-session channel statistics and signal pyramids")
+    parser.add_argument("--session-id", type=int, default=None, help="하나의 세션만 다시 계산")
+    args = parser.parse_args()
+
+    upgrade_schema(engine)
+    db = SessionLocal()
+    try:
+        rebuilt = crud.rebuild_channel_stats(db, args.session_id)
+        logger.info(f"Rebuilt channel statistics for {rebuilt} session(s)")
+        rebuilt = crud.rebuild_signal_pyramid(db, args.session_id)
+        logger.info(f"Rebuilt signal pyramids for {rebuilt} session(s)")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import Base
-from app.main import app, get_db
+from app.database import Base, get_db
+from app.main import app
 import pytest
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
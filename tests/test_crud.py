@@ -0,0 +1,297 @@
+import pytest
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import BCISession, BCISignalChunk, BCIData
+from app import crud, schemas
+from datetime import datetime, timedelta
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def bci_session(db_session):
+    session = BCISession(session_name="Test Session", date_recorded=datetime(2024, 1, 1), subject_id="subject1")
+    db_session.add(session)
+    db_session.commit()
+    return session
+
+def test_signal_chunk_roundtrip(db_session, bci_session):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(500, 4)
+    crud.create_signal_chunk(db_session, bci_session.id, data[:250], start, 250.0)
+    crud.create_signal_chunk(db_session, bci_session.id, data[250:], start + timedelta(seconds=1), 250.0)
+
+    assert db_session.query(BCISignalChunk).count() == 2
+    timestamps, signal = crud.get_signal(db_session, bci_session.id)
+    assert signal.dtype == np.float32
+    assert signal.shape == (500, 4)
+    np.testing.assert_allclose(signal, data.astype(np.float32))
+    assert timestamps[0] == np.datetime64(start, "us")
+    assert timestamps[-1] == np.datetime64(start + timedelta(seconds=499 / 250), "us")
+
+def test_signal_time_range(db_session, bci_session):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    for i in range(4):
+        crud.create_signal_chunk(db_session, bci_session.id, np.full((100, 2), i), start + timedelta(seconds=i), 100.0)
+
+    chunks = crud.get_signal_chunks(db_session, bci_session.id, start + timedelta(seconds=1.5), start + timedelta(seconds=2.5))
+    assert [c.start_time for c in chunks] == [start + timedelta(seconds=1), start + timedelta(seconds=2)]
+
+    timestamps, signal = crud.get_signal(db_session, bci_session.id, start + timedelta(seconds=1.5), start + timedelta(seconds=2.5))
+    assert len(signal) == 101
+    assert signal[0, 0] == 1 and signal[-1, 0] == 2
+
+def test_indexed_session_stores_samples_by_index(db_session):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    session = crud.create_session(db_session, schemas.BCISessionCreate(
+        session_name="Indexed", date_recorded=datetime(2024, 1, 1), subject_id="subject1", sampling_rate=250.0
+    ))
+    data = np.random.randn(1000, 2)
+    crud.create_signal_chunk(db_session, session.id, data[:500], start, 250.0)
+    crud.create_signal_chunk(db_session, session.id, data[500:], None, 250.0)  # 마지막 샘플 뒤에 이어 붙임
+    # 격자에서 약간 어긋난 시각은 가장 가까운 샘플 인덱스로 맞춰지고, 끊긴 곳에서 청크가 나뉜다
+    points = [
+        schemas.BCIDataCreate(timestamp=start + timedelta(seconds=(1000 + i + (i >= 3) * 7) / 250, microseconds=300), values=[i, -i])
+        for i in range(6)
+    ]
+    assert crud.create_data_points_bulk(db_session, points, session.id) == 6
+    crud.create_data_point(db_session, schemas.BCIDataCreate(values=[9.0, 9.0]), session.id)
+
+    db_session.refresh(session)
+    assert session.start_time == start
+    assert db_session.query(BCIData).count() == 0
+    chunks = crud.get_signal_chunks(db_session, session.id)
+    # 마지막 청크에 바로 이어지는 데이터 포인트는 새 청크 대신 그 청크에 붙는다
+    assert [(c.start_index, c.sample_count) for c in chunks] == [(0, 500), (500, 503), (1010, 4)]
+    assert chunks[1].start_time == start + timedelta(seconds=2)
+
+    # 구간 조회는 인덱스 범위로 청크를 고른다
+    window = crud.get_signal_chunks(db_session, session.id, start + timedelta(seconds=1.5), start + timedelta(seconds=2.5))
+    assert [c.start_index for c in window] == [0, 500]
+    timestamps, signal = crud.get_signal(db_session, session.id, start + timedelta(seconds=1.5), start + timedelta(seconds=2.5))
+    np.testing.assert_allclose(signal, data[375:626].astype(np.float32))
+    # 구간 시작이 청크 사이 빈 곳이면 직전 청크도 후보에 들어가고, get_signal이 잘라낸다
+    gap = crud.get_signal_chunks(db_session, session.id, start + timedelta(seconds=4.03), start + timedelta(seconds=4.05))
+    assert [c.start_index for c in gap] == [500, 1010]
+
+    with pytest.raises(ValueError):
+        crud.create_signal_chunk(db_session, session.id, data[:10], start, 500.0)
+    db_session.rollback()
+    with pytest.raises(ValueError):
+        crud.create_data_points_bulk(db_session, list(reversed(points)), session.id)
+
+def test_single_samples_extend_the_tail_chunk(db_session, tmp_path, monkeypatch):
+    from app.config import settings
+    monkeypatch.setattr(settings, "SIGNAL_STORAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TAIL_CHUNK_MAX_SAMPLES", 8)
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    for storage_mode in ("db", "file"):
+        session = BCISession(session_name="s", date_recorded=start, subject_id="x", sampling_rate=250.0, storage_mode=storage_mode)
+        db_session.add(session)
+        db_session.commit()
+        for i in range(20):
+            crud.create_data_point(db_session, schemas.BCIDataCreate(timestamp=start + timedelta(seconds=i / 250), values=[i, -i]), session.id)
+        # 하나씩 추가해도 청크는 TAIL_CHUNK_MAX_SAMPLES 단위로만 생긴다
+        chunks = crud.get_signal_chunks(db_session, session.id)
+        assert [(c.start_index, c.sample_count) for c in chunks] == [(0, 8), (8, 8), (16, 4)]
+        timestamps, signal = crud.get_signal(db_session, session.id)
+        np.testing.assert_array_equal(signal[:, 0], np.arange(20))
+        assert timestamps[-1] == np.datetime64(start + timedelta(seconds=19 / 250), "us")
+        assert crud.get_channel_stats(db_session, session.id)[0].count == 20
+
+def test_indexed_session_rejects_already_stored_indices(db_session):
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x", sampling_rate=250.0)
+    db_session.add(session)
+    db_session.commit()
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [schemas.BCIDataCreate(timestamp=start + timedelta(seconds=i / 250), values=[i, -i]) for i in range(100)]
+    assert crud.create_data_points_bulk(db_session, points, session.id) == 100
+
+    # 같은 배치를 다시 보내거나 일부만 겹쳐도 거부하고, 저장된 샘플은 그대로다
+    with pytest.raises(ValueError, match="already stored"):
+        crud.create_data_points_bulk(db_session, points, session.id)
+    db_session.rollback()
+    with pytest.raises(ValueError, match="already stored"):
+        crud.create_signal_chunk(db_session, session.id, np.zeros((10, 2)), start + timedelta(seconds=95 / 250), 250.0)
+    db_session.rollback()
+    # 한 배치 안에서 앞 청크와 겹치는 청크도 거부한다
+    with pytest.raises(ValueError, match="already stored"):
+        crud.add_signal_chunks(db_session, session.id, [(np.zeros((10, 2)), start + timedelta(seconds=1), 250.0)] * 2)
+    db_session.rollback()
+
+    crud.create_signal_chunk(db_session, session.id, np.zeros((10, 2)), start + timedelta(seconds=100 / 250), 250.0)
+    assert len(crud.get_signal(db_session, session.id)[0]) == 110
+
+def test_analysis_uses_session_sampling_rate(db_session):
+    from app.analysis import session_sampling_rate
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x", sampling_rate=512.0)
+    timestamps = np.datetime64("2024-01-01", "us") + np.arange(10) * np.timedelta64(4000, "us")
+    assert session_sampling_rate(session, timestamps) == 512.0
+    session.sampling_rate = None
+    assert session_sampling_rate(session, timestamps) == pytest.approx(250.0)
+
+def test_get_signal_merges_overlapping_chunks(db_session, bci_session):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    crud.create_signal_chunk(db_session, bci_session.id, np.zeros((10, 4)), start, 1.0)  # 0-9초
+    crud.create_signal_chunk(db_session, bci_session.id, np.ones((10, 4)), start + timedelta(seconds=5), 1.0)  # 5-14초
+    timestamps, signal = crud.get_signal(db_session, bci_session.id, start + timedelta(seconds=6), start + timedelta(seconds=7))
+    assert len(timestamps) == 4
+    assert np.all(np.diff(timestamps) >= np.timedelta64(0, "us"))
+    assert sorted(signal[:, 0]) == [0.0, 0.0, 1.0, 1.0]
+
+def test_signal_chunk_rejects_empty(db_session, bci_session):
+    with pytest.raises(ValueError):
+        crud.create_signal_chunk(db_session, bci_session.id, np.empty((0, 4)), datetime.now(), 250.0)
+
+def test_file_storage_session_uses_memmap(db_session, tmp_path, monkeypatch):
+    from app.config import settings
+    from app.analysis import analyze_session_window
+    monkeypatch.setattr(settings, "SIGNAL_STORAGE_DIR", str(tmp_path))
+    session = BCISession(session_name="Long Session", date_recorded=datetime(2024, 1, 1), subject_id="subject1", storage_mode="file")
+    db_session.add(session)
+    db_session.commit()
+
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(1000, 4)
+    crud.create_signal_chunk(db_session, session.id, data[:500], start, 250.0)
+    crud.create_signal_chunk(db_session, session.id, data[500:], start + timedelta(seconds=2), 250.0)
+
+    chunks = crud.get_signal_chunks(db_session, session.id)
+    assert all(c.data is None for c in chunks)
+    assert [c.file_offset for c in chunks] == [0, 500 * 4 * 4]
+
+    _, signal = crud.get_signal(db_session, session.id, start + timedelta(seconds=1), start + timedelta(seconds=3))
+    assert isinstance(signal, np.memmap)
+    np.testing.assert_allclose(signal, data[250:751].astype(np.float32))
+
+    result = analyze_session_window(db_session, session)
+    assert result["num_data_points"] == 1000
+    assert len(result["channel_means"]) == 4
+
+def test_chunked_analysis_matches_in_memory_analysis(db_session):
+    from app.analysis import analyze_session_chunked, analyze_session_full, analyze_session_window
+    session = BCISession(session_name="Long Session", date_recorded=datetime(2024, 1, 1), subject_id="subject1", sampling_rate=250.0, line_frequency=50.0)
+    db_session.add(session)
+    db_session.commit()
+    data = np.random.randn(20000, 4) * 10 + 100
+    crud.add_signal_chunk(db_session, session.id, data[:12000], datetime(2024, 1, 1), 250.0)
+    crud.add_signal_chunk(db_session, session.id, data[12000:], None, 250.0)
+    db_session.commit()
+
+    expected = analyze_session_window(db_session, session)
+    # 블록 하나가 4000 샘플 × 4채널 × 8바이트이므로 여러 블록으로 나뉜다
+    result = analyze_session_chunked(db_session, session, block_bytes=4000 * 4 * 8)
+    assert result["num_data_points"] == 20000
+    np.testing.assert_allclose(result["channel_means"], expected["channel_means"], atol=1e-6)
+    np.testing.assert_allclose(result["channel_stds"], expected["channel_stds"], rtol=1e-6)
+    np.testing.assert_allclose(result["extracted_features"][:16], expected["extracted_features"][:16], rtol=1e-5, atol=1e-5)
+    assert len(result["extracted_features"]) == 16 + 2 * 4
+
+    # full 모드도 같은 형식이라 저장되는 특징이 세션 길이에 따라 커지지 않는다
+    full = analyze_session_full(db_session, session)
+    assert len(full["extracted_features"]) == 16 + 2 * 4
+    np.testing.assert_allclose(full["extracted_features"], result["extracted_features"], rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(full["pca_explained_variance"], result["pca_explained_variance"], rtol=1e-4)
+
+def test_signal_chunk_rejects_channel_mismatch(db_session, bci_session):
+    crud.create_signal_chunk(db_session, bci_session.id, np.zeros((10, 4)), datetime(2024, 1, 1), 250.0)
+    with pytest.raises(ValueError):
+        crud.create_signal_chunk(db_session, bci_session.id, np.zeros((10, 8)), datetime(2024, 1, 1, 0, 1), 250.0)
+
+def test_channel_stats_incremental_and_rebuild(db_session, bci_session):
+    from app import schemas
+    from app.models import BCIChannelStats
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(600, 4)
+    crud.create_signal_chunk(db_session, bci_session.id, data[:300], start, 100.0)
+    crud.create_signal_chunk(db_session, bci_session.id, data[300:], start + timedelta(seconds=3), 100.0)
+    points = [
+        schemas.BCIDataCreate(timestamp=start + timedelta(seconds=10 + i), channel_1=1.0, channel_2=2.0, channel_3=3.0, channel_4=4.0)
+        for i in range(5)
+    ]
+    crud.create_data_points_bulk(db_session, points, bci_session.id)
+
+    expected = np.vstack([data.astype(np.float32).astype(np.float64), np.tile([1.0, 2.0, 3.0, 4.0], (5, 1))])
+    summaries = crud.summarize_channel_stats(crud.get_channel_stats(db_session, bci_session.id))
+    assert [s.channel for s in summaries] == [1, 2, 3, 4]
+    assert summaries[0].count == 605
+    np.testing.assert_allclose([s.mean for s in summaries], expected.mean(axis=0), atol=1e-9)
+    np.testing.assert_allclose([s.std for s in summaries], expected.std(axis=0), rtol=1e-6)
+    assert summaries[1].max == expected[:, 1].max()
+    assert summaries[0].first_timestamp == start
+    assert summaries[0].last_timestamp == start + timedelta(seconds=14)
+
+    db_session.query(BCIChannelStats).delete()
+    db_session.commit()
+    crud.rebuild_channel_stats(db_session)
+    rebuilt = crud.summarize_channel_stats(crud.get_channel_stats(db_session, bci_session.id))
+    assert [s.count for s in rebuilt] == [s.count for s in summaries]
+    np.testing.assert_allclose([s.mean for s in rebuilt], [s.mean for s in summaries], atol=1e-9)
+    assert [(s.min, s.max) for s in rebuilt] == [(s.min, s.max) for s in summaries]
+    assert rebuilt[0].first_timestamp == start
+    assert rebuilt[0].last_timestamp == start + timedelta(seconds=14)
+
+def test_signal_pyramid_incremental_and_rebuild(db_session, bci_session):
+    from app.models import BCISignalPyramid
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(2000, 4)
+    # 두 번째 청크가 첫 청크의 마지막 구간과 겹치도록 경계를 구간 중간에 둔다
+    crud.create_signal_chunk(db_session, bci_session.id, data[:1005], start, 100.0)
+    crud.create_signal_chunk(db_session, bci_session.id, data[1005:], start + timedelta(seconds=10.05), 100.0)
+
+    expected = data.astype(np.float32).astype(np.float64)
+    starts, mins, maxs, means = crud.get_pyramid_buckets(db_session, bci_session.id, 0, start, start + timedelta(seconds=20))
+    assert len(starts) == 200
+    assert starts[0] == np.datetime64(start, "us")
+    np.testing.assert_allclose(mins[100], expected[1000:1010].min(axis=0), rtol=1e-6)
+    np.testing.assert_allclose(maxs[100], expected[1000:1010].max(axis=0), rtol=1e-6)
+    np.testing.assert_allclose(means[100], expected[1000:1010].mean(axis=0), atol=1e-6)
+
+    coarse = crud.get_pyramid_buckets(db_session, bci_session.id, 2, start, start + timedelta(seconds=20))
+    np.testing.assert_allclose(coarse[1].min(axis=0), expected.min(axis=0), rtol=1e-6)
+
+    db_session.query(BCISignalPyramid).delete()
+    db_session.commit()
+    crud.rebuild_signal_pyramid(db_session, bci_session.id)
+    rebuilt = crud.get_pyramid_buckets(db_session, bci_session.id, 0, start, start + timedelta(seconds=20))
+    np.testing.assert_array_equal(rebuilt[0], starts)
+    np.testing.assert_allclose(rebuilt[1], mins)
+    np.testing.assert_allclose(rebuilt[3], means, atol=1e-9)
+
+def test_data_point_vectors_and_legacy_rows(db_session):
+    from app import schemas
+    from app.models import BCIData
+    from app.analysis import data_points_to_arrays
+    session = crud.create_session(db_session, schemas.BCISessionCreate(
+        session_name="Montage", date_recorded=datetime(2024, 1, 1), subject_id="subject1", channel_names=["Fp1", "Fp2", "C3", "C4"]
+    ))
+    assert session.channel_count == 4
+    assert session.channel_labels == ["Fp1", "Fp2", "C3", "C4"]
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    # 벡터 도입 전의 4채널 행과 새 벡터 행이 섞여 있어도 같은 배열로 읽힌다
+    db_session.add(BCIData(session_id=session.id, timestamp=start, channel_1=1.0, channel_2=2.0, channel_3=3.0, channel_4=4.0))
+    db_session.commit()
+    crud.create_data_point(db_session, schemas.BCIDataCreate(timestamp=start + timedelta(seconds=1), values=[5.0, 6.0, 7.0, 8.0]), session.id)
+
+    timestamps, data = crud.get_data_point_arrays(db_session, session.id)
+    np.testing.assert_array_equal(data, [[1, 2, 3, 4], [5, 6, 7, 8]])
+    points = crud.get_data_points(db_session, session.id)
+    assert [p.values for p in points] == [[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]]
+    assert data_points_to_arrays(points)[1].shape == (2, 4)
+
+    with pytest.raises(ValueError):
+        crud.create_data_point(db_session, schemas.BCIDataCreate(timestamp=start, values=[1.0] * 8), session.id)
+    with pytest.raises(ValueError):
+        schemas.BCISessionCreate(session_name="x", date_recorded=start, subject_id="s", channel_names=["Fp1", "Fp1"])
+
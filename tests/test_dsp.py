@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from app.dsp.downsample import stride_decimate, minmax_decimate, decimate
+from app.dsp import pyramid
+
+@pytest.fixture
+def signal():
+    timestamps = np.datetime64("2024-01-01T00:00:00", "us") + np.arange(10000).astype("timedelta64[ms]")
+    data = np.random.randn(10000, 3)
+    data[5000, 1] = 100.0  # 스파이크
+    return timestamps, data
+
+def test_stride_decimate_bounds_size(signal):
+    timestamps, data = signal
+    out_ts, out = stride_decimate(timestamps, data, 999)
+    assert len(out_ts) <= 999
+    assert out.shape[1] == 3
+    assert out_ts[0] == timestamps[0]
+
+def test_minmax_decimate_keeps_peaks(signal):
+    timestamps, data = signal
+    out_ts, out = minmax_decimate(timestamps, data, 200)
+    assert len(out_ts) == 200
+    assert out[:, 1].max() == 100.0
+    assert out.min() == data.min()
+    assert np.all(np.diff(out_ts) >= np.timedelta64(0, "us"))
+
+def test_decimate_passthrough_and_unknown_mode(signal):
+    timestamps, data = signal
+    out_ts, out = decimate(timestamps[:10], data[:10], 100)
+    assert np.array_equal(out, data[:10])
+    with pytest.raises(ValueError):
+        decimate(timestamps, data, 100, mode="bogus")
+
+def test_pyramid_aggregate_buckets_and_level_choice():
+    timestamps = np.datetime64("2024-01-01T00:00:00", "us") + np.arange(1000) * np.timedelta64(4000, "us")
+    data = np.random.randn(1000, 3)
+    agg = pyramid.aggregate_buckets(timestamps, data, 0)
+    assert agg["count"].sum() == 1000
+    assert len(agg["bucket"]) == 40  # 4초 / 0.1초
+    np.testing.assert_allclose(agg["min"][0], data[:25].min(axis=0))
+    np.testing.assert_allclose(agg["sum"].sum(axis=0), data.sum(axis=0))
+
+    assert pyramid.choose_level(60 * 10**6, 800) == 0
+    assert pyramid.choose_level(3600 * 10**6, 800) == 2
+    assert pyramid.choose_level(10**15, 800) == pyramid.NUM_LEVELS - 1
+    # 가장 거친 레벨로도 넘치면 group_size개씩 합쳐 width 이하로 만든다
+    coarsest = pyramid.NUM_LEVELS - 1
+    group = pyramid.group_size(0, 10**15, coarsest, 800)
+    first, last = pyramid.bucket_range(0, 10**15, coarsest)
+    assert -(-(last - first + 1) // group) <= 800
+    assert pyramid.group_size(0, 60 * 10**6, 0, 800) == 1
+
+
+def _tone(freq, rate=250.0, seconds=8.0, channels=2):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.repeat(np.sin(2 * np.pi * freq * t)[:, np.newaxis], channels, axis=1)
+
+def _rms(x):
+    # 필터 과도 응답을 피해 가운데 구간만 본다
+    middle = x[len(x) // 4: -len(x) // 4]
+    return float(np.sqrt(np.mean(middle ** 2)))
+
+def test_filterbank_matches_sosfiltfilt_and_caches_design():
+    from scipy import signal as sp
+    from app.dsp.filterbank import FilterBank, FilterSpec, design_sos
+    spec = FilterSpec(band=(2.0, 40.0), notch=50.0)
+    FilterBank(500.0, spec)
+    hits = design_sos.cache_info().hits
+    bank = FilterBank(500.0, spec)
+    assert design_sos.cache_info().hits == hits + 1
+    data = np.random.randn(3000, 4)
+    expected = sp.sosfiltfilt(np.array(design_sos(500.0, spec)), data, axis=0)
+    assert np.allclose(bank.apply(data), expected)
+    # 1차원 입력과 패딩보다 짧은 입력도 처리한다
+    assert bank.apply(data[:, 0]).shape == (3000,)
+    assert bank.apply(data[:5]).shape == (5, 4)
+
+def test_filterbank_removes_line_noise_and_keeps_passband():
+    from app.dsp.filterbank import FilterBank, FilterSpec
+    for line in (50.0, 60.0):
+        bank = FilterBank(250.0, FilterSpec(notch=line))
+        assert _rms(bank.apply(_tone(line))) < 0.05
+        assert _rms(bank.apply(_tone(10.0))) > 0.65
+
+def test_filterbank_float32_and_high_cutoff_above_nyquist():
+    from app.dsp.filterbank import FilterBank, FilterSpec
+    data = _tone(10.0).astype(np.float32)
+    out = FilterBank(250.0, dtype=np.float32).apply(data)
+    assert out.dtype == np.float32
+    assert np.allclose(out, FilterBank(250.0).apply(data), atol=1e-3)
+    # 100 Hz 샘플링에서는 60 Hz 노치와 50 Hz 상한이 빠지고 고역 통과만 남는다
+    assert FilterBank(100.0, FilterSpec()).n_sections == 2
+
+def test_session_filter_spec_uses_session_values_and_defaults():
+    from app.analysis import session_filter_spec
+    from app.config import settings
+    from app.models import BCISession
+    spec = session_filter_spec(BCISession(line_frequency=50.0, passband_high=30.0))
+    assert spec.notch == 50.0
+    assert spec.band == (settings.FILTER_PASSBAND_LOW, 30.0)
+
+def test_streaming_filter_matches_whole_signal_sosfilt():
+    from scipy import signal as sp
+    from app.dsp.filterbank import FilterBank
+    bank = FilterBank(250.0)
+    data = np.random.randn(2000, 3) + 5.0  # DC 오프셋
+    stream = bank.stream()
+    chunks = [stream.process(chunk) for chunk in np.array_split(data, [1, 7, 500, 1200])]
+    expected, _ = sp.sosfilt(bank.sos, data, axis=0, zi=bank.zi[:, :, np.newaxis] * data[0])
+    assert np.allclose(np.concatenate(chunks), expected)
+    assert stream.samples == 2000
+    with pytest.raises(ValueError):
+        stream.process(np.zeros((10, 2)))
+    stream.reset()
+    assert stream.process(np.zeros((10, 2))).shape == (10, 2)
@@ -0,0 +1,652 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.database import Base, get_async_db, get_db
+from app.main import app
+from app.models import BCISession, BCIData
+from app.ingestion.live_buffer import LiveCursor, RingBuffer, live_buffers
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+import io
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    live_buffers.clear()
+    app.dependency_overrides = previous_overrides
+
+@pytest.fixture
+def session_id():
+    db = TestingSessionLocal()
+    session = BCISession(session_name="Test Session", date_recorded=datetime(2024, 1, 1), subject_id="subject1")
+    db.add(session)
+    db.commit()
+    session_id = session.id
+    db.close()
+    return session_id
+
+def test_bulk_insert(session_id):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [
+        {
+            "timestamp": (start + timedelta(milliseconds=4 * i)).isoformat(),
+            "channel_1": i, "channel_2": 0.5, "channel_3": -1.0, "channel_4": 2.0
+        } for i in range(2000)
+    ]
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["inserted"] == 2000
+    assert data["latency_ms"] >= 0
+
+    db = TestingSessionLocal()
+    assert db.query(BCIData).filter(BCIData.session_id == session_id).count() == 2000
+    db.close()
+
+def test_bulk_insert_rejects_duplicate_indexed_batch():
+    db = TestingSessionLocal()
+    session = BCISession(session_name="Indexed", date_recorded=datetime(2024, 1, 1), subject_id="subject1", sampling_rate=250.0)
+    db.add(session)
+    db.commit()
+    session_id = session.id
+    db.close()
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [{"timestamp": (start + timedelta(milliseconds=4 * i)).isoformat(), "values": [i, 0.5]} for i in range(50)]
+    assert client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points}).status_code == 200
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+    assert response.status_code == 409
+    assert "already stored" in response.json()["detail"]
+
+def test_wide_montage_data_points(session_id):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [
+        {"timestamp": (start + timedelta(milliseconds=4 * i)).isoformat(), "values": [float(i + c) for c in range(64)]}
+        for i in range(100)
+    ]
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+    assert response.status_code == 200
+
+    page = client.get(f"/api/v1/sessions/{session_id}/data", params={"limit": 10}).json()
+    assert len(page["items"][3]["values"]) == 64
+    assert page["items"][3]["values"][63] == 66.0
+    stats = client.get(f"/api/v1/sessions/{session_id}/stats").json()
+    assert len(stats) == 64
+
+    # 세션의 채널 수와 다른 벡터는 거부한다
+    point = {"timestamp": start.isoformat(), "values": [1.0, 2.0]}
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": [point]})
+    assert response.status_code == 409
+    response = client.get(f"/session-detail/{session_id}")
+    assert response.status_code == 200
+    assert "Channel 64" in response.text
+
+def test_bulk_insert_returns_429_when_queue_is_full(session_id, monkeypatch):
+    from app.ingestion import ingest_queue
+    full = ingest_queue.IngestionQueue(TestingSessionLocal, max_samples=10, enqueue_timeout=0.01)
+    full._pending_samples = 10  # flusher가 밀려 있는 상황
+    monkeypatch.setattr(ingest_queue, "_queue", full)
+    points = [{"timestamp": datetime(2024, 1, 1).isoformat(), "values": [1.0, 2.0]}]
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/api/v1/ingestion/stats").json()["queue"]["rejected"] == 1
+
+def test_bulk_insert_unknown_session():
+    point = {"timestamp": "2024-01-01T00:00:00", "channel_1": 0, "channel_2": 0, "channel_3": 0, "channel_4": 0}
+    response = client.post("/api/v1/sessions/999/data/bulk", json={"data_points": [point]})
+    assert response.status_code == 404
+
+def test_bulk_insert_rejects_empty_batch(session_id):
+    response = client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": []})
+    assert response.status_code == 422
+
+def test_binary_frame_upload(session_id):
+    from app import crud
+    from app.ingestion.binary_format import encode_frame
+    data = np.random.randn(1000, 8).astype(np.float32)
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    response = client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=encode_frame(data, 250.0, start),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sample_count"] == 1000
+    assert body["channel_count"] == 8
+
+    db = TestingSessionLocal()
+    timestamps, signal = crud.get_signal(db, session_id)
+    db.close()
+    np.testing.assert_array_equal(signal, data)
+    assert timestamps[0] == np.datetime64(start, "us")
+
+def test_npy_upload_requires_sampling_rate(session_id):
+    buffer = io.BytesIO()
+    np.save(buffer, np.random.randn(100, 4))
+    url = f"/api/v1/sessions/{session_id}/signal"
+    headers = {"Content-Type": "application/x-npy"}
+    assert client.post(url, content=buffer.getvalue(), headers=headers).status_code == 400
+
+    response = client.post(url + "?sampling_rate=500", content=buffer.getvalue(), headers=headers)
+    assert response.status_code == 200
+    assert response.json()["sample_count"] == 100
+
+def test_arrow_upload(session_id):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({f"ch{i}": np.arange(50, dtype=np.float32) * i for i in range(3)})
+    table = table.replace_schema_metadata({"sampling_rate": "250"})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": "application/vnd.apache.arrow.stream"}
+    )
+    assert response.status_code == 200
+    assert response.json()["channel_count"] == 3
+
+def test_signal_upload_rejects_bad_bodies(session_id):
+    url = f"/api/v1/sessions/{session_id}/signal"
+    assert client.post(url, content=b"abc", headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.post(url, content=b"BCIF" + b"\0" * 30, headers={"Content-Type": "application/octet-stream"}).status_code == 400
+
+def test_keyset_pagination(session_id):
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    # 같은 타임스탬프가 겹치는 경우도 id로 구분되어야 한다
+    points = [
+        {
+            "timestamp": (start + timedelta(seconds=i // 2)).isoformat(),
+            "channel_1": i, "channel_2": 0, "channel_3": 0, "channel_4": 0
+        } for i in range(25)
+    ]
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+
+    for limit in (10, 5):
+        seen, pages = [], 0
+        params = {"limit": limit}
+        while True:
+            page = client.get(f"/api/v1/sessions/{session_id}/data", params=params).json()
+            seen.extend(item["values"][0] for item in page["items"])
+            pages += 1
+            if page["next_cursor"] is None:
+                break
+            params = dict(page["next_cursor"], limit=limit)
+        assert seen == list(range(25))
+        # 다음 행이 있을 때만 커서를 주므로 limit의 배수여도 빈 마지막 페이지가 없다
+        assert pages == -(-25 // limit)
+
+    # after_id만으로는 위치를 알 수 없으므로 첫 페이지를 다시 주지 않고 거부한다
+    assert client.get(f"/api/v1/sessions/{session_id}/data", params={"after_id": 5}).status_code == 422
+    assert client.get(f"/session-detail/{session_id}", params={"after_id": 5}).status_code == 422
+
+def test_session_detail_pages_follow_next_cursor(session_id):
+    import re
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [{"timestamp": (start + timedelta(seconds=i)).isoformat(), "values": [i, 0.0]} for i in range(101)]
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+    response = client.get(f"/session-detail/{session_id}")
+    assert response.status_code == 200
+    query = re.search(r'href="[^"?]*\?([^"]*after_id=\d+)"', response.text).group(1)
+    # 두 번째 페이지는 마지막 한 행뿐이므로 다음 링크가 없다
+    last = client.get(f"/session-detail/{session_id}?" + query.replace("&amp;", "&"))
+    assert last.status_code == 200 and "Next page" not in last.text
+
+def test_session_detail_links_chunk_stored_signal():
+    db = TestingSessionLocal()
+    session = BCISession(session_name="Indexed", date_recorded=datetime(2024, 1, 1), subject_id="subject1", sampling_rate=250.0)
+    db.add(session)
+    db.commit()
+    session_id = session.id
+    db.close()
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [{"timestamp": (start + timedelta(milliseconds=4 * i)).isoformat(), "values": [i, 0.5]} for i in range(50)]
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+
+    # 고정 레이트 세션은 샘플을 청크로 저장하므로 빈 표 대신 신호 조회 링크를 보여 준다
+    page = client.get(f"/session-detail/{session_id}").text
+    assert "50 samples are stored as signal blocks" in page
+    assert f"/api/v1/sessions/{session_id}/signal" in page
+    assert "No data points recorded yet" not in page
+
+def test_signal_window_query(session_id):
+    from app.ingestion.binary_format import encode_frame
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(25000, 4).astype(np.float32)
+    client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=encode_frame(data, 250.0, start),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    params = {
+        "start": (start + timedelta(seconds=10)).isoformat(),
+        "end": (start + timedelta(seconds=60)).isoformat(),
+        "channels": [2, 3],
+        "max_points": 500,
+    }
+    response = client.get(f"/api/v1/sessions/{session_id}/signal", params=params)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source_samples"] == 50 * 250 + 1
+    assert body["channels"] == [2, 3]
+    assert len(body["data"]) == 2
+    assert len(body["timestamps"]) == len(body["data"][0]) <= 500
+
+    response = client.get(f"/api/v1/sessions/{session_id}/signal", params={"channels": [9]})
+    assert response.status_code == 400
+
+def test_ring_buffer_wraps_with_contiguous_views():
+    buffer = RingBuffer(capacity=8, channel_count=2)
+    timestamps = np.datetime64("2024-01-01T00:00:00", "us") + np.arange(20).astype("timedelta64[s]")
+    data = np.arange(40, dtype=np.float32).reshape(20, 2)
+    buffer.append(timestamps[:5], data[:5])
+    buffer.append(timestamps[5:11], data[5:11])
+    ts, values = buffer.latest(8)
+    assert ts.base is not None and values.flags["C_CONTIGUOUS"]
+    assert np.array_equal(values, data[3:11])
+    assert buffer.latest(100)[0].shape == (8,)
+
+    buffer.append(timestamps[11:20], data[11:20])  # 용량보다 많은 한 번의 추가
+    assert buffer.total == 20
+    assert np.array_equal(buffer.latest(8)[1], data[12:20])
+
+    ts, values, cursor = buffer.since(17)
+    assert cursor == 20 and np.array_equal(values, data[17:20])
+    ts, values, cursor = buffer.since(2)  # 덮어쓴 샘플은 건너뛴다
+    assert np.array_equal(values, data[12:20])
+    assert len(buffer.since(20)[0]) == 0
+
+    ts, values = buffer.window(2.5)
+    assert np.array_equal(ts, timestamps[17:20])
+    # 잠금 밖에서 덮어써지지 않도록 window는 복사본을 돌려준다
+    buffer.append(timestamps[:8], np.zeros((8, 2), dtype=np.float32))
+    assert np.array_equal(values, data[17:20])
+
+    # 이전 시각의 샘플이 나중에 추가돼도 가장 늦은 샘플 기준 구간을 시간순으로 고른다
+    buffer = RingBuffer(capacity=8, channel_count=2)
+    buffer.append(timestamps[10:14], data[10:14])
+    buffer.append(timestamps[2:4], data[2:4])
+    buffer.append(timestamps[14:15], data[14:15])
+    ts, values = buffer.window(2.5)
+    assert np.array_equal(ts, timestamps[12:15])
+    assert np.array_equal(values, data[12:15])
+
+def test_live_signal_reads_committed_samples(session_id):
+    from app.ingestion.binary_format import encode_frame
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(5000, 4).astype(np.float32)
+    response = client.get(f"/api/v1/sessions/{session_id}/live", params={"seconds": 5})
+    assert response.status_code == 200
+    assert response.json()["source_samples"] == 0
+
+    client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=encode_frame(data, 250.0, start),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert live_buffers.get(session_id).total == 5000
+    response = client.get(f"/api/v1/sessions/{session_id}/live", params={"seconds": 5, "channels": [1], "max_points": 100})
+    body = response.json()
+    assert body["source"] == "live"
+    assert body["source_samples"] == 5 * 250 + 1
+    assert len(body["data"]) == 1 and len(body["timestamps"]) <= 100
+
+    live_buffers.clear()  # 서버 재시작과 같은 상황에서는 DB에서 읽는다
+    body = client.get(f"/api/v1/sessions/{session_id}/live", params={"seconds": 5}).json()
+    assert body["source"] == "db"
+    assert body["source_samples"] == 5 * 250 + 1
+
+def test_live_cursor_returns_only_new_samples():
+    timestamps = np.datetime64("2024-01-01T00:00:00", "us") + np.arange(30).astype("timedelta64[ms]")
+    data = np.arange(60, dtype=np.float32).reshape(30, 2)
+    waiting = LiveCursor(42)
+    assert waiting.poll() is None
+    live_buffers.append(42, timestamps[:10], data[:10])
+    assert np.array_equal(waiting.poll()[1], data[:10])  # 연결 후 만들어진 버퍼는 처음부터
+    cursor = LiveCursor(42)
+    assert cursor.poll() is None  # 커서 없이 시작하면 연결 이후 샘플만 받는다
+    live_buffers.append(42, timestamps[10:15], data[10:15])
+    ts, values = cursor.poll()
+    assert np.array_equal(values, data[10:15]) and cursor.cursor == 15
+    assert cursor.poll() is None
+
+    resumed = LiveCursor(42, cursor=12)  # Last-Event-ID로 재연결
+    assert np.array_equal(resumed.poll()[1], data[12:15])
+
+    live_buffers.drop(42)
+    live_buffers.append(42, timestamps[15:18], data[15:18])  # 새 버퍼는 처음부터 읽는다
+    assert np.array_equal(cursor.poll()[1], data[15:18])
+    assert cursor.cursor == 3 and not cursor.contiguous
+    live_buffers.append(42, timestamps[18:20], data[18:20])
+    assert cursor.poll() is not None and cursor.contiguous
+
+def test_analysis_endpoints_validate_request(session_id):
+    assert client.get(f"/api/v1/sessions/{session_id}/analysis").status_code == 404
+    assert client.get("/api/v1/sessions/999/analysis").status_code == 404
+    assert client.get("/api/v1/analysis/batch/unknown").status_code == 404
+    assert client.post("/api/v1/analysis/batch", json={"mode": "bogus"}).status_code == 422
+
+def test_live_events_validate_request(session_id):
+    assert client.get("/api/v1/sessions/999/live/events").status_code == 404
+    response = client.get(f"/api/v1/sessions/{session_id}/live/events", params={"channels": [5]})
+    assert response.status_code == 400
+    # 레이트가 없는 세션은 필터를 설계할 수 없으므로 스트림을 열기 전에 거부한다
+    response = client.get(f"/api/v1/sessions/{session_id}/live/events", params={"filtered": True})
+    assert response.status_code == 400
+    assert "sampling_rate" in response.json()["detail"]
+
+def test_live_buffer_ignores_rolled_back_writes(session_id):
+    from app import crud
+    db = TestingSessionLocal()
+    timestamps = np.datetime64("2024-01-01T12:00:00", "us") + np.arange(10).astype("timedelta64[ms]")
+    crud.record_samples(db, session_id, timestamps, np.ones((10, 4), dtype=np.float32))
+    db.rollback()
+    db.close()
+    assert live_buffers.get(session_id) is None
+
+def test_signal_overview_uses_pyramid(session_id):
+    from app.ingestion.binary_format import encode_frame
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(250 * 600, 2).astype(np.float32)
+    client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=encode_frame(data, 250.0, start),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    body = client.get(f"/api/v1/sessions/{session_id}/overview", params={"width": 200}).json()
+    assert body["level"] == 2
+    assert body["channels"] == [1, 2]
+    assert 0 < len(body["timestamps"]) <= 200
+    assert min(body["min"][0]) == pytest.approx(float(data[:, 0].min()))
+    assert max(body["max"][1]) == pytest.approx(float(data[:, 1].max()))
+
+    params = {"start": start.isoformat(), "end": (start + timedelta(seconds=5)).isoformat(), "channels": [2]}
+    body = client.get(f"/api/v1/sessions/{session_id}/overview", params=params).json()
+    assert body["level"] == -1
+    assert body["channels"] == [2]
+
+    response = client.get("/api/v1/sessions/999999/overview")
+    assert response.status_code == 404
+
+def test_signal_overview_merges_coarsest_buckets(session_id):
+    from app.dsp import pyramid
+    from app.ingestion.binary_format import encode_frame
+    start = datetime(2024, 1, 1, 0, 0, 0)
+    # 가장 거친 레벨(약 52분)로도 width보다 구간이 많아지도록 하루에 걸쳐 짧은 블록을 보낸다
+    blocks = [np.full((250, 1), float(hour), dtype=np.float32) for hour in range(24)]
+    for hour, block in enumerate(blocks):
+        client.post(
+            f"/api/v1/sessions/{session_id}/signal",
+            content=encode_frame(block, 250.0, start + timedelta(hours=hour)),
+            headers={"Content-Type": "application/octet-stream"}
+        )
+    body = client.get(f"/api/v1/sessions/{session_id}/overview", params={"width": 10}).json()
+    assert body["level"] == pyramid.NUM_LEVELS - 1
+    assert 0 < len(body["timestamps"]) <= 10
+    assert body["bucket_seconds"] > pyramid.bucket_width_us(pyramid.NUM_LEVELS - 1) / 1e6
+    assert min(body["min"][0]) == 0.0 and max(body["max"][0]) == 23.0
+    assert np.mean(body["mean"][0]) == pytest.approx(11.5, abs=1.5)
+
+def test_streaming_export_formats(session_id):
+    import io
+    import json
+    import pyarrow.parquet as pq
+    from app.ingestion.binary_format import encode_frame
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(1000, 4).astype(np.float32)
+    client.post(
+        f"/api/v1/sessions/{session_id}/signal",
+        content=encode_frame(data, 250.0, start),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    # 청크 중간 시각의 데이터 포인트도 시간순으로 끼워 넣어야 한다
+    point = {"timestamp": (start + timedelta(seconds=1, microseconds=2000)).isoformat(), "values": [9.0, 9.0, 9.0, 9.0]}
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": [point]})
+
+    response = client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "csv", "block_size": 100})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "timestamp,Channel 1,Channel 2,Channel 3,Channel 4"
+    assert len(lines) == 1002
+    assert lines[252].startswith("2024-01-01T12:00:01.002000,9.0")
+
+    response = client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "ndjson", "block_size": 100})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1001
+    assert rows[251]["values"] == [9.0, 9.0, 9.0, 9.0]
+    np.testing.assert_allclose(rows[0]["values"], data[0])
+
+    response = client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "parquet", "block_size": 100})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 1001
+    np.testing.assert_array_equal(table.column("Channel 2").to_numpy()[:251], data[:251, 1])
+
+    assert client.get(f"/api/v1/sessions/{session_id}/export", params={"format": "xml"}).status_code == 422
+    assert client.get("/api/v1/sessions/999999/export").status_code == 404
+
+def test_websocket_stream_batches_and_acks(session_id):
+    import json
+    from app.ingestion.binary_format import encode_frame
+    from app.ingestion.stream import SEQ_HEADER
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    data = np.random.randn(2500, 8).astype(np.float32)
+    with client.websocket_connect(f"/api/v1/sessions/{session_id}/stream") as ws:
+        for seq in range(10):
+            frame_start = start + timedelta(seconds=seq)
+            ws.send_bytes(SEQ_HEADER.pack(seq) + encode_frame(data[250 * seq:250 * (seq + 1)], 250.0, frame_start))
+        acked, samples = -1, 0
+        while acked < 9:
+            message = ws.receive_json()
+            acked, samples = message["ack"], samples + message["samples"]
+        assert samples == 2500
+
+        # 재전송과 잘못된 프레임은 저장하지 않는다
+        ws.send_bytes(SEQ_HEADER.pack(3) + encode_frame(data[:250], 250.0, start))
+        assert ws.receive_json() == {"ack": 9, "duplicate": 3}
+        ws.send_text(json.dumps({"seq": 10, "data": [[1.0, 2.0]], "sampling_rate": 250.0}))
+        assert ws.receive_json()["last_seq"] == 10
+        ws.send_text("not json")
+        assert "error" in ws.receive_json()
+
+    db = TestingSessionLocal()
+    from app import crud
+    timestamps, stored = crud.get_signal(db, session_id)
+    # 연속된 프레임은 적은 수의 청크로 합쳐진다
+    assert len(crud.get_signal_chunks(db, session_id)) < 10
+    db.close()
+    np.testing.assert_array_equal(stored, data)
+    assert timestamps[-1] == np.datetime64(start + timedelta(seconds=9.996), "us")
+
+class FakeWebSocket:
+    """StreamIngestor를 직접 구동하기 위한 소켓. receive는 보낼 메시지가 생길 때까지 기다린다."""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+    def send_frame(self, seq, data, **fields):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(dict(fields, seq=seq, data=data))})
+
+    async def wait_for(self, predicate):
+        while not any(predicate(m) for m in self.sent):
+            await asyncio.sleep(0.01)
+
+def test_websocket_stream_duplicates_do_not_shift_timestamps(session_id):
+    from app import crud
+    from app.ingestion.stream import StreamIngestor
+
+    async def scenario():
+        ws = FakeWebSocket()
+        db = TestingSessionLocal()
+        ingestor = StreamIngestor(ws, db, session_id, sampling_rate=10.0, flush_interval=0.01)
+        task = asyncio.create_task(ingestor.run())
+        ws.send_frame(1, [[float(i)] * 4 for i in range(10)], start_time="2024-01-01T00:00:00")
+        await ws.wait_for(lambda m: m.get("ack") == 1)
+        ws.send_frame(1, [[0.0] * 4] * 10)  # 시작 시각 없는 재전송
+        ws.send_frame(2, [[1.0] * 4] * 10)
+        await ws.wait_for(lambda m: m.get("ack") == 2)
+        ws.incoming.put_nowait({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 5)
+        timestamps, _ = crud.get_signal(db, session_id)
+        db.close()
+        return ws.sent, timestamps
+
+    sent, timestamps = asyncio.run(scenario())
+    assert {"ack": 1, "duplicate": 1} in sent
+    assert len(timestamps) == 20
+    assert timestamps[10] == np.datetime64("2024-01-01T00:00:01", "us")  # +2초가 아니라 바로 이어진다
+
+def test_websocket_stream_recovers_from_storage_errors(session_id, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from app import crud
+    from app.ingestion import stream
+    from app.ingestion.stream import StreamIngestor
+    write_async = stream.writer.write_async
+    failures = [OperationalError("INSERT", {}, Exception("database is locked"))]
+
+    async def flaky_write(*args):
+        if failures:
+            raise failures.pop()
+        return await write_async(*args)
+
+    monkeypatch.setattr(stream.writer, "write_async", flaky_write)
+
+    async def scenario():
+        ws = FakeWebSocket()
+        db = TestingSessionLocal()
+        ingestor = StreamIngestor(ws, db, session_id, sampling_rate=10.0, max_pending=2, flush_interval=0.01)
+        task = asyncio.create_task(ingestor.run())
+        ws.send_frame(1, [[1.0] * 4] * 10, start_time="2024-01-01T00:00:00")
+        await ws.wait_for(lambda m: "error" in m)
+        # 거부된 범위를 다시 보내면 중복이 아니라 저장된다
+        ws.send_frame(1, [[1.0] * 4] * 10, start_time="2024-01-01T00:00:00")
+        ws.send_frame(2, [[2.0] * 4] * 10)
+        await ws.wait_for(lambda m: m.get("ack") == 2)
+        ws.incoming.put_nowait({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 5)
+        timestamps, data = crud.get_signal(db, session_id)
+        db.close()
+        return ws.sent, timestamps, data
+
+    sent, timestamps, data = asyncio.run(scenario())
+    error = next(m for m in sent if "error" in m)
+    assert (error["first_seq"], error["last_seq"]) == (1, 1)
+    assert not any("duplicate" in m for m in sent)
+    assert len(timestamps) == 20 and timestamps[10] == np.datetime64("2024-01-01T00:00:01", "us")
+
+def test_websocket_stream_unknown_session():
+    from starlette.websockets import WebSocketDisconnect
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/v1/sessions/999999/stream") as ws:
+            ws.receive_json()
+
+def test_session_create_and_delete_go_through_writer():
+    from app.ingestion import writer
+    from app.models import BCISignalChunk
+    active = writer.start_writer(sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine))
+    try:
+        form = {"session_name": "Via Writer", "date_recorded": "2024-01-01", "subject_id": "s1", "sampling_rate": "250"}
+        response = client.post("/api/v1/create", data=form, follow_redirects=False)
+        assert response.status_code == 303
+        db = TestingSessionLocal()
+        session = db.query(BCISession).filter(BCISession.session_name == "Via Writer").one()
+        session_id = session.id
+        db.close()
+        points = [{"timestamp": datetime(2024, 1, 1, 12, 0, i).isoformat(), "values": [i]} for i in range(5)]
+        client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+
+        response = client.post(f"/api/v1/{session_id}/delete", follow_redirects=False)
+        assert response.status_code == 303
+        assert client.post(f"/api/v1/{session_id}/delete", follow_redirects=False).status_code == 404
+        # 생성, 수집, 삭제가 모두 writer에서 커밋됐다
+        assert active.stats()["jobs_committed"] >= 3
+    finally:
+        writer.stop_writer()
+    db = TestingSessionLocal()
+    assert db.query(BCISession).filter(BCISession.id == session_id).count() == 0
+    assert db.query(BCISignalChunk).filter(BCISignalChunk.session_id == session_id).count() == 0
+    db.close()
+
+def test_html_pages_use_async_session(session_id):
+    response = client.get("/session-list")
+    assert response.status_code == 200
+    assert "Test Session" in response.text
+    response = client.get(f"/session-detail/{session_id}")
+    assert response.status_code == 200
+
+def test_session_pages_use_fixed_query_count(session_id):
+    from sqlalchemy import event
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    points = [{"timestamp": (start + timedelta(seconds=i)).isoformat(), "values": [1.0, 2.0]} for i in range(11)]
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": points})
+
+    summaries = client.get("/api/v1/sessions/").json()
+    assert summaries[0]["id"] == session_id
+    assert summaries[0]["sample_count"] == 11
+    assert summaries[0]["duration_seconds"] == 10.0
+    assert "data_points" not in summaries[0]
+
+    statements = []
+    def count_statement(*args):
+        statements.append(args[2])
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        counts = []
+        for extra in (0, 5):
+            db = TestingSessionLocal()
+            db.add_all([BCISession(session_name=f"Extra {i}", date_recorded=start, subject_id="s") for i in range(extra)])
+            db.commit()
+            db.close()
+            statements.clear()
+            for page in ("/", "/session-list", "/dashboard"):
+                assert client.get(page).status_code == 200
+            counts.append(len(statements))
+        assert counts[0] == counts[1] == 4
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+def test_dashboard_reads_summary_counts(session_id):
+    point = {"timestamp": "2024-01-01T00:00:00", "channel_1": 1, "channel_2": 2, "channel_3": 3, "channel_4": 4}
+    client.post(f"/api/v1/sessions/{session_id}/data/bulk", json={"data_points": [point] * 3})
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    stats = client.get(f"/api/v1/sessions/{session_id}/stats").json()
+    assert stats[0]["count"] == 3
+    assert stats[3]["mean"] == 4
@@ -4,6 +4,7 @@ from sqlalchemy.orm import sessionmaker
 from app.database import Base
 from app.models import BCISession, BCIData, User
 from datetime import datetime
+import numpy as np
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
@@ -45,4 +46,90 @@ def test_create_user(db_session):
     assert user.username == "testuser"
     assert user.email == "test@example.com"
 
-# Add more tests as needed
\ No newline at end of file
+# Add more tests as needed
+# 채널 벡터, 청크 저장 등을 도입하기 전의 스키마
+BASELINE_SCHEMA = [
+    "CREATE TABLE bci_sessions (id INTEGER NOT NULL PRIMARY KEY, session_name VARCHAR, date_recorded DATETIME, subject_id VARCHAR)",
+    "CREATE TABLE bci_data (id INTEGER NOT NULL PRIMARY KEY, session_id INTEGER REFERENCES bci_sessions (id), timestamp DATETIME, "
+    "channel_1 FLOAT, channel_2 FLOAT, channel_3 FLOAT, channel_4 FLOAT)",
+    "INSERT INTO bci_sessions (id, session_name, date_recorded, subject_id) VALUES (1, 'old', '2024-01-01 00:00:00.000000', 's')",
+    "INSERT INTO bci_data (session_id, timestamp, channel_1, channel_2, channel_3, channel_4) VALUES "
+    "(1, '2024-01-01 12:00:00.000000', 1.0, 2.0, 3.0, 4.0), (1, '2024-01-01 12:00:01.000000', 5.0, 6.0, 7.0, 8.0)",
+]
+
+def test_upgrade_schema_adds_missing_columns(tmp_path):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import inspect, text
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.database import get_async_db, get_db, upgrade_schema
+    from app.main import app
+
+    url = f"sqlite:///{tmp_path / 'old.db'}"
+    old_engine = create_engine(url, connect_args={"check_same_thread": False})
+    with old_engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(text(statement))
+    upgrade_schema(old_engine)
+    upgrade_schema(old_engine)  # 두 번째 실행은 아무것도 바꾸지 않는다
+    columns = {c["name"]: c for c in inspect(old_engine).get_columns("bci_sessions")}
+    assert {"storage_mode", "sampling_rate", "archived_at"} <= set(columns)
+    assert "vector" in {c["name"] for c in inspect(old_engine).get_columns("bci_data")}
+    assert "ix_bci_data_session_timestamp" in {i["name"] for i in inspect(old_engine).get_indexes("bci_data")}
+
+    OldSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=old_engine)
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    OldAsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    def override_get_db():
+        db = OldSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with OldAsyncSessionLocal() as db:
+            yield db
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        client = TestClient(app)
+        sessions = client.get("/api/v1/sessions/")
+        assert sessions.status_code == 200
+        assert sessions.json()[0]["id"] == 1
+        page = client.get("/api/v1/sessions/1/data")
+        assert page.status_code == 200
+        assert len(page.json()["items"]) == 2
+        assert client.get("/session-detail/1").status_code == 200
+    finally:
+        app.dependency_overrides = previous_overrides
+        old_engine.dispose()
+
+def test_legacy_channel_rows_after_upgrade(tmp_path):
+    from sqlalchemy import text
+    from app import crud, schemas
+    from app.database import upgrade_schema
+
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}", connect_args={"check_same_thread": False})
+    with old_engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(text(statement))
+    upgrade_schema(old_engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=old_engine)()
+    try:
+        # vector가 없는 행은 channel_1..4에서 읽는다
+        assert db.execute(text("SELECT COUNT(*) FROM bci_data WHERE vector IS NULL")).scalar() == 2
+        points = crud.get_data_points(db, 1)
+        assert [p.values for p in points] == [[1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0]]
+        _, data = crud.get_data_point_arrays(db, 1)
+        np.testing.assert_array_equal(data, [[1, 2, 3, 4], [5, 6, 7, 8]])
+
+        # 새 행은 벡터로 저장되고, 이전 행과 함께 세션 신호로 읽힌다
+        crud.create_data_point(db, schemas.BCIDataCreate(timestamp=datetime(2024, 1, 1, 12, 0, 2), values=[9.0, 10.0, 11.0, 12.0]), 1)
+        timestamps, signal = crud.get_session_signal(db, 1)
+        np.testing.assert_array_equal(signal[:, 0], [1, 5, 9])
+    finally:
+        db.close()
+        old_engine.dispose()
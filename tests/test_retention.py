@@ -0,0 +1,172 @@
+import pytest
+import numpy as np
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import BCISession, BCIData, BCISignalChunk, BCIChannelStats, BCISignalPyramid
+from app import crud, schemas
+from app.maintenance import retention
+from datetime import datetime, timedelta
+
+NOW = datetime(2024, 6, 1)
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'retention.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, record: conn.execute("PRAGMA auto_vacuum=INCREMENTAL"))
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def add_session(db, name, recorded):
+    session = BCISession(session_name=name, date_recorded=recorded, subject_id="subject1")
+    db.add(session)
+    db.commit()
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    crud.create_signal_chunk(db, session.id, np.random.randn(2000, 4), start, 250.0)
+    points = [
+        schemas.BCIDataCreate(timestamp=start + timedelta(seconds=10 + i), channel_1=1.0, channel_2=2.0, channel_3=3.0, channel_4=4.0)
+        for i in range(50)
+    ]
+    crud.create_data_points_bulk(db, points, session.id)
+    return session.id
+
+def count(db, table, session_id):
+    return db.query(table).filter(table.session_id == session_id).count()
+
+def test_retention_deletes_old_sessions_and_purges_raw_data(db_session):
+    old = add_session(db_session, "old", NOW - timedelta(days=400))
+    stale = add_session(db_session, "stale", NOW - timedelta(days=60))
+    fresh = add_session(db_session, "fresh", NOW - timedelta(days=1))
+
+    result = retention.run_retention(db_session, session_days=365, raw_data_days=30, chunk_size=7, vacuum_pages=100, now=NOW)
+    assert result["sessions_deleted"] == 1
+    assert result["sessions_purged"] == 1
+    assert result["rows_deleted"] == 2 * 51
+    assert result["pages_vacuumed"] > 0
+
+    assert db_session.get(BCISession, old) is None
+    for table in (BCIData, BCISignalChunk, BCIChannelStats, BCISignalPyramid):
+        assert count(db_session, table, old) == 0
+
+    db_session.expire_all()
+    assert db_session.get(BCISession, stale).raw_data_purged_at == NOW
+    assert count(db_session, BCIData, stale) == 0
+    assert count(db_session, BCISignalChunk, stale) == 0
+    assert crud.summarize_channel_stats(crud.get_channel_stats(db_session, stale))[0].count == 2050
+    assert count(db_session, BCISignalPyramid, stale) > 0
+
+    assert count(db_session, BCIData, fresh) == 50
+    assert db_session.get(BCISession, fresh).raw_data_purged_at is None
+
+    # 이미 처리한 세션은 다시 대상이 되지 않는다
+    again = retention.run_retention(db_session, session_days=365, raw_data_days=30, now=NOW)
+    assert again["sessions_deleted"] == again["sessions_purged"] == again["rows_deleted"] == 0
+
+def test_delete_session_is_set_based(db_session):
+    session_id = add_session(db_session, "delete me", NOW)
+    assert crud.delete_session(db_session, session_id)
+    assert db_session.query(BCISession).count() == 0
+    for table in (BCIData, BCISignalChunk, BCIChannelStats, BCISignalPyramid):
+        assert db_session.query(table).count() == 0
+    assert db_session.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+def test_archival_moves_session_to_parquet(db_session, tmp_path, monkeypatch):
+    from app.config import settings
+    from app.maintenance import archival
+    from app.analysis import analyze_session_window
+    monkeypatch.setattr(settings, "ARCHIVE_STORAGE_DIR", str(tmp_path / "archive"))
+    old = add_session(db_session, "old", NOW - timedelta(days=60))
+    fresh = add_session(db_session, "fresh", NOW - timedelta(days=1))
+    before_ts, before_data = crud.get_session_signal(db_session, old)
+
+    result = archival.run_archival(db_session, 30, chunk_size=7, now=NOW)
+    assert result["sessions_archived"] == 1
+    assert result["samples_archived"] == 2050
+
+    db_session.expire_all()
+    session = db_session.get(BCISession, old)
+    assert session.archived_at == NOW
+    assert (tmp_path / "archive" / f"session_{old}.parquet").exists()
+    assert count(db_session, BCIData, old) == 0
+    assert count(db_session, BCISignalChunk, old) == 0
+    assert count(db_session, BCIData, fresh) == 50
+
+    # 보관 후에도 같은 신호를 같은 순서로 읽는다
+    after_ts, after_data = crud.get_session_signal(db_session, old)
+    np.testing.assert_array_equal(after_ts, before_ts)
+    np.testing.assert_array_equal(after_data, before_data)
+    window_ts, window_data = crud.get_signal(db_session, old, datetime(2024, 1, 1, 12, 0, 1), datetime(2024, 1, 1, 12, 0, 2))
+    assert len(window_ts) == 251
+    assert analyze_session_window(db_session, session)["num_data_points"] == 2050
+
+    with pytest.raises(ValueError):
+        crud.create_signal_chunk(db_session, old, np.zeros((10, 4)), NOW, 250.0)
+
+    retention.run_retention(db_session, session_days=45, now=NOW)
+    assert not (tmp_path / "archive" / f"session_{old}.parquet").exists()
+
+def test_archival_blocks_writes_before_reading(db_session, tmp_path, monkeypatch):
+    from app.config import settings
+    from app.maintenance import archival
+    from app.storage import session_archive
+    monkeypatch.setattr(settings, "ARCHIVE_STORAGE_DIR", str(tmp_path / "archive"))
+    old = add_session(db_session, "old", NOW - timedelta(days=60))
+    write_archive = session_archive.write_session_archive
+    rejected = []
+
+    def write_then_insert(path, labels, blocks):
+        written = write_archive(path, labels, blocks)
+        # 보관 파일을 읽은 뒤 퍼지 전에 들어온 쓰기는 (지워지지 않고) 거부되어야 한다
+        try:
+            crud.create_signal_chunk(db_session, old, np.ones((10, 4)), NOW, 250.0)
+        except ValueError:
+            db_session.rollback()
+            rejected.append(True)
+        return written
+
+    monkeypatch.setattr(session_archive, "write_session_archive", write_then_insert)
+    assert archival.archive_session(db_session, old, now=NOW) == 2050
+    assert rejected == [True]
+    db_session.expire_all()
+    assert len(crud.get_session_signal(db_session, old)[0]) == 2050
+
+    # 보관 파일 쓰기가 실패하면 보관 표시를 되돌리고 원시 데이터는 그대로 둔다
+    other = add_session(db_session, "other", NOW - timedelta(days=60))
+    monkeypatch.setattr(session_archive, "write_session_archive", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        archival.archive_session(db_session, other, now=NOW)
+    db_session.expire_all()
+    assert db_session.get(BCISession, other).archived_at is None
+    assert count(db_session, BCISignalChunk, other) == 1
+
+def test_batch_analysis_runs_sessions_in_worker_processes(db_session, tmp_path):
+    import json
+    from app.maintenance import batch_analysis
+    from app.models import BCIAnalysisResult
+    ids = [add_session(db_session, f"s{i}", NOW) for i in range(3)]
+    empty = BCISession(session_name="empty", date_recorded=NOW, subject_id="subject1")
+    db_session.add(empty)
+    db_session.commit()
+
+    output = tmp_path / "results.jsonl"
+    seen = []
+    report = batch_analysis.run_batch_analysis(
+        db_session, ids + [empty.id], workers=2, database_url=str(db_session.bind.url),
+        output_path=str(output), progress=lambda done, total, outcome: seen.append((done, total))
+    )
+    assert (report.succeeded, report.failed) == (3, 1)
+    assert set(report.timings) == set(ids) and "no samples" in report.failures[empty.id]
+    assert seen[-1] == (4, 4)
+    assert len(output.read_text().splitlines()) == 4
+
+    rows = db_session.query(BCIAnalysisResult).filter(BCIAnalysisResult.run_id == report.run_id).all()
+    assert len(rows) == 4
+    latest = crud.get_latest_analysis_result(db_session, ids[0])
+    assert latest.status == "ok" and latest.result["num_data_points"] == 2050
+    assert json.loads(output.read_text().splitlines()[0])["run_id"] == report.run_id
+
+    crud.delete_session(db_session, ids[0])  # 결과도 세션과 함께 지워진다
+    assert count(db_session, BCIAnalysisResult, ids[0]) == 0
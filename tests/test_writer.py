@@ -0,0 +1,159 @@
+import asyncio
+import os
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, _set_sqlite_pragmas
+from app.models import BCISession, BCISignalChunk
+from app.ingestion.writer import SingleWriter
+from app.ingestion.ingest_queue import IngestionQueue, IngestionQueueFull
+from app import crud
+from datetime import datetime, timedelta
+
+@pytest.fixture
+def wal_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def writer(wal_engine):
+    factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=wal_engine)
+    writer = SingleWriter(factory, max_batch=16)
+    writer.start()
+    yield writer
+    writer.stop()
+
+def test_single_writer_group_commits(wal_engine, writer):
+    db = sessionmaker(bind=wal_engine)()
+    assert db.execute("PRAGMA journal_mode").scalar() == "wal"
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x")
+    db.add(session)
+    db.commit()
+
+    start = datetime(2024, 1, 1)
+    def submit(i):
+        return writer.submit(crud.add_signal_chunk, session.id, np.full((10, 2), i), start + timedelta(seconds=i), 10.0)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = list(pool.map(submit, range(200)))
+    chunks = [f.result(timeout=10) for f in futures]
+
+    # 분리된 객체라도 커밋 시점의 속성을 읽을 수 있어야 한다
+    assert sorted(c.id for c in chunks) == list(range(1, 201))
+    assert db.query(BCISignalChunk).count() == 200
+    stats = writer.stats()
+    assert stats["jobs_committed"] == 200
+    assert stats["batches_committed"] <= 200
+    db.close()
+
+def test_single_writer_isolates_failed_job(wal_engine, writer):
+    db = sessionmaker(bind=wal_engine)()
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x")
+    db.add(session)
+    db.commit()
+
+    ok = writer.submit(crud.add_signal_chunk, session.id, np.zeros((5, 2)), datetime(2024, 1, 1), 10.0)
+    bad = writer.submit(crud.add_signal_chunk, session.id, np.zeros((0, 2)), datetime(2024, 1, 1), 10.0)
+    assert ok.result(timeout=10).sample_count == 5
+    with pytest.raises(ValueError):
+        bad.result(timeout=10)
+    db.close()
+
+def test_single_writer_retry_does_not_duplicate_file_appends(wal_engine, tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from app.config import settings
+    monkeypatch.setattr(settings, "SIGNAL_STORAGE_DIR", str(tmp_path))
+    factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=wal_engine)
+    db = factory()
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x", storage_mode="file")
+    db.add(session)
+    db.commit()
+
+    # 묶음 커밋이 실패하면 하나씩 다시 실행하므로 첫 작업의 파일 추가가 두 번 일어난다
+    data = np.arange(10, dtype=np.float32).reshape(5, 2)
+    jobs = [
+        (crud.add_signal_chunk, (session.id, data, datetime(2024, 1, 1), 10.0), {}, Future()),
+        (crud.add_signal_chunk, (session.id, np.zeros((5, 3)), datetime(2024, 1, 2), 10.0), {}, Future()),
+    ]
+    SingleWriter(factory)._commit_batch(db, jobs)
+    assert jobs[0][3].result().file_offset == 0
+    with pytest.raises(ValueError):
+        jobs[1][3].result()
+
+    db.expire_all()
+    path = db.get(BCISession, session.id).signal_path
+    assert os.path.getsize(path) == data.nbytes
+    np.testing.assert_array_equal(crud.get_signal(db, session.id)[1], data)
+    db.close()
+
+def test_ingestion_queue_batches_and_isolates_failures(wal_engine):
+    factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=wal_engine)
+    db = factory()
+    session = BCISession(session_name="s", date_recorded=datetime(2024, 1, 1), subject_id="x")
+    db.add(session)
+    db.commit()
+
+    async def run():
+        queue = IngestionQueue(factory, flush_samples=1000, flush_interval=0.05)
+        queue.start()
+        start = datetime(2024, 1, 1)
+        jobs = [
+            queue.submit(crud.add_signal_chunk, session.id, np.full((10, 2), i), start + timedelta(seconds=i), 10.0, samples=10)
+            for i in range(20)
+        ]
+        jobs.append(queue.submit(crud.add_signal_chunk, session.id, np.zeros((0, 2)), start, 10.0, samples=1))
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        await queue.stop()
+        return queue, results
+
+    queue, results = asyncio.run(run())
+    assert [r.sample_count for r in results[:20]] == [10] * 20
+    assert isinstance(results[20], ValueError)
+    assert queue.stats()["flushes"] == 1  # 크기 기준에 닿기 전이므로 시간 기준으로 한 번에 저장
+    assert queue.stats()["pending_samples"] == 0
+    assert db.query(BCISignalChunk).count() == 20
+    db.close()
+
+def test_ingestion_queue_survives_flush_errors(wal_engine):
+    factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=wal_engine)
+    calls = []
+
+    def flaky_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return factory()
+
+    async def run():
+        queue = IngestionQueue(flaky_factory, flush_interval=0.01)
+        queue.start()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(queue.submit(crud.add_signal_chunk, 1, np.zeros((10, 2)), datetime(2024, 1, 1), 10.0, samples=10), 5)
+        # flusher가 살아 있어 다음 요청은 저장되고, 실패한 배치의 샘플 수도 반환됐다
+        chunk = await asyncio.wait_for(queue.submit(crud.add_signal_chunk, 1, np.zeros((10, 2)), datetime(2024, 1, 2), 10.0, samples=10), 5)
+        await queue.stop()
+        return queue, chunk
+
+    queue, chunk = asyncio.run(run())
+    assert chunk.sample_count == 10
+    assert queue.stats()["pending_samples"] == 0
+
+def test_ingestion_queue_rejects_when_full(wal_engine):
+    factory = sessionmaker(bind=wal_engine)
+
+    async def run():
+        queue = IngestionQueue(factory, max_samples=100, enqueue_timeout=0.01)
+        blocked = asyncio.ensure_future(queue.submit(crud.add_signal_chunk, 1, np.zeros((100, 2)), datetime(2024, 1, 1), 10.0, samples=100))
+        await asyncio.sleep(0)
+        # flusher가 시작되지 않았으므로 자리가 나지 않는다
+        with pytest.raises(IngestionQueueFull):
+            await queue.submit(crud.add_signal_chunk, 1, np.zeros((1, 2)), datetime(2024, 1, 1), 10.0, samples=1)
+        blocked.cancel()
+        return queue
+
+    assert asyncio.run(run()).stats()["rejected"] == 1